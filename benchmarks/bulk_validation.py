@@ -0,0 +1,67 @@
+"""
+Benchmark of the validation of bulk insert payloads, in items per second: parsing the request body with orjson and
+validating the items completely with the Item model (`BULK_VALIDATION=full`), or only checking the fields needed for
+indexing (`BULK_VALIDATION=fast`). The OpenSearch writes are not included.
+
+    python benchmarks/bulk_validation.py --items 5000 --repeat 5
+"""
+
+import argparse
+import json
+import time
+from copy import deepcopy
+from pathlib import Path
+
+import orjson
+from stac_fastapi.extensions.third_party.bulk_transactions import Items
+from stac_pydantic import Item
+
+from terra_stac_api.validation import check_items
+
+ITEM = (
+    Path(__file__).parent.parent
+    / "tests/resources/items/extra/S2A_20230220T093031_36VVR_TOC_V210.json"
+)
+
+
+def payload(count: int) -> bytes:
+    with open(ITEM) as f:
+        item = json.load(f)
+    items = {}
+    for i in range(count):
+        copy = deepcopy(item)
+        copy["id"] = f"{item['id']}_{i}"
+        items[copy["id"]] = copy
+    return orjson.dumps({"items": items, "method": "upsert"})
+
+
+def full(body: bytes):
+    items = Items(**orjson.loads(body))
+    for item in items.items.values():
+        Item(**item).model_dump(mode="json")
+
+
+def fast(body: bytes):
+    items = Items(**orjson.loads(body))
+    check_items(items.items.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=5000, help="items per payload")
+    parser.add_argument("--repeat", type=int, default=5, help="number of runs")
+    args = parser.parse_args()
+
+    body = payload(args.items)
+    print(f"payload of {args.items} items, {len(body) / 1e6:.1f} MB")
+    for mode, validate in (("full", full), ("fast", fast)):
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            validate(body)
+            best = min(best, time.perf_counter() - start)
+        print(f"{mode}: {args.items / best:,.0f} items/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Load test of the API against a local Elasticsearch container, as started by the tests (or an existing cluster with
+`--es-host`, of which only the synthetic collections are deleted afterwards). Seeds a synthetic dataset (see
+:mod:`terra_stac_api.synthetic`) of collections with mixed `_auth` ACLs and items, then measures the throughput and p50/p95/p99
+latencies of searches (anonymous, role-limited and admin), item requests, collection searches (`q` and `filter`),
+aggregations and bulk inserts. The API is called in process, so the latencies exclude the network and the HTTP server.
+
+The results are written as JSON, and compared with a baseline (the results of an earlier run): the exit code is 1
+when the p95 latency or the throughput of a scenario regressed by more than the tolerance.
+
+    python benchmarks/load.py --collections 20 --items 500 --output results.json
+    python benchmarks/load.py --collections 20 --items 500 --baseline results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from terra_stac_api import synthetic
+
+RESOURCES = Path(__file__).parent.parent / "tests/resources"
+ES_VERSION = "7.17.23"
+ES_PORT = 9200
+
+ROLE_ADMIN = "stac-admin"
+ROLE_ANONYMOUS = synthetic.ROLE_ANONYMOUS
+SEED_BATCH_SIZE = 500
+
+# a request: method, url and keyword arguments of httpx
+Request = Tuple[str, str, Dict[str, Any]]
+
+
+def dataset(args: argparse.Namespace) -> Iterator[Tuple[dict, Iterator[dict]]]:
+    return synthetic.dataset(args.seed, args.collections, args.items, roles=args.roles)
+
+
+def bulk_items(args: argparse.Namespace, collection_id: str, i: int) -> dict:
+    """
+    New items of a collection for the `i`th bulk insert.
+    """
+    collection = synthetic.collection(
+        args.seed, int(collection_id.split("-")[1]), roles=args.roles
+    )
+    result = {}
+    for item in synthetic.items(args.seed + 1 + i, collection, args.bulk_size):
+        item["id"] += f"_bulk{i}"
+        result[item["id"]] = item
+    return result
+
+
+def summarize(latencies: List[float], errors: int, wall_time: float) -> dict:
+    """
+    Summarize the latencies (in seconds) of the requests of a scenario, in milliseconds.
+    """
+    p = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / wall_time,
+        "p50_ms": p[49] * 1000,
+        "p95_ms": p[94] * 1000,
+        "p99_ms": p[98] * 1000,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    Compare the results with a baseline.
+
+    :return: the regressions of the p95 latency or the throughput by more than the tolerance (a fraction)
+    """
+    regressions = []
+    for name, result in results["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {result['p95_ms']:.1f} ms, baseline {base['p95_ms']:.1f} ms"
+            )
+        if result["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {result['throughput']:.1f}/s, "
+                f"baseline {base['throughput']:.1f}/s"
+            )
+    return regressions
+
+
+def auth(*roles: str) -> Dict[str, str]:
+    # the roles are read from the Authorization header by the benchmark authentication backend
+    return {"Authorization": ",".join(roles)} if roles else {}
+
+
+def scenarios(args: argparse.Namespace) -> Dict[str, Callable[[int], Request]]:
+    """
+    Requests of the scenarios, by index of the request.
+    """
+    admin = auth(ROLE_ADMIN)
+    ids = [f"synthetic-{i:05d}" for i in range(args.collections)]
+    roles = [f"role-{i}" for i in range(args.roles)]
+    return {
+        "search_anonymous": lambda i: ("POST", "/search", {"json": {"limit": 10}}),
+        "search_role": lambda i: (
+            "POST",
+            "/search",
+            {"json": {"limit": 10}, "headers": auth(roles[i % len(roles)])},
+        ),
+        "search_admin": lambda i: (
+            "POST",
+            "/search",
+            {
+                "json": {
+                    "limit": 10,
+                    "collections": ids[i % len(ids) :][:3],
+                    "datetime": f"{2015 + i % 10}-01-01T00:00:00Z/{2015 + i % 10}-02-01T00:00:00Z",
+                },
+                "headers": admin,
+            },
+        ),
+        "get_item": lambda i: (
+            "GET",
+            f"/collections/{ids[i % len(ids)]}/items/"
+            f"{ids[i % len(ids)]}_{i % args.items:07d}",
+            {"headers": admin},
+        ),
+        "collections_q": lambda i: (
+            "GET",
+            "/collections",
+            {"params": {"q": f"collection {i % args.collections}"}},
+        ),
+        "collections_filter": lambda i: (
+            "GET",
+            "/collections",
+            {
+                "params": {"filter": f"title = 'Synthetic collection {i % len(ids)}'"},
+                "headers": auth(roles[i % len(roles)]),
+            },
+        ),
+        "aggregate": lambda i: (
+            "GET",
+            "/aggregate",
+            {
+                "params": {
+                    "collections": ",".join(ids[i % len(ids) :][:3]),
+                    "aggregations": "total_count,datetime_frequency",
+                    "datetime_frequency_interval": "day",
+                },
+                "headers": admin,
+            },
+        ),
+        "bulk_insert": lambda i: (
+            "POST",
+            f"/collections/{ids[i % len(ids)]}/bulk_items",
+            {
+                "json": {"items": bulk_items(args, ids[i % len(ids)], i)},
+                "headers": admin,
+            },
+        ),
+    }
+
+
+async def measure(client, requests: List[Request], concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def send(request: Request):
+        nonlocal errors
+        method, url, kwargs = request
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*map(send, requests))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def seed(client, args: argparse.Namespace):
+    admin = auth(ROLE_ADMIN)
+    for collection, c_items in dataset(args):
+        response = await client.post("/collections", json=collection, headers=admin)
+        response.raise_for_status()
+        for batch in synthetic.batches(c_items, SEED_BATCH_SIZE):
+            response = await client.post(
+                f"/collections/{collection['id']}/bulk_items",
+                json={"items": {item["id"]: item for item in batch}},
+                headers=admin,
+            )
+            response.raise_for_status()
+
+
+async def cleanup(database, args: argparse.Namespace):
+    """
+    Remove the synthetic collections and their items. Everything is removed only from the container started by the
+    script or with `--destructive`: an existing cluster keeps its other collections.
+    """
+    from stac_fastapi.types.errors import NotFoundError
+
+    if args.es_host is None or args.destructive:
+        await database.delete_items()
+        await database.delete_collections()
+        return
+    for i in range(args.collections):
+        try:
+            await database.delete_collection(f"synthetic-{i:05d}")
+        except NotFoundError:
+            pass
+
+
+async def run(args: argparse.Namespace) -> dict:
+    # the settings are read when importing the application
+    os.environ["OIDC_ISSUER"] = "https://example.com"
+    os.environ["ROLE_ADMIN"] = ROLE_ADMIN
+    os.environ["ROLE_ANONYMOUS"] = ROLE_ANONYMOUS
+
+    from asgi_lifespan import LifespanManager
+    from fastapi.openapi.models import OAuth2
+    from httpx import ASGITransport, AsyncClient
+    from starlette.authentication import (
+        AuthCredentials,
+        SimpleUser,
+        UnauthenticatedUser,
+    )
+
+    import terra_stac_api.auth
+
+    class RolesBackend(terra_stac_api.auth.OIDC):
+        """
+        Authentication with the roles in the Authorization header instead of an access token, as in the tests.
+        """
+
+        def __init__(self, issuer: str, **kwargs):
+            self.model = OAuth2(flows=dict())
+            self.scheme_name = "OpenID Connect"
+
+        async def authenticate(self, conn):
+            header = conn.headers.get("Authorization")
+            if not header:
+                return AuthCredentials([ROLE_ANONYMOUS]), UnauthenticatedUser()
+            return AuthCredentials(header.split(",") + [ROLE_ANONYMOUS]), SimpleUser(
+                "benchmark"
+            )
+
+    terra_stac_api.auth.OIDC = RolesBackend
+    from terra_stac_api.app import api
+
+    try:
+        # remove the residues of an aborted run
+        await cleanup(api.client.database, args)
+    except Exception as e:
+        print(f"not cleaned up: {e}")
+    results = {
+        "parameters": {
+            k: v for k, v in vars(args).items() if k not in ("output", "baseline")
+        },
+        "python": platform.python_version(),
+        "scenarios": {},
+    }
+    async with (
+        LifespanManager(api.app) as manager,
+        AsyncClient(
+            transport=ASGITransport(app=manager.app),
+            base_url="http://benchmark",
+            timeout=None,
+        ) as client,
+    ):
+        start = time.perf_counter()
+        await seed(client, args)
+        await api.client.database.client.indices.refresh(index="_all")
+        print(
+            f"seeded {args.collections} collections with {args.items} items each "
+            f"in {time.perf_counter() - start:.1f} s"
+        )
+        for name, request in scenarios(args).items():
+            if args.scenarios and name not in args.scenarios:
+                continue
+            count = args.bulk_requests if name == "bulk_insert" else args.requests
+            await measure(client, [request(-1 - i) for i in range(args.warmup)], 1)
+            result = await measure(
+                client, [request(i) for i in range(count)], args.concurrency
+            )
+            if name == "bulk_insert":
+                result["items_per_second"] = result["throughput"] * args.bulk_size
+            results["scenarios"][name] = result
+            print(
+                f"{name}: {result['throughput']:.1f} requests/s, p50 {result['p50_ms']:.1f} ms, "
+                f"p95 {result['p95_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms, "
+                f"{result['errors']} errors"
+            )
+    await cleanup(api.client.database, args)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--collections", type=int, default=20, help="number of collections"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the dataset")
+    parser.add_argument(
+        "--roles", type=int, default=5, help="roles of the role-limited collections"
+    )
+    parser.add_argument("--items", type=int, default=500, help="items per collection")
+    parser.add_argument(
+        "--requests", type=int, default=200, help="requests per scenario"
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=10, help="warm-up requests per scenario"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="concurrent requests"
+    )
+    parser.add_argument(
+        "--bulk-size", type=int, default=100, help="items per bulk insert"
+    )
+    parser.add_argument(
+        "--bulk-requests", type=int, default=20, help="number of bulk inserts"
+    )
+    parser.add_argument("--scenarios", nargs="*", help="only run these scenarios")
+    parser.add_argument(
+        "--es-host", help="use an existing cluster instead of a container"
+    )
+    parser.add_argument("--es-port", type=int, default=ES_PORT)
+    parser.add_argument(
+        "--destructive",
+        action="store_true",
+        help="delete all the collections and items of the existing cluster afterwards",
+    )
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="results to compare with")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed regression, as a fraction"
+    )
+    args = parser.parse_args()
+
+    with ExitStack() as stack:
+        if args.es_host is None:
+            from testcontainers.elasticsearch import ElasticSearchContainer
+
+            container = ElasticSearchContainer(
+                f"elasticsearch:{ES_VERSION}",
+                mem_limit="1G",
+                volumes=[
+                    (
+                        str(RESOURCES / "elasticsearch.yml"),
+                        "/usr/share/elasticsearch/config/elasticsearch.yml",
+                        "rw",
+                    )
+                ],
+            ).with_bind_ports(ES_PORT, args.es_port)
+            stack.enter_context(container)
+        os.environ["ES_HOST"] = args.es_host or "0.0.0.0"
+        os.environ["ES_PORT"] = str(args.es_port)
+        os.environ.setdefault("ES_USE_SSL", "false")
+        os.environ.setdefault("ES_VERIFY_CERTS", "false")
+        results = asyncio.run(run(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import HTTPException
+from stac_fastapi.types.rfc3339 import str_to_interval
+from starlette import status
+
+from terra_stac_api.config import Settings
+from terra_stac_api.planning import geometry_bbox
+
+settings = Settings()
+logger = logging.getLogger(__name__)
+
+WORLD_AREA = 360.0 * 180.0
+# time span of searches without (start or end) datetime
+UNBOUNDED_TIME_SPAN = timedelta(days=50 * 365)
+DEFAULT_DATETIME_INTERVAL = "month"
+# from coarse to fine
+DATETIME_INTERVALS = {
+    "year": timedelta(days=365),
+    "quarter": timedelta(days=91),
+    "month": timedelta(days=30),
+    "week": timedelta(weeks=1),
+    "day": timedelta(days=1),
+    "hour": timedelta(hours=1),
+    "minute": timedelta(minutes=1),
+    "second": timedelta(seconds=1),
+}
+# number of cells covering the world for a precision
+GRID_CELLS = {
+    "geohash": lambda precision: 32**precision,
+    "geohex": lambda precision: 122 * 7**precision,
+    "geotile": lambda precision: 4**precision,
+}
+# precision parameter, grid type and minimum precision of the grid aggregations
+GRID_AGGREGATIONS = {
+    "centroid_geohash_grid_frequency": (
+        "centroid_geohash_grid_frequency_precision",
+        "geohash",
+        1,
+    ),
+    "centroid_geohex_grid_frequency": (
+        "centroid_geohex_grid_frequency_precision",
+        "geohex",
+        0,
+    ),
+    "centroid_geotile_grid_frequency": (
+        "centroid_geotile_grid_frequency_precision",
+        "geotile",
+        0,
+    ),
+    "geometry_geohash_grid_frequency": (
+        "geometry_geohash_grid_frequency_precision",
+        "geohash",
+        1,
+    ),
+    "geometry_geotile_grid_frequency": (
+        "geometry_geotile_grid_frequency_precision",
+        "geotile",
+        0,
+    ),
+}
+DATETIME_AGGREGATION = "datetime_frequency"
+DATETIME_INTERVAL_PARAMETER = "datetime_frequency_interval"
+
+
+def area_fraction(bbox: Optional[List[float]]) -> float:
+    """
+    Get the fraction of the world covered by a bounding box.
+    """
+    if not bbox:
+        return 1.0
+    if len(bbox) == 6:
+        bbox = [bbox[0], bbox[1], bbox[3], bbox[4]]
+    width = bbox[2] - bbox[0]
+    if width < 0:
+        # crosses the antimeridian
+        width += 360.0
+    return min(max(width * (bbox[3] - bbox[1]) / WORLD_AREA, 0.0), 1.0)
+
+
+def time_span(datetime_: Optional[str]) -> timedelta:
+    """
+    Get the time span of a search datetime, with open intervals spanning `UNBOUNDED_TIME_SPAN`.
+    """
+    interval = str_to_interval(datetime_)
+    if interval is None:
+        return UNBOUNDED_TIME_SPAN
+    if not isinstance(interval, tuple):
+        return timedelta(0)
+    start, end = interval
+    if start is None:
+        return min(end - datetime(1970, 1, 1, tzinfo=timezone.utc), UNBOUNDED_TIME_SPAN)
+    if end is None:
+        end = datetime.now(timezone.utc)
+    return max(end - start, timedelta(0))
+
+
+def estimate_buckets(
+    aggregations: Iterable[str],
+    parameters: Dict[str, Any],
+    bbox: Optional[List[float]],
+    span: timedelta,
+) -> int:
+    """
+    Estimate the number of buckets of aggregations: grid cells within the bounding box for grid aggregations, and
+    intervals within the time span for datetime histograms. Other aggregations count as a single bucket.
+
+    :param aggregations: names of the aggregations
+    :param parameters: precision and interval parameters of the aggregations
+    :param bbox: bounding box of the aggregated items
+    :param span: time span of the aggregated items
+    :return: estimated number of buckets
+    """
+    fraction = area_fraction(bbox)
+    buckets = 0
+    for name in aggregations:
+        if name in GRID_AGGREGATIONS:
+            parameter, grid, min_precision = GRID_AGGREGATIONS[name]
+            precision = parameters.get(parameter)
+            if precision is None:
+                precision = min_precision
+            buckets += max(int(GRID_CELLS[grid](precision) * fraction), 1)
+        elif name == DATETIME_AGGREGATION:
+            interval = DATETIME_INTERVALS.get(
+                parameters.get(DATETIME_INTERVAL_PARAMETER)
+                or DEFAULT_DATETIME_INTERVAL,
+                DATETIME_INTERVALS[DEFAULT_DATETIME_INTERVAL],
+            )
+            buckets += max(int(span / interval), 1)
+        else:
+            buckets += 1
+    return buckets
+
+
+def max_cost(scopes: List[str]) -> Optional[int]:
+    """
+    Get the aggregation budget of a user: the largest budget of its roles in `AGGREGATION_ROLE_MAX_COST`, or
+    `AGGREGATION_MAX_COST` when none of its roles have a budget. None is unlimited.
+    """
+    role_costs = [
+        settings.aggregation_role_max_cost[r]
+        for r in scopes
+        if r in settings.aggregation_role_max_cost
+    ]
+    if role_costs:
+        return max(role_costs)
+    return settings.aggregation_max_cost
+
+
+def _downgrade(aggregations: List[str], parameters: Dict[str, Any]) -> bool:
+    """
+    Lower the precision of the finest grid aggregation, or coarsen the datetime interval, by one step.
+
+    :return: False if the parameters can't be downgraded further
+    """
+    candidates = []
+    for name in aggregations:
+        if name in GRID_AGGREGATIONS:
+            parameter, grid, min_precision = GRID_AGGREGATIONS[name]
+            precision = parameters.get(parameter)
+            if precision is not None and precision > min_precision:
+                candidates.append((GRID_CELLS[grid](precision), parameter))
+    if candidates:
+        _, parameter = max(candidates)
+        parameters[parameter] -= 1
+        return True
+    if DATETIME_AGGREGATION in aggregations:
+        intervals = list(DATETIME_INTERVALS)
+        interval = (
+            parameters.get(DATETIME_INTERVAL_PARAMETER) or DEFAULT_DATETIME_INTERVAL
+        )
+        if interval in intervals and intervals.index(interval) > 0:
+            parameters[DATETIME_INTERVAL_PARAMETER] = intervals[
+                intervals.index(interval) - 1
+            ]
+            return True
+    return False
+
+
+def admit_aggregation(
+    scopes: List[str],
+    collection_count: int,
+    aggregations: List[str],
+    parameters: Dict[str, Any],
+    bbox: Optional[List[float]],
+    intersects: Optional[Dict[str, Any]],
+    datetime_: Optional[str],
+) -> Dict[str, Any]:
+    """
+    Check the estimated cost of an aggregation request against the budget of the user. The cost is the estimated
+    number of buckets, times the number of aggregated collections. Requests over the budget are rejected, or with
+    `AGGREGATION_OVER_BUDGET=downgrade` downgraded to lower precisions and coarser intervals until they fit the budget.
+
+    :param scopes: roles of the user
+    :param collection_count: number of aggregated collections
+    :param aggregations: names of the aggregations
+    :param parameters: precision and interval parameters of the aggregations
+    :param bbox: bbox of the request
+    :param intersects: intersects geometry of the request
+    :param datetime_: datetime of the request
+    :return: the (possibly downgraded) precision and interval parameters
+    """
+    budget = max_cost(scopes)
+    if budget is None:
+        return parameters
+    if bbox is None and intersects:
+        bbox = geometry_bbox(intersects)
+    span = time_span(datetime_)
+    parameters = dict(parameters)
+
+    def cost() -> int:
+        return max(collection_count, 1) * estimate_buckets(
+            aggregations, parameters, bbox, span
+        )
+
+    estimated = cost()
+    if estimated <= budget:
+        return parameters
+    if settings.aggregation_over_budget == "downgrade":
+        while _downgrade(aggregations, parameters):
+            if cost() <= budget:
+                logger.info(
+                    f"Downgraded aggregation with estimated cost {estimated} to {parameters}"
+                )
+                return parameters
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Aggregation too expensive (estimated cost {estimated}, budget {budget}), "
+        "use fewer collections, a smaller bbox or datetime range, or a lower precision",
+    )
+
+
+class ConcurrencyLimiter:
+    """
+    Limit the number of concurrent executions, rejecting executions beyond the limit. A limit of 0 is unlimited.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit) if limit > 0 else None
+
+    async def __aenter__(self):
+        if self._semaphore is None:
+            return
+        if self._semaphore.locked():
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many concurrent aggregations, retry later",
+                headers={"Retry-After": "1"},
+            )
+        await self._semaphore.acquire()
+
+    async def __aexit__(self, *exc_info):
+        if self._semaphore is not None:
+            self._semaphore.release()
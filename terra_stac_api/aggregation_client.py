@@ -1,5 +1,7 @@
 from typing import Any, Dict, List, Optional, Union
+from urllib.parse import unquote_plus
 
+import orjson
 from fastapi import Path
 from overrides import overrides
 from stac_fastapi.core.extensions.aggregation import (
@@ -10,8 +12,24 @@ from stac_fastapi.types.rfc3339 import DateTimeType
 from stac_pydantic.shared import BBox
 from typing_extensions import Annotated
 
-from terra_stac_api.core import AccessType, ensure_authorized_for_collection
+from terra_stac_api.admission import ConcurrencyLimiter, admit_aggregation
+from terra_stac_api.cache import ResponseCache
+from terra_stac_api.config import Settings
+from terra_stac_api.core import (
+    AccessType,
+    collection_generations,
+    ensure_authorized_for_collection,
+)
 from terra_stac_api.db import DatabaseLogicAuth
+from terra_stac_api.middleware import add_response_header
+
+AGGREGATION_DOWNGRADED_HEADER = "X-Aggregation-Downgraded"
+
+settings = Settings()
+aggregation_cache = ResponseCache(
+    settings.aggregation_cache_ttl, settings.aggregation_cache_size, "aggregation"
+)
+aggregation_limiter = ConcurrencyLimiter(settings.aggregation_max_concurrent)
 
 
 class AggregationClientAuth(EsAsyncBaseAggregationClient):
@@ -56,6 +74,9 @@ class AggregationClientAuth(EsAsyncBaseAggregationClient):
         **kwargs,
     ) -> Union[Dict, Exception]:
         request = kwargs["request"]
+        if collection_id is None:
+            # the path parameter is not passed for POST requests
+            collection_id = request.path_params.get("collection_id")
         if collection_id is not None:
             await ensure_authorized_for_collection(
                 self.database,
@@ -64,8 +85,12 @@ class AggregationClientAuth(EsAsyncBaseAggregationClient):
                 collection_id,
                 AccessType.READ,
             )
-        elif collections is not None:
-            for c in collections:
+            collection_ids = {collection_id}
+        elif collections or (
+            aggregate_request is not None and aggregate_request.collections
+        ):
+            collection_ids = set(collections or aggregate_request.collections)
+            for c in collection_ids:
                 await ensure_authorized_for_collection(
                     self.database,
                     request.user,
@@ -73,31 +98,110 @@ class AggregationClientAuth(EsAsyncBaseAggregationClient):
                     c,
                     AccessType.READ,
                 )
+            collections = list(collection_ids)
         else:
             # set collections to authorized collections
-            collections = {
+            collections = collection_ids = {
                 c["id"]
                 for c in await self.database.get_all_authorized_collections(
                     request.auth.scopes, _source=["id"]
                 )
             }
 
-        return await super().aggregate(
-            aggregate_request,
-            collection_id,
-            collections,
-            datetime,
-            intersects,
-            filter_lang,
-            filter_expr,
-            aggregations,
-            ids,
-            bbox,
-            centroid_geohash_grid_frequency_precision,
-            centroid_geohex_grid_frequency_precision,
-            centroid_geotile_grid_frequency_precision,
-            geometry_geohash_grid_frequency_precision,
-            geometry_geotile_grid_frequency_precision,
-            datetime_frequency_interval,
-            **kwargs,
-        )
+        parameters = {
+            "centroid_geohash_grid_frequency_precision": centroid_geohash_grid_frequency_precision,
+            "centroid_geohex_grid_frequency_precision": centroid_geohex_grid_frequency_precision,
+            "centroid_geotile_grid_frequency_precision": centroid_geotile_grid_frequency_precision,
+            "geometry_geohash_grid_frequency_precision": geometry_geohash_grid_frequency_precision,
+            "geometry_geotile_grid_frequency_precision": geometry_geotile_grid_frequency_precision,
+            "datetime_frequency_interval": datetime_frequency_interval,
+        }
+        if aggregate_request is not None:
+            parameters = {p: getattr(aggregate_request, p) for p in parameters}
+            requested_aggregations = aggregate_request.aggregations
+            requested_intersects = (
+                aggregate_request.intersects.model_dump()
+                if aggregate_request.intersects
+                else None
+            )
+            requested_bbox, requested_datetime = (
+                aggregate_request.bbox,
+                aggregate_request.datetime,
+            )
+        else:
+            requested_aggregations = aggregations
+            requested_intersects = (
+                orjson.loads(unquote_plus(intersects)) if intersects else None
+            )
+            requested_bbox, requested_datetime = bbox, datetime
+        if requested_aggregations:
+            admitted = admit_aggregation(
+                request.auth.scopes,
+                len(collection_ids),
+                requested_aggregations,
+                parameters,
+                list(requested_bbox) if requested_bbox else None,
+                requested_intersects,
+                requested_datetime,
+            )
+            if admitted != parameters:
+                add_response_header(
+                    request,
+                    AGGREGATION_DOWNGRADED_HEADER,
+                    ", ".join(
+                        f"{p}={v}" for p, v in admitted.items() if parameters[p] != v
+                    ),
+                )
+                parameters = admitted
+                if aggregate_request is not None:
+                    for p, v in parameters.items():
+                        setattr(aggregate_request, p, v)
+
+        key = None
+        if aggregation_cache.enabled:
+            if aggregate_request is not None:
+                params = aggregate_request.model_dump(
+                    mode="json", exclude_none=True, exclude={"collections"}
+                )
+            else:
+                params = [
+                    datetime,
+                    intersects,
+                    filter_lang,
+                    filter_expr,
+                    aggregations,
+                    ids,
+                    bbox,
+                    parameters,
+                ]
+            key = orjson.dumps(
+                [
+                    str(request.base_url),
+                    request.url.path,
+                    collection_generations.snapshot(collection_ids),
+                    params,
+                ],
+                option=orjson.OPT_SORT_KEYS,
+            )
+            result = aggregation_cache.get(key)
+            if result is not None:
+                return result
+
+        async with aggregation_limiter:
+            result = await super().aggregate(
+                aggregate_request,
+                collection_id,
+                collections,
+                datetime,
+                intersects,
+                filter_lang,
+                filter_expr,
+                aggregations,
+                ids,
+                bbox,
+                **parameters,
+                **kwargs,
+            )
+        if key is not None:
+            aggregation_cache.put(key, result, collection_ids)
+        return result
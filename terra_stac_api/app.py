@@ -22,7 +22,6 @@ from stac_fastapi.extensions.core import (
     TokenPaginationExtension,
     TransactionExtension,
 )
-from stac_fastapi.extensions.third_party import BulkTransactionExtension
 from stac_fastapi.opensearch.app import items_get_request_model
 from stac_fastapi.opensearch.config import OpensearchSettings
 from stac_fastapi.opensearch.database_logic import (
@@ -35,6 +34,7 @@ from starlette.middleware.authentication import AuthenticationMiddleware
 from starlette.middleware.cors import SAFELISTED_HEADERS, CORSMiddleware
 
 import terra_stac_api.config
+from terra_stac_api import metrics, tracing
 from terra_stac_api.aggregation_client import AggregationClientAuth
 from terra_stac_api.auth import OIDC, GrantType, NoAuth, on_auth_error
 from terra_stac_api.core import (
@@ -43,12 +43,29 @@ from terra_stac_api.core import (
     TransactionsClientAuth,
 )
 from terra_stac_api.db import DatabaseLogicAuth
-from terra_stac_api.serializer import CustomCollectionSerializer
+from terra_stac_api.extensions import (
+    BulkDeleteExtension,
+    CountExtension,
+    MultiCollectionBulkExtension,
+    OrjsonBulkTransactionExtension,
+)
+from terra_stac_api.jobs import JobsExtension, job_queue
+from terra_stac_api.metrics import MetricsMiddleware
+from terra_stac_api.middleware import ResponseHeadersMiddleware
+from terra_stac_api.profiling import ProfilingMiddleware
+from terra_stac_api.serializer import CustomCollectionSerializer, CustomItemSerializer
+from terra_stac_api.slowlog import SlowLogRolesMiddleware
+from terra_stac_api.timing import ResponseStartMiddleware, ServerTimingMiddleware
+from terra_stac_api.tracing import TracingMiddleware
 
 app_settings = terra_stac_api.config.Settings()
 settings = OpensearchSettings()
 session = Session.create_from_settings(settings)
+# before the database clients are instrumented
+tracing.setup()
 database_logic = DatabaseLogicAuth()
+# the jobs are stored, so that every worker can report their status
+job_queue.client = database_logic.client
 
 auth = (
     OIDC(
@@ -68,6 +85,10 @@ aggregation_extension = AggregationExtension(
 aggregation_extension.POST = EsAggregationExtensionPostRequest
 aggregation_extension.GET = EsAggregationExtensionGetRequest
 
+bulk_transactions_client = BulkTransactionsClientAuth(
+    database=database_logic, session=session, settings=settings
+)
+
 search_extensions = [
     TransactionExtension(
         client=TransactionsClientAuth(
@@ -75,16 +96,16 @@ search_extensions = [
         ),
         settings=settings,
     ),
-    BulkTransactionExtension(
-        client=BulkTransactionsClientAuth(
-            database=database_logic, session=session, settings=settings
-        )
-    ),
+    OrjsonBulkTransactionExtension(client=bulk_transactions_client),
+    BulkDeleteExtension(client=bulk_transactions_client),
+    MultiCollectionBulkExtension(client=bulk_transactions_client),
+    JobsExtension(),
     FieldsExtension(),
     FilterExtension(client=EsAsyncBaseFiltersClient(database=database_logic)),
     QueryExtension(),
     SortExtension(),
     TokenPaginationExtension(),
+    CountExtension(),
 ]
 
 extensions = [aggregation_extension] + search_extensions
@@ -98,6 +119,7 @@ post_request_model = create_post_request_model(search_extensions)
 async def lifespan(app: FastAPI):
     await create_index_templates()
     await create_collection_index()
+    await job_queue.create_index()
     yield
 
 
@@ -109,6 +131,7 @@ api = StacApi(
         session=session,
         post_request_model=post_request_model,
         collection_serializer=CustomCollectionSerializer,
+        item_serializer=CustomItemSerializer,
     ),
     search_get_request_model=get_request_model,
     search_post_request_model=post_request_model,
@@ -140,6 +163,9 @@ api = StacApi(
                 ),
                 Scope(path="/collections/{collection_id}", method="DELETE"),
                 Scope(path="/collections/{collections_id}/bulk_items", method="POST"),
+                Scope(path="/collections/{collection_id}/bulk_delete", method="POST"),
+                Scope(path="/bulk_items", method="POST"),
+                Scope(path="/jobs/{job_id}", method="GET"),
             ],
             [Security(auth)],
         ),
@@ -150,7 +176,14 @@ api = StacApi(
     description=app_settings.stac_description,
     api_version=terra_stac_api.__version__,
     middlewares=[
+        # the first middleware is the innermost
+        *(
+            [Middleware(ResponseStartMiddleware)]
+            if app_settings.server_timing or app_settings.tracing_exporter
+            else []
+        ),
         Middleware(BrotliMiddleware),
+        Middleware(ResponseHeadersMiddleware),
         Middleware(
             CORSMiddleware,
             allow_origins=app_settings.cors_allow_origins,
@@ -161,16 +194,27 @@ api = StacApi(
             else SAFELISTED_HEADERS,
         ),
         Middleware(ProxyHeaderMiddleware),
+        *([Middleware(ProfilingMiddleware)] if app_settings.profiling_enabled else []),
+        *(
+            [Middleware(SlowLogRolesMiddleware)]
+            if app_settings.slow_query_threshold is not None
+            else []
+        ),
         Middleware(AuthenticationMiddleware, backend=auth, on_error=on_auth_error),
         Middleware(
             AccessLoggerMiddleware,
             format='%(t)s %(client_addr)s "%(request_line)s" %(s)s %(B)s %(M)s',
             logger=logging.getLogger("terra_stac_api.access"),
         ),
+        *([Middleware(ServerTimingMiddleware)] if app_settings.server_timing else []),
+        *([Middleware(MetricsMiddleware)] if app_settings.metrics_enabled else []),
+        *([Middleware(TracingMiddleware)] if app_settings.tracing_exporter else []),
     ],
 )
 app = api.app
 app.router.lifespan_context = lifespan
+if app_settings.metrics_enabled:
+    metrics.register(app)
 
 
 def run():
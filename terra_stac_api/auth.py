@@ -30,6 +30,7 @@ from starlette.requests import HTTPConnection
 from starlette.responses import JSONResponse
 from starlette.status import HTTP_401_UNAUTHORIZED, HTTP_403_FORBIDDEN
 
+from terra_stac_api import metrics, timing, tracing
 from terra_stac_api.config import Settings
 
 settings = Settings()
@@ -122,7 +123,12 @@ class OIDC(SecurityBase, AuthenticationBackend):
             return AuthCredentials([settings.role_anonymous]), UnauthenticatedUser()
 
         try:
-            claims = jwt.decode(param, self.jwks, options=self.jwt_decode_options)
+            with (
+                metrics.timed(metrics.AUTH_DURATION),
+                timing.phase("auth"),
+                tracing.span("authenticate"),
+            ):
+                claims = jwt.decode(param, self.jwks, options=self.jwt_decode_options)
             scopes = self._roles_claim_path.find(claims)[0].value
             scopes.append(settings.role_anonymous)
         except JWTError:
@@ -0,0 +1,99 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from terra_stac_api import metrics
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache of responses, of which the entries expire after a TTL.
+    Entries are tagged with the collections they were computed from, so they can be invalidated when these collections
+    change. A TTL of 0 disables the cache.
+    """
+
+    def __init__(self, ttl: float, max_size: int, name: str = "response"):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.name = name
+        self._entries: OrderedDict[Hashable, tuple] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_size > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            metrics.cache_event(self.name, "miss")
+            return None
+        expires, _, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            metrics.cache_event(self.name, "expired")
+            metrics.cache_event(self.name, "miss")
+            return None
+        self._entries.move_to_end(key)
+        metrics.cache_event(self.name, "hit")
+        return value
+
+    def put(self, key: Hashable, value: Any, collection_ids: Iterable[str]):
+        """
+        Cache a response.
+
+        :param key: cache key
+        :param value: response, should not be modified afterwards
+        :param collection_ids: collections the response was computed from
+        """
+        if not self.enabled:
+            return
+        self._entries[key] = (
+            time.monotonic() + self.ttl,
+            frozenset(collection_ids),
+            value,
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            metrics.cache_event(self.name, "evicted")
+
+    def pop(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def invalidate(self, collection_id: str):
+        """
+        Remove the cached responses computed from a collection.
+        """
+        for key in [k for k, e in self._entries.items() if collection_id in e[1]]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class Generations:
+    """
+    Generation counters of collections, which are bumped when a collection or its items change. Including the
+    generations of the collections a response was computed from in its cache key invalidates it when any of these
+    collections changes, while responses for unchanged collections are still served from the cache.
+    """
+
+    def __init__(self):
+        self._generations: Dict[str, int] = {}
+
+    def get(self, collection_id: str) -> int:
+        return self._generations.get(collection_id, 0)
+
+    def bump(self, collection_id: str):
+        self._generations[collection_id] = self.get(collection_id) + 1
+
+    def snapshot(self, collection_ids: Iterable[str]) -> List[Tuple[str, int]]:
+        """
+        Get the current generations of collections, sorted by collection id.
+        """
+        return [(c, self.get(c)) for c in sorted(set(collection_ids))]
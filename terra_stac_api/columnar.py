@@ -0,0 +1,270 @@
+import struct
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from io import BytesIO
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+from fastapi import HTTPException, Request
+from stac_fastapi.types import stac as stac_types
+from starlette import status
+from starlette.responses import Response
+
+from terra_stac_api import metrics, timing, tracing
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+_JSON_MEDIA_TYPES = {
+    "application/json",
+    "application/geo+json",
+    "*/*",
+    "application/*",
+}
+_COLUMNAR_MEDIA_TYPES = {ARROW_MEDIA_TYPE, PARQUET_MEDIA_TYPE}
+_TIMESTAMP_PROPERTIES = {
+    "datetime",
+    "start_datetime",
+    "end_datetime",
+    "created",
+    "updated",
+}
+_GEOMETRY_TYPES = {
+    "Point": 1,
+    "LineString": 2,
+    "Polygon": 3,
+    "MultiPoint": 4,
+    "MultiLineString": 5,
+    "MultiPolygon": 6,
+    "GeometryCollection": 7,
+}
+BATCH_SIZE = 1000
+# set while searching for a columnar response, of which the columns are built from the stored items
+_stored_items: ContextVar[bool] = ContextVar("stored_items", default=False)
+
+
+@contextmanager
+def stored_items():
+    """
+    Keep the stored items of the searches within this context as they are, skipping their conversion to STAC items
+    (with the links of the API) that only the JSON responses need.
+    """
+    token = _stored_items.set(True)
+    try:
+        yield
+    finally:
+        _stored_items.reset(token)
+
+
+def using_stored_items() -> bool:
+    return _stored_items.get()
+
+
+def _media_ranges(request: Request) -> List[Tuple[str, float]]:
+    """
+    Parse the media ranges of the `Accept` header with their quality, leaving out the unacceptable ones (`q=0`).
+    """
+    ranges = []
+    for media_range in request.headers.get("accept", "").split(","):
+        media_type, *params = media_range.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranges.append((media_type.strip().lower(), quality))
+    return ranges
+
+
+def negotiate(request: Request) -> Optional[str]:
+    """
+    Get the columnar media type requested in the `Accept` header, in order of preference: by quality (`q`), then in
+    the order of the header.
+
+    :return: media type, or None if JSON is preferred
+    """
+    for media_type, _ in sorted(_media_ranges(request), key=lambda r: -r[1]):
+        if media_type in _JSON_MEDIA_TYPES:
+            return None
+        if media_type in _COLUMNAR_MEDIA_TYPES:
+            if pa is None:
+                raise HTTPException(
+                    status_code=status.HTTP_406_NOT_ACCEPTABLE,
+                    detail=f"{media_type} output is not available, pyarrow is not installed",
+                )
+            return media_type
+    return None
+
+
+def _coordinates_wkb(geometry_type: str, coordinates: Any) -> bytes:
+    if geometry_type == "Point":
+        return struct.pack(f"<{len(coordinates)}d", *coordinates)
+    if geometry_type == "LineString":
+        return struct.pack("<I", len(coordinates)) + b"".join(
+            _coordinates_wkb("Point", p) for p in coordinates
+        )
+    if geometry_type == "Polygon":
+        return struct.pack("<I", len(coordinates)) + b"".join(
+            _coordinates_wkb("LineString", r) for r in coordinates
+        )
+    part_type = geometry_type[len("Multi") :]
+    return struct.pack("<I", len(coordinates)) + b"".join(
+        geometry_to_wkb({"type": part_type, "coordinates": c}) for c in coordinates
+    )
+
+
+def _dimensions(coordinates: Any) -> int:
+    while coordinates and isinstance(coordinates[0], list):
+        coordinates = coordinates[0]
+    return len(coordinates) if coordinates else 2
+
+
+def geometry_to_wkb(geometry: Dict[str, Any]) -> bytes:
+    """
+    Encode a GeoJSON geometry as (ISO) well-known binary.
+    """
+    geometry_type = geometry["type"]
+    code = _GEOMETRY_TYPES[geometry_type]
+    if geometry_type == "GeometryCollection":
+        geometries = geometry.get("geometries", [])
+        return struct.pack("<BII", 1, code, len(geometries)) + b"".join(
+            geometry_to_wkb(g) for g in geometries
+        )
+    coordinates = geometry["coordinates"]
+    if _dimensions(coordinates) == 3:
+        code += 1000
+    return struct.pack("<BI", 1, code) + _coordinates_wkb(geometry_type, coordinates)
+
+
+def _timestamp(value: Any) -> Optional[datetime]:
+    if value is None:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _column(values: List[Any]) -> "pa.Array":
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # mixed types
+        return pa.array(
+            [None if v is None else orjson.dumps(v).decode() for v in values],
+            type=pa.string(),
+        )
+
+
+def _json_column(values: List[Any]) -> "pa.Array":
+    return pa.array(
+        [None if v is None else orjson.dumps(v).decode() for v in values],
+        type=pa.string(),
+    )
+
+
+def _columns(features: List[Dict[str, Any]]) -> Dict[str, "pa.Array"]:
+    columns = {
+        "id": pa.array([f.get("id") for f in features], type=pa.string()),
+        "collection": pa.array(
+            [f.get("collection") for f in features], type=pa.string()
+        ),
+        "geometry": pa.array(
+            [
+                geometry_to_wkb(f["geometry"]) if f.get("geometry") else None
+                for f in features
+            ],
+            type=pa.binary(),
+        ),
+        "bbox": pa.array(
+            [f.get("bbox") for f in features], type=pa.list_(pa.float64())
+        ),
+    }
+    for name in _property_names(features):
+        values = [f.get("properties", {}).get(name) for f in features]
+        if name in _TIMESTAMP_PROPERTIES:
+            try:
+                columns[name] = pa.array(
+                    [_timestamp(v) for v in values], type=pa.timestamp("us", tz="UTC")
+                )
+                continue
+            except (ValueError, TypeError, AttributeError):
+                pass
+        columns[name] = _column(values)
+    columns["assets"] = _json_column([f.get("assets") for f in features])
+    columns["links"] = _json_column([f.get("links") for f in features])
+    return columns
+
+
+def _property_names(features: Iterable[Dict[str, Any]]) -> List[str]:
+    names = {}
+    for f in features:
+        names.update(dict.fromkeys(f.get("properties") or {}))
+    return [
+        n
+        for n in names
+        if n not in {"id", "collection", "geometry", "bbox", "assets", "links"}
+    ]
+
+
+def to_table(item_collection: stac_types.ItemCollection) -> "pa.Table":
+    """
+    Convert the items of an item collection to an Arrow table, with a row per item, a column per property and the
+    geometry encoded as WKB.
+    The links and number of matched and returned items of the item collection are stored in the schema metadata.
+    """
+    table = pa.Table.from_pydict(_columns(item_collection["features"]))
+    return table.replace_schema_metadata(
+        {
+            "geo": orjson.dumps(
+                {
+                    "version": "1.1.0",
+                    "primary_column": "geometry",
+                    "columns": {"geometry": {"encoding": "WKB", "geometry_types": []}},
+                }
+            ),
+            "stac": orjson.dumps(
+                {
+                    k: item_collection[k]
+                    for k in ("links", "numberMatched", "numberReturned")
+                    if k in item_collection
+                }
+            ),
+        }
+    )
+
+
+def to_response(
+    item_collection: stac_types.ItemCollection, media_type: str
+) -> Response:
+    """
+    Serialize an item collection as an Arrow IPC stream or a GeoParquet file.
+    """
+    kind = "parquet" if media_type == PARQUET_MEDIA_TYPE else "arrow"
+    with (
+        metrics.timed(metrics.SERIALIZATION_DURATION, kind),
+        timing.phase("serialize"),
+        tracing.span(
+            f"serialize {kind}", {"stac.items": len(item_collection["features"])}
+        ),
+    ):
+        table = to_table(item_collection)
+        sink = BytesIO()
+        if media_type == PARQUET_MEDIA_TYPE:
+            pq.write_table(table, sink, row_group_size=BATCH_SIZE)
+        else:
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table, max_chunksize=BATCH_SIZE)
+    headers = {}
+    for link in item_collection.get("links", []):
+        if link.get("rel") == "next" and link.get("method", "GET") == "GET":
+            headers["Link"] = f'<{link["href"]}>; rel="next"'
+    return Response(sink.getvalue(), media_type=media_type, headers=headers)
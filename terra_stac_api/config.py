@@ -1,6 +1,6 @@
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 
-from pydantic import Field
+from pydantic import Field, model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -19,3 +19,48 @@ class Settings(BaseSettings):
         default_factory=lambda: ["OPTIONS", "GET", "POST"]
     )
     cors_allow_credentials: bool = True
+    datetime_partitioned_collections: List[str] = Field(default_factory=list)
+    datetime_partition_interval: Literal["year", "month"] = "month"
+    datetime_partition_max_indices: int = 120
+    shared_items_index: bool = False
+    shared_items_index_max_items: int = 10000
+    search_extent_pruning: bool = False
+    anonymous_search_cache_ttl: float = 0
+    anonymous_search_cache_size: int = 1000
+    item_cache_ttl: float = 0
+    item_cache_size: int = 10000
+    acl_cache_ttl: float = 5
+    aggregation_cache_ttl: float = 0
+    aggregation_cache_size: int = 1000
+    aggregation_max_cost: Optional[int] = None
+    aggregation_role_max_cost: Dict[str, int] = Field(default_factory=dict)
+    aggregation_over_budget: Literal["reject", "downgrade"] = "reject"
+    aggregation_max_concurrent: int = 0
+    search_pit_pagination: bool = False
+    search_pit_keep_alive: str = "1m"
+    search_token_secret: Optional[str] = None
+    search_count: Literal["exact", "approximate", "none"] = "exact"
+    search_count_max: int = 10000
+    search_page_max_bytes: Optional[int] = None
+    coordinate_precision: Optional[int] = None
+    skip_unchanged_items: bool = False
+    bulk_validation: Literal["full", "fast"] = "full"
+    job_max_concurrent: int = 2
+    job_retention: float = 3600
+    metrics_enabled: bool = False
+    server_timing: bool = False
+    tracing_exporter: Optional[Literal["otlp", "console", "file"]] = None
+    tracing_file: str = "traces.jsonl"
+    slow_query_threshold: Optional[float] = None
+    slow_query_sample_rate: float = 1.0
+    profiling_enabled: bool = False
+    profiling_interval: float = 0.001
+
+    @model_validator(mode="after")
+    def check_token_secret(self) -> "Settings":
+        # a random secret per process would make the pagination tokens invalid on the other workers and instances
+        if self.search_pit_pagination and not self.search_token_secret:
+            raise ValueError(
+                "SEARCH_TOKEN_SECRET must be set when SEARCH_PIT_PAGINATION is enabled"
+            )
+        return self
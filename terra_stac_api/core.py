@@ -1,34 +1,77 @@
+import asyncio
+import logging
 from enum import Enum
-from typing import List, Optional, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 import attr
+import orjson
 from fastapi import HTTPException, Request
-from opensearchpy import exceptions
+from opensearchpy import Search, exceptions
 from overrides import overrides
 from stac_fastapi.core.core import (
     BulkTransactionsClient,
     CoreClient,
     TransactionsClient,
 )
+from stac_fastapi.core.datetime_utils import format_datetime_range
+from stac_fastapi.core.models.links import PagingLinks
+from stac_fastapi.core.utilities import filter_fields
 from stac_fastapi.extensions.core.transaction.request import (
     PartialCollection,
     PartialItem,
     PatchOperation,
 )
-from stac_fastapi.extensions.third_party.bulk_transactions import Items
+from stac_fastapi.extensions.third_party.bulk_transactions import (
+    BulkTransactionMethod,
+    Items,
+)
 from stac_fastapi.types import stac as stac_types
+from stac_fastapi.types.errors import NotFoundError
 from stac_fastapi.types.search import BaseSearchPostRequest
 from stac_pydantic import Collection, Item, ItemCollection
 from stac_pydantic.shared import BBox
 from starlette import status
 from starlette.authentication import BaseUser
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
 
+from terra_stac_api import columnar, timing, tracing
+from terra_stac_api.cache import Generations, ResponseCache
 from terra_stac_api.config import Settings
 from terra_stac_api.db import DatabaseLogicAuth
 from terra_stac_api.errors import ForbiddenError, UnauthorizedError
+from terra_stac_api.extensions import BulkDelete
+from terra_stac_api.jobs import Job, job_accepted, job_queue, respond_async
+from terra_stac_api.middleware import add_response_header
+from terra_stac_api.pagination import known_count, pit_enabled, set_count_mode
+from terra_stac_api.planning import prune_collections
+from terra_stac_api.serializer import CONTENT_HASH, content_hash
+from terra_stac_api.validation import check_items
 
 _auth = "_auth"
+JOB_CHUNK_SIZE = 1000
+COLLECTIONS_PRUNED_HEADER = "X-Collections-Pruned"
+_search_by_ids_fields = {
+    "collections",
+    "ids",
+    "limit",
+    "fields",
+    "filter_lang",
+    "count",
+}
 settings = Settings()
+logger = logging.getLogger(__name__)
+search_cache = ResponseCache(
+    settings.anonymous_search_cache_ttl, settings.anonymous_search_cache_size, "search"
+)
+item_cache = ResponseCache(settings.item_cache_ttl, settings.item_cache_size, "item")
+# revoked authorizations are only checked again after the TTL on the other instances, so it's kept short
+acl_cache = ResponseCache(
+    settings.acl_cache_ttl if settings.item_cache_ttl else 0,
+    settings.item_cache_size,
+    "acl",
+)
+collection_generations = Generations()
 
 
 class AccessType(str, Enum):
@@ -55,39 +98,220 @@ async def ensure_authorized_for_collection(
     collection_id: str,
     access_type: AccessType,
 ) -> Collection:
-    collection = await db.find_collection(collection_id=collection_id)
+    with (
+        timing.phase("collections"),
+        tracing.span(
+            "ensure_authorized_for_collection",
+            {"stac.collection": collection_id, "stac.access_type": access_type.value},
+        ),
+    ):
+        collection = await db.find_collection(collection_id=collection_id)
+    check_authorized_for_collection(user, scopes, collection, access_type)
+    return collection
+
+
+async def ensure_authorized_for_collections(
+    db: DatabaseLogicAuth,
+    user: BaseUser,
+    scopes: List[str],
+    collection_ids: List[str],
+    access_type: AccessType,
+) -> List[dict]:
+    """
+    Check the authorizations of multiple collections, which are retrieved at once.
+    """
+    with (
+        timing.phase("collections"),
+        tracing.span(
+            "ensure_authorized_for_collections",
+            {
+                "stac.collections": list(collection_ids),
+                "stac.access_type": access_type.value,
+            },
+        ),
+    ):
+        collections = await db.find_collections(collection_ids, source=["id", _auth])
+    for collection in collections:
+        check_authorized_for_collection(user, scopes, collection, access_type)
+    return collections
+
+
+def check_authorized_for_collection(
+    user: BaseUser, scopes: List[str], collection: dict, access_type: AccessType
+):
     if not is_authorized_for_collection(scopes, collection, access_type):
         if user.is_authenticated:
             raise ForbiddenError(
-                f"Insufficient permissions for collection {collection_id}"
+                f"Insufficient permissions for collection {collection['id']}"
             )
         else:
             raise UnauthorizedError("Unauthorized, please authenticate")
-    return collection
 
 
 def is_admin(scopes: List[str]) -> bool:
     return settings.role_admin in scopes
 
 
+def invalidate_items(collection_id: str, item_ids: Optional[Iterable[str]] = None):
+    """
+    Invalidate the cached items, search and aggregation results after items of a collection were written.
+
+    :param collection_id: collection id
+    :param item_ids: ids of the written items, or None to invalidate all items of the collection
+    """
+    collection_generations.bump(collection_id)
+    search_cache.invalidate(collection_id)
+    if item_ids is None:
+        item_cache.invalidate(collection_id)
+        return
+    for item_id in item_ids:
+        item_cache.pop((collection_id, item_id))
+
+
+def invalidate_collection(collection_id: str):
+    """
+    Invalidate the cached authorizations, items, search and aggregation results after a collection was written.
+    """
+    collection_generations.bump(collection_id)
+    search_cache.clear()
+    item_cache.invalidate(collection_id)
+    acl_cache.invalidate(collection_id)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Check if an ETag matches the value of an If-None-Match header.
+    """
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def omit_unknown_count(result: dict) -> dict:
+    """
+    Remove `numberMatched` from a response when the matched items were not (or not exactly) counted.
+    """
+    if result.get("numberMatched") is None:
+        result.pop("numberMatched", None)
+    return result
+
+
+def is_anonymous(scopes: List[str]) -> bool:
+    return set(scopes) == {settings.role_anonymous}
+
+
+def search_cache_key(search_request: BaseSearchPostRequest, request: Request) -> bytes:
+    return orjson.dumps(
+        [
+            request.method,
+            str(request.base_url),
+            request.url.path,
+            request.query_params.get("token"),
+            request.query_params.get("count"),
+            search_request.model_dump(mode="json", exclude_none=True),
+        ],
+        option=orjson.OPT_SORT_KEYS,
+    )
+
+
+def prepare_item(item: Any) -> dict:
+    """
+    Get an item of a bulk request as it is stored: parsed and dumped by the Item model, or unchanged with
+    `BULK_VALIDATION=fast`.
+    """
+    if settings.bulk_validation == "fast":
+        return item
+    return Item(**item).model_dump(mode="json")
+
+
+def skips_unchanged(items: Items) -> bool:
+    """
+    Check if unchanged items are left out of a bulk insert (`SKIP_UNCHANGED_ITEMS`), which only applies to upserts.
+    """
+    return (
+        settings.skip_unchanged_items and items.method == BulkTransactionMethod.UPSERT
+    )
+
+
+def is_search_by_ids(search_request: BaseSearchPostRequest, request: Request) -> bool:
+    """
+    Check if a search only looks up items by their ids within the given collections, and all matching items fit in a
+    single page.
+    """
+    if not search_request.ids or not search_request.collections:
+        return False
+    if request.query_params.get("token"):
+        return False
+    if not search_request.model_dump(exclude_none=True).keys() <= _search_by_ids_fields:
+        return False
+    max_items = len(search_request.ids) * len(search_request.collections)
+    return max_items <= (search_request.limit or 10)
+
+
 @attr.s
 class CoreClientAuth(CoreClient):
     database: DatabaseLogicAuth
     landing_page_id = attr.ib(default=settings.stac_id)
 
+    @overrides
+    async def all_collections(
+        self,
+        limit: Optional[int] = None,
+        bbox: Optional[BBox] = None,
+        datetime: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        sortby: Optional[Union[str, List[str]]] = None,
+        filter_expr: Optional[str] = None,
+        filter_lang: Optional[str] = None,
+        q: Optional[Union[str, List[str]]] = None,
+        query: Optional[str] = None,
+        request: Request = None,
+        token: Optional[str] = None,
+        **kwargs,
+    ) -> stac_types.Collections:
+        return omit_unknown_count(
+            await super().all_collections(
+                limit=limit,
+                bbox=bbox,
+                datetime=datetime,
+                fields=fields,
+                sortby=sortby,
+                filter_expr=filter_expr,
+                filter_lang=filter_lang,
+                q=q,
+                query=query,
+                request=request,
+                token=token,
+                **kwargs,
+            )
+        )
+
     @overrides
     async def get_collection(
         self, collection_id: str, **kwargs
     ) -> stac_types.Collection:
         request: Request = kwargs["request"]
-        # collection = await self.database.find_collection(collection_id=collection_id)
-        collection = await ensure_authorized_for_collection(
-            self.database,
-            request.user,
-            request.auth.scopes,
-            collection_id,
-            AccessType.READ,
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            check_authorized_for_collection(
+                request.user,
+                request.auth.scopes,
+                await self._collection_acl(collection_id),
+                AccessType.READ,
+            )
+            _, etag = await self.database.find_collection_with_etag(
+                collection_id, source=False
+            )
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+        collection, etag = await self.database.find_collection_with_etag(collection_id)
+        check_authorized_for_collection(
+            request.user, request.auth.scopes, collection, AccessType.READ
         )
+        add_response_header(request, "ETag", etag)
         return self.collection_serializer.db_to_stac(
             collection=collection,
             request=request,
@@ -99,10 +323,47 @@ class CoreClientAuth(CoreClient):
         self, item_id: str, collection_id: str, **kwargs
     ) -> stac_types.Item:
         request: Request = kwargs["request"]
-        await self.get_collection(
-            collection_id=collection_id, request=request
-        )  # getting the collection makes sure the permissions are enforced
-        return await super().get_item(item_id, collection_id, **kwargs)
+        check_authorized_for_collection(
+            request.user,
+            request.auth.scopes,
+            await self._collection_acl(collection_id),
+            AccessType.READ,
+        )
+        if_none_match = request.headers.get("If-None-Match")
+        key = (collection_id, item_id)
+        cached = item_cache.get(key)
+        if cached is not None or if_none_match:
+            # only fetch the ETag: the item itself is not needed when it's unchanged, and a cached item is only valid
+            # if it wasn't written since (also through the other workers)
+            _, etag = await self.database.get_one_item_with_etag(
+                collection_id, item_id, source=False
+            )
+            if if_none_match and etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            if cached is not None and cached[1] != etag:
+                item_cache.pop(key)
+                cached = None
+        if cached is None:
+            item, etag = await self.database.get_one_item_with_etag(
+                collection_id, item_id
+            )
+            cached = (orjson.dumps(item), etag)
+            item_cache.put(key, cached, [collection_id])
+        item, etag = cached
+        add_response_header(request, "ETag", etag)
+        return self.item_serializer.db_to_stac(
+            orjson.loads(item), str(request.base_url)
+        )
+
+    async def _collection_acl(self, collection_id: str) -> dict:
+        acl = acl_cache.get(collection_id)
+        if acl is None:
+            collection, _ = await self.database.find_collection_with_etag(
+                collection_id, source=[_auth]
+            )
+            acl = {"id": collection_id, _auth: collection[_auth]}
+            acl_cache.put(collection_id, acl, [collection_id])
+        return acl
 
     @overrides
     async def item_collection(
@@ -121,7 +382,12 @@ class CoreClientAuth(CoreClient):
         **kwargs,
     ) -> stac_types.ItemCollection:
         try:
-            await self.get_collection(collection_id=collection_id, request=request)
+            check_authorized_for_collection(
+                request.user,
+                request.auth.scopes,
+                await self._collection_acl(collection_id),
+                AccessType.READ,
+            )
         except exceptions.NotFoundError:
             raise HTTPException(status_code=404, detail="Collection not found")
 
@@ -144,12 +410,47 @@ class CoreClientAuth(CoreClient):
     async def post_search(
         self, search_request: BaseSearchPostRequest, request: Request
     ) -> stac_types.ItemCollection:
-        collections_authorized = {
-            c["id"]
-            for c in await self.database.get_all_authorized_collections(
-                request.auth.scopes, _source=["id"]
+        set_count_mode(
+            getattr(search_request, "count", None) or request.query_params.get("count")
+        )
+        media_type = columnar.negotiate(request)
+        if not media_type:
+            return await self._cached_post_search(search_request, request)
+        # the columns are built from the stored items, which are not cached as search results
+        with columnar.stored_items():
+            result = omit_unknown_count(
+                await self._post_search(search_request, request)
+            )
+        return columnar.to_response(result, media_type)
+
+    async def _cached_post_search(
+        self, search_request: BaseSearchPostRequest, request: Request
+    ) -> stac_types.ItemCollection:
+        if not (search_cache.enabled and is_anonymous(request.auth.scopes)):
+            return omit_unknown_count(await self._post_search(search_request, request))
+        key = search_cache_key(search_request, request)
+        result = search_cache.get(key)
+        if result is None:
+            result = omit_unknown_count(
+                await self._post_search(search_request, request)
             )
-        }
+            if not pit_enabled() or not any(
+                link["rel"] == "next" for link in result["links"]
+            ):
+                # next tokens of point in time searches expire
+                search_cache.put(key, result, search_request.collections or [])
+        return result
+
+    async def _post_search(
+        self, search_request: BaseSearchPostRequest, request: Request
+    ) -> stac_types.ItemCollection:
+        prune = settings.search_extent_pruning and not search_request.collections
+        collections = list(
+            await self.database.get_all_authorized_collections(
+                request.auth.scopes, _source=["id", "extent"] if prune else ["id"]
+            )
+        )
+        collections_authorized = {c["id"] for c in collections}
         if search_request.collections:
             # check permissions for collections in query
             if not all(c in collections_authorized for c in search_request.collections):
@@ -157,6 +458,28 @@ class CoreClientAuth(CoreClient):
                     raise ForbiddenError("Insufficient permissions")
                 else:
                     raise UnauthorizedError("Unauthorized, please authenticate")
+            if is_search_by_ids(search_request, request):
+                items = await self.database.get_items_by_ids(
+                    search_request.collections, search_request.ids
+                )
+                if items is not None:
+                    return await self._item_collection(items, search_request, request)
+        elif prune and collections:
+            # only search authorized collections that may contain matching items
+            search_request.collections = prune_collections(collections, search_request)
+            add_response_header(
+                request,
+                COLLECTIONS_PRUNED_HEADER,
+                str(len(collections) - len(search_request.collections)),
+            )
+            if not search_request.collections:
+                return stac_types.ItemCollection(
+                    type="FeatureCollection",
+                    features=[],
+                    links=await PagingLinks(request=request, next=None).get_links(),
+                    numberReturned=0,
+                    numberMatched=0,
+                )
         else:
             # only search authorized collections
             search_request.collections = (
@@ -164,6 +487,32 @@ class CoreClientAuth(CoreClient):
             )
         return await super().post_search(search_request, request)
 
+    async def _item_collection(
+        self,
+        items: List[dict],
+        search_request: BaseSearchPostRequest,
+        request: Request,
+    ) -> stac_types.ItemCollection:
+        base_url = str(request.base_url)
+        fields = getattr(search_request, "fields", None)
+        include = fields.include if fields and fields.include else set()
+        exclude = fields.exclude if fields and fields.exclude else set()
+        features = [
+            filter_fields(
+                self.item_serializer.db_to_stac(item, base_url=base_url),
+                include,
+                exclude,
+            )
+            for item in items
+        ]
+        return stac_types.ItemCollection(
+            type="FeatureCollection",
+            features=features,
+            links=await PagingLinks(request=request, next=None).get_links(),
+            numberReturned=len(features),
+            numberMatched=known_count(len(features)),
+        )
+
 
 @attr.s
 class TransactionsClientAuth(TransactionsClient):
@@ -233,7 +582,10 @@ class TransactionsClientAuth(TransactionsClient):
             collection_id,
             AccessType.WRITE,
         )
-        return await super().create_item(collection_id, item, **kwargs)
+        item_ids = [item.id] if isinstance(item, Item) else None
+        item = await super().create_item(collection_id, item, **kwargs)
+        invalidate_items(collection_id, item_ids)
+        return item
 
     @overrides
     async def update_item(
@@ -247,7 +599,20 @@ class TransactionsClientAuth(TransactionsClient):
             collection_id,
             AccessType.WRITE,
         )
+        if settings.skip_unchanged_items:
+            try:
+                stored = await self.database.get_one_item(collection_id, item_id)
+            except NotFoundError:
+                stored = None
+            if stored and stored.get(CONTENT_HASH) == content_hash(
+                item.model_dump(mode="json")
+            ):
+                # unchanged, return the stored item
+                return self.database.item_serializer.db_to_stac(
+                    stored, str(request.base_url)
+                )
         item = await super().update_item(collection_id, item_id, item, **kwargs)
+        invalidate_items(collection_id, [item_id])
         return item
 
     @overrides
@@ -267,6 +632,7 @@ class TransactionsClientAuth(TransactionsClient):
             AccessType.WRITE,
         )
         item = await super().patch_item(collection_id, item_id, patch, **kwargs)
+        invalidate_items(collection_id, [item_id])
         return item
 
     @overrides
@@ -280,6 +646,7 @@ class TransactionsClientAuth(TransactionsClient):
             AccessType.WRITE,
         )
         await super().delete_item(item_id, collection_id, **kwargs)
+        invalidate_items(collection_id, [item_id])
 
     @overrides
     async def create_collection(
@@ -288,7 +655,9 @@ class TransactionsClientAuth(TransactionsClient):
         collection = await self.ensure_collection_auth_present(
             collection, kwargs["request"]
         )
-        return await super().create_collection(collection, **kwargs)
+        collection = await super().create_collection(collection, **kwargs)
+        invalidate_collection(collection["id"])
+        return collection
 
     @overrides
     async def update_collection(
@@ -305,9 +674,11 @@ class TransactionsClientAuth(TransactionsClient):
         collection = await self.ensure_collection_auth_present(
             collection, kwargs["request"]
         )
-        return await super().update_collection(
+        collection = await super().update_collection(
             collection_id=collection_id, collection=collection, **kwargs
         )
+        invalidate_collection(collection_id)
+        return collection
 
     @overrides
     async def patch_collection(
@@ -325,7 +696,9 @@ class TransactionsClientAuth(TransactionsClient):
             AccessType.WRITE,
         )
 
-        return await super().patch_collection(collection_id, patch, **kwargs)
+        collection = await super().patch_collection(collection_id, patch, **kwargs)
+        invalidate_collection(collection_id)
+        return collection
 
     @overrides
     async def delete_collection(self, collection_id: str, **kwargs) -> None:
@@ -338,6 +711,7 @@ class TransactionsClientAuth(TransactionsClient):
             AccessType.WRITE,
         )
         await super().delete_collection(collection_id, **kwargs)
+        invalidate_collection(collection_id)
 
 
 @attr.s
@@ -346,7 +720,7 @@ class BulkTransactionsClientAuth(BulkTransactionsClient):
 
     async def bulk_item_insert(
         self, items: Items, chunk_size: Optional[int] = None, **kwargs
-    ) -> str:
+    ) -> Union[str, Response]:
         request: Request = kwargs["request"]
         collection_id = request.path_params.get("collection_id")
         await ensure_authorized_for_collection(
@@ -356,9 +730,306 @@ class BulkTransactionsClientAuth(BulkTransactionsClient):
             collection_id,
             AccessType.WRITE,
         )
+        if settings.bulk_validation == "fast":
+            check_items(items.items.items())
         if not all(i["collection"] == collection_id for i in items.items.values()):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Item collection doesn't match collection path parameter {collection_id}",
             )
-        return super().bulk_item_insert(items, chunk_size, refresh="wait_for", **kwargs)
+        if respond_async(request):
+            job = await job_queue.submit(
+                "bulk_items",
+                request.user.display_name,
+                lambda j: self._bulk_item_insert_job(
+                    j, collection_id, items, chunk_size, **kwargs
+                ),
+            )
+            return job_accepted(request, job)
+        return await self._insert_items(collection_id, items, chunk_size, **kwargs)
+
+    async def bulk_items_insert(
+        self, items: Items, chunk_size: Optional[int] = None, **kwargs
+    ) -> Union[Dict[str, Any], Response]:
+        """
+        Bulk insert the items of multiple collections. The items are grouped by collection, of which the authorizations
+        are checked at once, and the groups are inserted concurrently.
+
+        :return: the result or error of the insert per collection
+        """
+        request: Request = kwargs["request"]
+        if settings.bulk_validation == "fast":
+            check_items(items.items.items())
+        groups: Dict[str, Dict[str, Any]] = {}
+        for key, item in items.items.items():
+            collection_id = item.get("collection") if isinstance(item, dict) else None
+            if not collection_id:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Item {key} has no collection",
+                )
+            groups.setdefault(collection_id, {})[key] = item
+        await ensure_authorized_for_collections(
+            self.database,
+            request.user,
+            request.auth.scopes,
+            list(groups),
+            AccessType.WRITE,
+        )
+        grouped = {c: Items(items=g, method=items.method) for c, g in groups.items()}
+        if respond_async(request):
+            job = await job_queue.submit(
+                "bulk_items",
+                request.user.display_name,
+                lambda j: self._insert_groups(
+                    grouped, chunk_size, j.progress.update, **kwargs
+                ),
+            )
+            return job_accepted(request, job)
+        return await self._insert_groups(grouped, chunk_size, **kwargs)
+
+    async def _insert_groups(
+        self,
+        groups: Dict[str, Items],
+        chunk_size: Optional[int] = None,
+        progress: Optional[Callable[[Dict[str, int]], Any]] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """
+        Insert the groups of items of multiple collections concurrently. A failing group doesn't affect the others.
+
+        :param groups: items by collection id
+        :param progress: called with the number of `total` and `processed` collections
+        :return: `status` and `result` or `error` by collection id
+        """
+        results = {}
+        if progress is not None:
+            progress({"total": len(groups), "processed": 0})
+
+        async def insert(collection_id: str, items: Items):
+            try:
+                result = await self._insert_items(
+                    collection_id, items, chunk_size, **kwargs
+                )
+                results[collection_id] = {"status": "succeeded", "result": result}
+            except HTTPException as e:
+                results[collection_id] = {"status": "failed", "error": str(e.detail)}
+            except Exception as e:
+                logger.exception(f"Bulk insert into collection {collection_id} failed")
+                results[collection_id] = {"status": "failed", "error": str(e)}
+            if progress is not None:
+                progress({"processed": len(results)})
+
+        await asyncio.gather(*(insert(c, i) for c, i in groups.items()))
+        return {"collections": results}
+
+    async def _insert_items(
+        self,
+        collection_id: str,
+        items: Items,
+        chunk_size: Optional[int] = None,
+        **kwargs,
+    ) -> str:
+        """
+        Insert items of a single collection, in a thread as the bulk insert is synchronous.
+        """
+        counts = None
+        if skips_unchanged(items):
+            items, counts = await self._skip_unchanged(collection_id, items)
+        try:
+            result = (
+                await run_in_threadpool(
+                    self._bulk_insert,
+                    items,
+                    chunk_size,
+                    refresh="wait_for",
+                    **kwargs,
+                )
+                if items.items
+                else ""
+            )
+        finally:
+            invalidate_items(collection_id, [i["id"] for i in items.items.values()])
+        await self.database.async_index_inserter.promote_if_oversized(collection_id)
+        if counts is not None:
+            result = (
+                f"{result} Created {counts['created']}, updated {counts['updated']} and skipped "
+                f"{counts['unchanged']} unchanged Items."
+            ).strip()
+        return result
+
+    def _bulk_insert(
+        self, items: Items, chunk_size: Optional[int] = None, **kwargs
+    ) -> str:
+        """
+        Bulk insert items of a single collection. With `BULK_VALIDATION=fast`, the items were only checked for the
+        fields needed to index them, and are inserted without parsing them into models.
+        """
+        if settings.bulk_validation != "fast":
+            return super().bulk_item_insert(items, chunk_size, **kwargs)
+        request = kwargs.get("request")
+        base_url = str(request.base_url) if request else ""
+        processed_items = [
+            self.preprocess_item(prepare_item(item), base_url, items.method)
+            for item in items.items.values()
+        ]
+        success, errors = self.database.bulk_sync(
+            processed_items[0]["collection"], processed_items, **kwargs
+        )
+        if errors:
+            logger.error(f"Bulk sync operation encountered errors: {errors}")
+        return (
+            f"Successfully added/updated {success} Items. "
+            f"{len(processed_items) - success} errors occurred."
+        )
+
+    async def _skip_unchanged(
+        self, collection_id: str, items: Items
+    ) -> Tuple[Items, Dict[str, int]]:
+        """
+        Leave out the items of which the content hash matches the stored item.
+
+        :return: the created and updated items, and the number of `created`, `updated` and `unchanged` items
+        """
+        stored = await self.database.get_content_hashes(
+            collection_id, [i["id"] for i in items.items.values()]
+        )
+        changed = {}
+        counts = {"created": 0, "updated": 0, "unchanged": 0}
+        for key, item in items.items.items():
+            if item["id"] not in stored:
+                counts["created"] += 1
+            elif stored[item["id"]] == content_hash(prepare_item(item)):
+                counts["unchanged"] += 1
+                continue
+            else:
+                counts["updated"] += 1
+            changed[key] = item
+        return Items(items=changed, method=items.method), counts
+
+    async def _bulk_item_insert_job(
+        self,
+        job: Job,
+        collection_id: str,
+        items: Items,
+        chunk_size: Optional[int] = None,
+        **kwargs,
+    ) -> List[str]:
+        """
+        Insert items in chunks of `JOB_CHUNK_SIZE` items, in a thread as the bulk insert is synchronous, reporting the
+        number of processed (and created, updated and unchanged) items as progress of the job.
+        """
+        all_items = list(items.items.items())
+        job.progress.update(total=len(all_items), processed=0)
+        results = []
+        try:
+            for i in range(0, len(all_items), JOB_CHUNK_SIZE):
+                chunk = Items(
+                    items=dict(all_items[i : i + JOB_CHUNK_SIZE]), method=items.method
+                )
+                processed = len(chunk.items)
+                if skips_unchanged(chunk):
+                    chunk, counts = await self._skip_unchanged(collection_id, chunk)
+                    for k, v in counts.items():
+                        job.progress[k] = job.progress.get(k, 0) + v
+                if chunk.items:
+                    results.append(
+                        await run_in_threadpool(
+                            self._bulk_insert,
+                            chunk,
+                            chunk_size,
+                            refresh="wait_for",
+                            **kwargs,
+                        )
+                    )
+                job.progress["processed"] += processed
+        finally:
+            await self.database.async_index_inserter.promote_if_oversized(collection_id)
+            invalidate_items(collection_id, [i["id"] for _, i in all_items])
+        return results
+
+    async def bulk_item_delete(
+        self, delete_request: BulkDelete, **kwargs
+    ) -> Union[Dict[str, Any], Response]:
+        request: Request = kwargs["request"]
+        collection_id = request.path_params.get("collection_id")
+        await ensure_authorized_for_collection(
+            self.database,
+            request.user,
+            request.auth.scopes,
+            collection_id,
+            AccessType.WRITE,
+        )
+        search = await self._delete_search(collection_id, delete_request)
+        if respond_async(request):
+            job = await job_queue.submit(
+                "bulk_delete",
+                request.user.display_name,
+                lambda j: self._delete_items(collection_id, search, j.progress.update),
+            )
+            return job_accepted(request, job)
+        return await self._delete_items(collection_id, search)
+
+    async def _delete_items(
+        self,
+        collection_id: str,
+        search: Search,
+        progress: Optional[Callable[[Dict[str, int]], Any]] = None,
+    ) -> Dict[str, Any]:
+        try:
+            return await self.database.delete_items_by_query(
+                collection_id, search, progress
+            )
+        finally:
+            invalidate_items(collection_id)
+
+    async def _delete_search(
+        self, collection_id: str, delete_request: BulkDelete
+    ) -> Search:
+        """
+        Get the search selecting the items of a collection to delete.
+        """
+        if not (
+            delete_request.ids
+            or delete_request.bbox
+            or delete_request.datetime
+            or delete_request.filter
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="At least one of ids, bbox, datetime or filter is required",
+            )
+        search = self.database.apply_collections_filter(
+            search=self.database.make_search(), collection_ids=[collection_id]
+        )
+        if delete_request.ids:
+            search = self.database.apply_ids_filter(
+                search=search, item_ids=delete_request.ids
+            )
+        if delete_request.datetime:
+            try:
+                search, _ = self.database.apply_datetime_filter(
+                    search=search,
+                    datetime=format_datetime_range(date_str=delete_request.datetime),
+                )
+            except (ValueError, TypeError) as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid interval format: {delete_request.datetime}, error: {e}",
+                )
+        if delete_request.bbox:
+            bbox = delete_request.bbox
+            if len(bbox) == 6:
+                bbox = [bbox[0], bbox[1], bbox[3], bbox[4]]
+            search = self.database.apply_bbox_filter(search=search, bbox=bbox)
+        if delete_request.filter:
+            try:
+                search = await self.database.apply_cql2_filter(
+                    search, delete_request.filter
+                )
+            except Exception as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Error with cql2 filter: {e}",
+                )
+        return search
@@ -1,28 +1,75 @@
 import asyncio
+import hashlib
 import logging
-from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, Union
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type, Union
 
 import attr
 import orjson
 from fastapi import HTTPException
-from opensearchpy import Search
+from opensearchpy import Search, exceptions, helpers
 from overrides import overrides
-from stac_fastapi.core.serializers import CollectionSerializer
+from stac_fastapi.core.serializers import CollectionSerializer, ItemSerializer
+from stac_fastapi.core.utilities import MAX_LIMIT
 from stac_fastapi.opensearch.database_logic import (
     COLLECTIONS_INDEX,
     ES_COLLECTIONS_MAPPINGS,
     DatabaseLogic,
 )
 from stac_fastapi.sfeos_helpers import filter as filter_module
-from stac_fastapi.types.errors import DatabaseError
+from stac_fastapi.sfeos_helpers.database import (
+    index_alias_by_collection_id,
+    mk_item_id,
+    validate_refresh,
+)
+from stac_fastapi.sfeos_helpers.database.query import (
+    ES_MAX_URL_LENGTH,
+    add_collections_to_body,
+)
+from stac_fastapi.sfeos_helpers.mappings import (
+    DEFAULT_SORT,
+    ES_ITEMS_MAPPINGS,
+    ITEM_INDICES,
+)
+from stac_fastapi.types.errors import ConflictError, DatabaseError, NotFoundError
+from stac_fastapi.types.stac import Item
+from starlette import status
 from starlette.requests import Request
 
+from terra_stac_api import instrumentation, timing, tracing
 from terra_stac_api.config import Settings
-from terra_stac_api.serializer import CustomCollectionSerializer
+from terra_stac_api.indexing import (
+    ItemIndexInserter,
+    ItemIndexSelector,
+    is_partitioned,
+    stale_copies_queries,
+)
+from terra_stac_api.pagination import (
+    CountMode,
+    PointInTime,
+    decode_pit_token,
+    encode_pit_token,
+    get_count_mode,
+    is_pit_token,
+    page_size,
+    pit_enabled,
+    search_fingerprint,
+    set_count_mode,
+    track_total_hits,
+    truncate_page,
+)
+from terra_stac_api.serializer import (
+    CONTENT_HASH,
+    CustomCollectionSerializer,
+    CustomItemSerializer,
+)
 
 settings = Settings()
 logger = logging.getLogger(__name__)
 
+DELETE_POLL_INTERVAL = 1.0
+CONTENT_HASH_BATCH_SIZE = 1000
+
 ES_COLLECTIONS_MAPPINGS["properties"]["_auth"] = {
     "type": "object",
     "properties": {"read": {"type": "keyword"}, "write": {"type": "keyword"}},
@@ -35,14 +82,33 @@ ES_COLLECTIONS_MAPPINGS["properties"]["summaries"] = {
     "type": "object",
     "enabled": False,
 }
+ES_ITEMS_MAPPINGS["properties"][CONTENT_HASH] = {"type": "keyword", "index": False}
+
+
+def document_etag(document: Dict[str, Any]) -> str:
+    """
+    Get an ETag for a version of a document, based on its index, primary term and sequence number.
+    """
+    version = f"{document['_index']}:{document['_primary_term']}:{document['_seq_no']}"
+    return f'"{hashlib.blake2b(version.encode(), digest_size=8).hexdigest()}"'
 
 
 @attr.s
 class DatabaseLogicAuth(DatabaseLogic):
+    item_serializer: Type[ItemSerializer] = attr.ib(default=CustomItemSerializer)
     collection_serializer: Type[CollectionSerializer] = attr.ib(
         default=CustomCollectionSerializer
     )
 
+    def __attrs_post_init__(self):
+        super().__attrs_post_init__()
+        self.async_index_inserter = ItemIndexInserter(self.client, self.sync_client)
+        self.async_index_selector = ItemIndexSelector()
+        self.point_in_time = PointInTime(self.client)
+        if instrumentation.enabled():
+            instrumentation.instrument_transport(self.client.transport)
+            instrumentation.instrument_transport(self.sync_client.transport)
+
     async def get_all_authorized_collections(
         self,
         authorizations: List[str],
@@ -58,9 +124,13 @@ class DatabaseLogicAuth(DatabaseLogic):
                 "query": {"bool": {"must": [{"terms": {"_auth.read": authorizations}}]}}
             }
         )
-        collections = await self.client.search(
-            body=body, index=COLLECTIONS_INDEX, size=1000, _source=_source
-        )
+        with (
+            timing.phase("collections"),
+            tracing.span("get_all_authorized_collections"),
+        ):
+            collections = await self.client.search(
+                body=body, index=COLLECTIONS_INDEX, size=1000, _source=_source
+            )
         return (c["_source"] for c in collections["hits"]["hits"])
 
     @overrides
@@ -239,6 +309,11 @@ class DatabaseLogicAuth(DatabaseLogic):
             del count_body["search_after"]
         count_body["size"] = 0
 
+        set_count_mode(request.query_params.get("count"))
+        count_mode = get_count_mode()
+        if count_mode != CountMode.EXACT:
+            body["track_total_hits"] = track_total_hits(count_mode)
+
         # Create async tasks for both search and count
         search_task = asyncio.create_task(
             self.client.search(
@@ -247,11 +322,15 @@ class DatabaseLogicAuth(DatabaseLogic):
             )
         )
 
-        count_task = asyncio.create_task(
-            self.client.count(
-                index=COLLECTIONS_INDEX,
-                body={"query": body.get("query", {"match_all": {}})},
+        count_task = (
+            asyncio.create_task(
+                self.client.count(
+                    index=COLLECTIONS_INDEX,
+                    body={"query": body.get("query", {"match_all": {}})},
+                )
             )
+            if count_mode == CountMode.EXACT
+            else None
         )
 
         # Wait for search task to complete
@@ -273,14 +352,11 @@ class DatabaseLogicAuth(DatabaseLogic):
                 next_token = "|".join(str(val) for val in next_token_values)
 
         # Get the total count of collections
-        matched = (
-            response["hits"]["total"]["value"]
-            if response["hits"]["total"]["relation"] == "eq"
-            else None
-        )
+        total = response["hits"].get("total")
+        matched = total["value"] if total and total["relation"] == "eq" else None
 
         # If count task is done, use its result
-        if count_task.done():
+        if count_task and count_task.done():
             try:
                 matched = count_task.result().get("count")
             except Exception as e:
@@ -288,9 +364,220 @@ class DatabaseLogicAuth(DatabaseLogic):
 
         return collections, next_token, matched
 
+    @overrides
+    async def execute_search(
+        self,
+        search: Search,
+        limit: int,
+        token: Optional[str],
+        sort: Optional[Dict[str, Dict[str, str]]],
+        collection_ids: Optional[List[str]],
+        datetime_search: Dict[str, Optional[str]],
+        ignore_unavailable: bool = True,
+    ) -> Tuple[Iterable[Dict[str, Any]], Optional[int], Optional[str]]:
+        """
+        Execute a search. When point in time pagination is enabled (`SEARCH_PIT_PAGINATION`), the first page opens a
+        point in time, which is used by the next pages through the (signed) next token. Pages of a search are then
+        consistent, also while items are written.
+        The number of matched items is counted according to the count mode of the request (`SEARCH_COUNT`).
+        """
+        use_pit = pit_enabled() and (not token or is_pit_token(token))
+        mode = get_count_mode()
+        search_body: Dict[str, Any] = {"sort": sort if sort else DEFAULT_SORT}
+        query = search.query.to_dict() if search.query else None
+        if query:
+            search_body["query"] = query
+        fingerprint = search_fingerprint(search_body)
+
+        # a point in time requires existing indices, so it covers all partitions of the collections
+        index_param = await self.async_index_selector.select_indexes(
+            collection_ids, {} if use_pit else datetime_search
+        )
+        if len(index_param) > ES_MAX_URL_LENGTH - 300:
+            index_param = ITEM_INDICES
+            search_body["query"] = add_collections_to_body(collection_ids, query)
+
+        matched = None
+        count_task = None
+        pit_id = None
+        if use_pit and token:
+            page = decode_pit_token(token, fingerprint)
+            pit_id, matched = page["pit"], page["matched"]
+            search_body["search_after"] = page["after"]
+            search_body["track_total_hits"] = False
+        else:
+            if token:
+                search_body["search_after"] = orjson.loads(urlsafe_b64decode(token))
+            if mode == CountMode.EXACT and not use_pit:
+                count_task = asyncio.create_task(
+                    self.client.count(
+                        index=index_param,
+                        ignore_unavailable=ignore_unavailable,
+                        body=search.to_dict(count=True),
+                    )
+                )
+            else:
+                search_body["track_total_hits"] = track_total_hits(mode)
+        if use_pit and not pit_id:
+            try:
+                pit_id = await self.point_in_time.open(index_param)
+            except exceptions.NotFoundError:
+                raise NotFoundError(f"Collections '{collection_ids}' do not exist")
+
+        # one more item than the page tells whether there's a next page
+        fetched = page_size(limit, collection_ids)
+        size_limit = min(fetched + 1, MAX_LIMIT)
+        try:
+            if use_pit:
+                search_body["pit"] = {
+                    "id": pit_id,
+                    "keep_alive": settings.search_pit_keep_alive,
+                }
+                response = await self.client.search(body=search_body, size=size_limit)
+                pit_id = response.get("pit_id", pit_id)
+            else:
+                response = await self.client.search(
+                    index=index_param,
+                    ignore_unavailable=ignore_unavailable,
+                    body=search_body,
+                    size=size_limit,
+                )
+        except exceptions.NotFoundError:
+            if count_task:
+                count_task.cancel()
+            if use_pit:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Search context expired, restart the search",
+                )
+            raise NotFoundError(f"Collections '{collection_ids}' do not exist")
+
+        total = response["hits"].get("total")
+        if matched is None and total and total["relation"] == "eq":
+            matched = total["value"]
+            if count_task:
+                count_task.cancel()
+        elif count_task:
+            try:
+                matched = (await count_task).get("count")
+            except Exception as e:
+                logger.error(f"Count task failed: {e}")
+
+        hits = response["hits"]["hits"]
+        page = truncate_page(hits[:fetched], collection_ids)
+        next_token = None
+        if len(hits) > len(page):
+            sort_array = page[-1]["sort"]
+            if use_pit:
+                next_token = encode_pit_token(pit_id, sort_array, matched, fingerprint)
+            else:
+                next_token = urlsafe_b64encode(orjson.dumps(sort_array)).decode()
+        elif use_pit:
+            await self.point_in_time.close(pit_id)
+        return (hit["_source"] for hit in page), matched, next_token
+
     async def _refresh(self):
         await self.client.indices.refresh()
 
+    async def get_one_item_with_etag(
+        self,
+        collection_id: str,
+        item_id: str,
+        source: Union[List[str], bool] = True,
+    ) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Retrieve an item together with its ETag.
+
+        :param collection_id: collection id
+        :param item_id: item id
+        :param source: fields of the item to retrieve, False to only retrieve the ETag
+        :return: item (None if no source is retrieved) and ETag
+        """
+        try:
+            response = await self.client.search(
+                index=index_alias_by_collection_id(collection_id),
+                body={
+                    "query": {"term": {"_id": mk_item_id(item_id, collection_id)}},
+                    "size": 1,
+                    "seq_no_primary_term": True,
+                    "_source": source,
+                },
+            )
+        except exceptions.NotFoundError:
+            response = {"hits": {"hits": []}}
+        if not response["hits"]["hits"]:
+            raise NotFoundError(
+                f"Item {item_id} does not exist inside Collection {collection_id}"
+            )
+        hit = response["hits"]["hits"][0]
+        return hit.get("_source"), document_etag(hit)
+
+    async def find_collection_with_etag(
+        self, collection_id: str, source: Union[List[str], bool] = True
+    ) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Retrieve a collection together with its ETag.
+
+        :param collection_id: collection id
+        :param source: fields of the collection to retrieve, False to only retrieve the ETag
+        :return: collection (None if no source is retrieved) and ETag
+        """
+        try:
+            collection = await self.client.get(
+                index=COLLECTIONS_INDEX, id=collection_id, _source=source
+            )
+        except exceptions.NotFoundError:
+            raise NotFoundError(f"Collection {collection_id} not found")
+        return collection.get("_source"), document_etag(collection)
+
+    async def find_collections(
+        self, collection_ids: List[str], source: Union[List[str], bool] = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve multiple collections in a single request.
+
+        :param collection_ids: collection ids
+        :param source: fields of the collections to retrieve
+        :return: collections, in the order of the collection ids
+        """
+        response = await self.client.mget(
+            index=COLLECTIONS_INDEX, body={"ids": collection_ids}, _source=source
+        )
+        missing = [d["_id"] for d in response["docs"] if not d.get("found")]
+        if missing:
+            raise NotFoundError(f"Collections {', '.join(missing)} not found")
+        return [d["_source"] for d in response["docs"]]
+
+    async def get_items_by_ids(
+        self, collection_ids: List[str], item_ids: List[str]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Retrieve items by their ids with a multi-get on the collection indices, in the order of `item_ids`.
+
+        :param collection_ids: collections of the items
+        :param item_ids: item ids
+        :return: the existing items, or None if the items can't be retrieved by id (eg. for datetime partitioned
+            collections, of which the alias points to multiple indices)
+        """
+        if any(is_partitioned(c) for c in collection_ids):
+            return None
+        docs = [
+            {"_index": index_alias_by_collection_id(c), "_id": mk_item_id(i, c)}
+            for i in item_ids
+            for c in collection_ids
+        ]
+        response = await self.client.mget(body={"docs": docs})
+        items = []
+        for doc in response["docs"]:
+            if "error" in doc:
+                if doc["error"].get("type") == "index_not_found_exception":
+                    continue
+                logger.warning(f"Falling back to search for items: {doc['error']}")
+                return None
+            if doc.get("found"):
+                items.append(doc["_source"])
+        return items
+
     @overrides
     async def aggregate(
         self,
@@ -319,5 +606,254 @@ class DatabaseLogicAuth(DatabaseLogic):
             geometry_geohash_grid_precision,
             geometry_geotile_grid_precision,
             datetime_frequency_interval,
+            datetime_search,
             ignore_unavailable,
         )
+
+    async def _delete_stale_partition_copies(
+        self, collection_id: str, actions: List[Dict[str, Any]], refresh: str
+    ):
+        for body in stale_copies_queries(actions):
+            await self.client.delete_by_query(
+                index=index_alias_by_collection_id(collection_id),
+                body=body,
+                conflicts="proceed",
+                refresh=refresh != "false",
+            )
+
+    @overrides
+    async def create_item(
+        self,
+        item: Item,
+        base_url: str = "",
+        exist_ok: bool = False,
+        **kwargs: Any,
+    ):
+        await super().create_item(item, base_url=base_url, exist_ok=exist_ok, **kwargs)
+        await self.async_index_inserter.promote_if_oversized(item["collection"])
+        if exist_ok and is_partitioned(item["collection"]):
+            # the datetime of the item might have changed, so remove it from its previous partition
+            target_index = await self.async_index_inserter.get_target_index(
+                item["collection"], item
+            )
+            await self._delete_stale_partition_copies(
+                item["collection"],
+                [
+                    {
+                        "_index": target_index,
+                        "_id": mk_item_id(item["id"], item["collection"]),
+                    }
+                ],
+                validate_refresh(
+                    kwargs.get("refresh", self.async_settings.database_refresh)
+                ),
+            )
+
+    @overrides
+    async def json_patch_item(
+        self,
+        collection_id: str,
+        item_id: str,
+        operations: List[Any],
+        base_url: str,
+        create_nest: bool = False,
+        refresh: bool = True,
+    ) -> Item:
+        item = await super().json_patch_item(
+            collection_id, item_id, operations, base_url, create_nest, refresh
+        )
+        if is_partitioned(item["collection"]):
+            # move the item if the patch changed its datetime
+            target_index = await self.async_index_inserter.get_target_index(
+                item["collection"], item
+            )
+            doc_id = mk_item_id(item["id"], item["collection"])
+            if not await self.client.exists(index=target_index, id=doc_id):
+                await self.client.index(
+                    index=target_index, id=doc_id, body=item, refresh=refresh
+                )
+                await self._delete_stale_partition_copies(
+                    item["collection"],
+                    [{"_index": target_index, "_id": doc_id}],
+                    validate_refresh(refresh),
+                )
+        return item
+
+    @overrides
+    def bulk_sync_prep_create_item(
+        self, item: Item, base_url: str, exist_ok: bool = False
+    ) -> Item:
+        if not exist_ok and is_partitioned(item["collection"]):
+            # a document can't be fetched by id through an alias spanning multiple partitions, so count instead
+            response = self.sync_client.count(
+                index=index_alias_by_collection_id(item["collection"]),
+                body={
+                    "query": {
+                        "term": {"_id": mk_item_id(item["id"], item["collection"])}
+                    }
+                },
+                ignore_unavailable=True,
+            )
+            if response["count"] > 0:
+                error_message = f"Item {item['id']} in collection {item['collection']} already exists."
+                if self.sync_settings.raise_on_bulk_error:
+                    raise ConflictError(error_message)
+                logger.warning(
+                    f"{error_message} Continuing as `RAISE_ON_BULK_ERROR` is set to false."
+                )
+            exist_ok = True
+        return super().bulk_sync_prep_create_item(item, base_url, exist_ok)
+
+    @overrides
+    async def bulk_async(
+        self,
+        collection_id: str,
+        processed_items: List[Item],
+        **kwargs: Any,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        success, errors = await super().bulk_async(
+            collection_id, processed_items, **kwargs
+        )
+        await self.async_index_inserter.promote_if_oversized(collection_id)
+        if processed_items and is_partitioned(collection_id):
+            await self._delete_stale_partition_copies(
+                collection_id,
+                await self.async_index_inserter.prepare_bulk_actions(
+                    collection_id, processed_items
+                ),
+                validate_refresh(
+                    kwargs.get("refresh", self.async_settings.database_refresh)
+                ),
+            )
+        return success, errors
+
+    @overrides
+    def bulk_sync(
+        self,
+        collection_id: str,
+        processed_items: List[Item],
+        **kwargs: Any,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        if not processed_items or not is_partitioned(collection_id):
+            return super().bulk_sync(collection_id, processed_items, **kwargs)
+
+        # route the items to their partitions instead of the collection alias
+        refresh = validate_refresh(
+            kwargs.get("refresh", self.sync_settings.database_refresh)
+        )
+        actions = self.async_index_inserter.prepare_bulk_actions_sync(
+            collection_id, processed_items
+        )
+        success, errors = helpers.bulk(
+            self.sync_client,
+            actions,
+            refresh=refresh,
+            raise_on_error=self.sync_settings.raise_on_bulk_error,
+        )
+        for body in stale_copies_queries(actions):
+            self.sync_client.delete_by_query(
+                index=index_alias_by_collection_id(collection_id),
+                body=body,
+                conflicts="proceed",
+                refresh=refresh != "false",
+            )
+        return success, errors
+
+    async def get_content_hashes(
+        self, collection_id: str, item_ids: List[str]
+    ) -> Dict[str, Optional[str]]:
+        """
+        Get the content hashes of the stored items of a collection.
+
+        :param collection_id: collection id
+        :param item_ids: item ids
+        :return: content hash (None for items stored without hash) by item id, for the existing items
+        """
+        hashes = {}
+        for i in range(0, len(item_ids), CONTENT_HASH_BATCH_SIZE):
+            batch = item_ids[i : i + CONTENT_HASH_BATCH_SIZE]
+            response = await self.client.search(
+                index=index_alias_by_collection_id(collection_id),
+                body={
+                    "query": {
+                        "bool": {
+                            "filter": [
+                                {"term": {"collection": collection_id}},
+                                {"terms": {"id": batch}},
+                            ]
+                        }
+                    },
+                    "_source": ["id", CONTENT_HASH],
+                },
+                size=len(batch),
+                ignore_unavailable=True,
+            )
+            for hit in response["hits"]["hits"]:
+                hashes[hit["_source"]["id"]] = hit["_source"].get(CONTENT_HASH)
+        return hashes
+
+    async def delete_items_by_query(
+        self,
+        collection_id: str,
+        search: Search,
+        progress: Optional[Callable[[Dict[str, int]], Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Delete the items of a collection matching a search, with a sliced delete by query. The delete by query runs as
+        a task, of which the progress is polled every `DELETE_POLL_INTERVAL` seconds.
+
+        :param collection_id: collection id
+        :param search: search selecting the items to delete
+        :param progress: called with the `total`, `deleted` and `batches` so far while the delete is running
+        :return: number of matched (`total`) and `deleted` items, and the `failures`
+        """
+        query = search.query.to_dict() if search.query else {"match_all": {}}
+        try:
+            task = await self.client.delete_by_query(
+                index=index_alias_by_collection_id(collection_id),
+                body={"query": query},
+                conflicts="proceed",
+                refresh=True,
+                slices="auto",
+                wait_for_completion=False,
+            )
+        except exceptions.NotFoundError:
+            raise NotFoundError(f"Collection {collection_id} does not exist")
+        while True:
+            result = await self.client.tasks.get(task_id=task["task"])
+            if result.get("completed"):
+                break
+            task_status = result["task"]["status"]
+            logger.info(
+                f"Deleting items of collection {collection_id}: {task_status['deleted']}/{task_status['total']}"
+            )
+            if progress is not None:
+                progress({k: task_status[k] for k in ("total", "deleted", "batches")})
+            await asyncio.sleep(DELETE_POLL_INTERVAL)
+        if "error" in result:
+            raise DatabaseError(f"Delete by query failed: {result['error']}")
+        response = result["response"]
+        return {
+            "total": response["total"],
+            "deleted": response["deleted"],
+            "failures": response.get("failures", []),
+        }
+
+    @overrides
+    async def delete_collection(self, collection_id: str, **kwargs: Any):
+        # never trust the cached layout here: deleting the index behind the alias of a shared collection would delete
+        # the shared index
+        if await self.async_index_inserter.is_shared(collection_id, cached=False):
+            # only remove the items of this collection from the shared index
+            await self.find_collection(collection_id=collection_id)
+            refresh = validate_refresh(
+                kwargs.get("refresh", self.async_settings.database_refresh)
+            )
+            logger.info(f"Deleting collection {collection_id} with refresh={refresh}")
+            await self.client.delete(
+                index=COLLECTIONS_INDEX, id=collection_id, refresh=refresh
+            )
+            await self.async_index_inserter.remove_from_shared_index(collection_id)
+        else:
+            await super().delete_collection(collection_id, **kwargs)
+        self.async_index_inserter.forget(collection_id)
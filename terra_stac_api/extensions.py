@@ -0,0 +1,155 @@
+from typing import Any, Callable, Coroutine, Dict, List, Optional
+
+import attr
+import orjson
+from fastapi import APIRouter, FastAPI, Query, Request, Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, Field
+from stac_fastapi.api.models import create_request_model
+from stac_fastapi.api.routes import create_async_endpoint
+from stac_fastapi.extensions.third_party.bulk_transactions import (
+    BulkTransactionExtension,
+    Items,
+)
+from stac_fastapi.types.extension import ApiExtension
+from stac_fastapi.types.search import APIRequest
+from stac_pydantic.shared import BBox
+from typing_extensions import Annotated
+
+from terra_stac_api.pagination import CountMode
+
+_count_description = (
+    "How the matched items are counted (`numberMatched`): `exact`, `approximate` (exact up to a maximum, omitted "
+    "above it) or `none` (omitted)."
+)
+
+
+class OrjsonRequest(Request):
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+
+class OrjsonRoute(APIRoute):
+    """
+    Route parsing JSON request bodies with orjson, for the large payloads of bulk requests.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            return await handler(OrjsonRequest(request.scope, request.receive))
+
+        return route_handler
+
+
+@attr.s
+class GETCount(APIRequest):
+    count: Annotated[Optional[CountMode], Query(description=_count_description)] = (
+        attr.ib(default=None)
+    )
+
+
+class POSTCount(BaseModel):
+    count: Optional[CountMode] = Field(default=None, description=_count_description)
+
+
+@attr.s
+class CountExtension(ApiExtension):
+    """
+    Adds the `count` parameter to the search request models, to choose how the matched items are counted.
+    """
+
+    GET = GETCount
+    POST = POSTCount
+
+    conformance_classes: List[str] = attr.ib(factory=list)
+    schema_href: Optional[str] = attr.ib(default=None)
+
+    def register(self, app: FastAPI) -> None:
+        pass
+
+
+class BulkDelete(BaseModel):
+    """
+    Selection of the items of a collection to delete: by `ids`, and / or by `bbox`, `datetime` and CQL2 JSON `filter`.
+    """
+
+    ids: Optional[List[str]] = None
+    bbox: Optional[BBox] = None
+    datetime: Optional[str] = None
+    filter: Optional[Dict[str, Any]] = None
+
+
+@attr.s
+class BulkDeleteExtension(ApiExtension):
+    """
+    Adds the `POST /collections/{collection_id}/bulk_delete` endpoint, to delete the items of a collection matching a
+    selection at once.
+    """
+
+    client: Any = attr.ib()
+    conformance_classes: List[str] = attr.ib(factory=list)
+    schema_href: Optional[str] = attr.ib(default=None)
+
+    def register(self, app: FastAPI) -> None:
+        router = APIRouter(prefix=app.state.router_prefix)
+        router.add_api_route(
+            name="Bulk Delete Items",
+            path="/collections/{collection_id}/bulk_delete",
+            methods=["POST"],
+            endpoint=create_async_endpoint(
+                self.client.bulk_item_delete,
+                create_request_model("BulkDelete", base_model=BulkDelete),
+            ),
+        )
+        app.include_router(router, tags=["Bulk Transaction Extension"])
+
+
+@attr.s
+class OrjsonBulkTransactionExtension(BulkTransactionExtension):
+    """
+    Bulk transaction extension parsing the request bodies with orjson.
+    """
+
+    def register(self, app: FastAPI) -> None:
+        router = APIRouter(prefix=app.state.router_prefix, route_class=OrjsonRoute)
+        router.add_api_route(
+            name="Bulk Create Item",
+            path="/collections/{collection_id}/bulk_items",
+            response_model=str,
+            response_model_exclude_unset=True,
+            response_model_exclude_none=True,
+            methods=["POST"],
+            endpoint=create_async_endpoint(
+                self.client.bulk_item_insert,
+                create_request_model("Items", base_model=Items),
+            ),
+        )
+        app.include_router(router, tags=["Bulk Transaction Extension"])
+
+
+@attr.s
+class MultiCollectionBulkExtension(ApiExtension):
+    """
+    Adds the `POST /bulk_items` endpoint, to bulk insert the items of multiple collections at once.
+    """
+
+    client: Any = attr.ib()
+    conformance_classes: List[str] = attr.ib(factory=list)
+    schema_href: Optional[str] = attr.ib(default=None)
+
+    def register(self, app: FastAPI) -> None:
+        router = APIRouter(prefix=app.state.router_prefix, route_class=OrjsonRoute)
+        router.add_api_route(
+            name="Bulk Create Items",
+            path="/bulk_items",
+            methods=["POST"],
+            endpoint=create_async_endpoint(
+                self.client.bulk_items_insert,
+                create_request_model("MultiCollectionItems", base_model=Items),
+            ),
+        )
+        app.include_router(router, tags=["Bulk Transaction Extension"])
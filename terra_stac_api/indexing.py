@@ -0,0 +1,435 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from opensearchpy import exceptions, helpers
+from stac_fastapi.sfeos_helpers.database import (
+    index_alias_by_collection_id,
+    index_by_collection_id,
+    mk_item_id,
+)
+from stac_fastapi.sfeos_helpers.mappings import (
+    ES_ITEMS_MAPPINGS,
+    ES_ITEMS_SETTINGS,
+    ITEM_INDICES,
+    ITEMS_INDEX_PREFIX,
+)
+from stac_fastapi.sfeos_helpers.search_engine import (
+    BaseIndexInserter,
+    BaseIndexSelector,
+    IndexOperations,
+)
+from stac_fastapi.types.rfc3339 import rfc3339_str_to_datetime
+from starlette import status
+
+from terra_stac_api.config import Settings
+
+settings = Settings()
+logger = logging.getLogger(__name__)
+
+SHARED_ITEMS_INDEX = f"{ITEMS_INDEX_PREFIX}_shared"
+
+
+def is_partitioned(collection_id: str) -> bool:
+    return collection_id in settings.datetime_partitioned_collections
+
+
+def partition_key(dt: datetime) -> str:
+    dt = dt.astimezone(timezone.utc)
+    if settings.datetime_partition_interval == "year":
+        return f"{dt.year:04d}"
+    return f"{dt.year:04d}-{dt.month:02d}"
+
+
+def partition_keys(gte: Optional[str], lte: Optional[str]) -> Optional[List[str]]:
+    """
+    Get the keys of all partitions overlapping a datetime range.
+
+    :param gte: start of the range
+    :param lte: end of the range
+    :return: partition keys, or None if the range is open or covers more than `datetime_partition_max_indices`
+        partitions, in which case all partitions should be searched
+    """
+    if not gte or not lte:
+        return None
+    start = rfc3339_str_to_datetime(gte).astimezone(timezone.utc)
+    end = rfc3339_str_to_datetime(lte).astimezone(timezone.utc)
+    if settings.datetime_partition_interval == "year":
+        keys = range(start.year, end.year + 1)
+        if not 0 < len(keys) <= settings.datetime_partition_max_indices:
+            return None
+        return [f"{y:04d}" for y in keys]
+    keys = range(start.year * 12 + start.month - 1, end.year * 12 + end.month)
+    if not 0 < len(keys) <= settings.datetime_partition_max_indices:
+        return None
+    return [f"{m // 12:04d}-{m % 12 + 1:02d}" for m in keys]
+
+
+def partition_index(collection_id: str, key: str) -> str:
+    return f"{index_by_collection_id(collection_id)}-{key}"
+
+
+def item_partition_index(collection_id: str, item: Dict[str, Any]) -> str:
+    """
+    Get the partition index of an item, based on `properties.datetime` in UTC (or `properties.start_datetime` for
+    items without a datetime, ignoring `properties.end_datetime`).
+    """
+    properties = item.get("properties", {})
+    item_datetime = properties.get("datetime") or properties.get("start_datetime")
+    if not item_datetime:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Item {item.get('id')} has no datetime to determine its partition",
+        )
+    return partition_index(
+        collection_id, partition_key(rfc3339_str_to_datetime(item_datetime))
+    )
+
+
+def stale_copies_queries(
+    actions: Iterable[Dict[str, Any]],
+) -> Iterable[Dict[str, Any]]:
+    """
+    Build the queries matching copies of the written documents in other partitions than the one they were just
+    written to, eg. after the datetime of an item changed.
+    """
+    ids_by_index = defaultdict(list)
+    for action in actions:
+        ids_by_index[action["_index"]].append(action["_id"])
+    for index, ids in ids_by_index.items():
+        yield {
+            "query": {
+                "bool": {
+                    "filter": [{"ids": {"values": ids}}],
+                    "must_not": [{"term": {"_index": index}}],
+                }
+            }
+        }
+
+
+class ItemIndexInserter(BaseIndexInserter):
+    """
+    Index insertion strategy writing the items of datetime partitioned collections (`DATETIME_PARTITIONED_COLLECTIONS`)
+    to time-bucketed indices, which are created on first use behind the collection alias.
+    Items of other collections are written to the collection alias, like the default SFEOS strategy. When the
+    `SHARED_ITEMS_INDEX` mode is enabled, new collections get a filtered alias on a shared index instead of a dedicated
+    index, until they grow past `SHARED_ITEMS_INDEX_MAX_ITEMS` items.
+    """
+
+    def __init__(self, client: Any, sync_client: Any):
+        self.client = client
+        self.sync_client = sync_client
+        self.index_operations = IndexOperations()
+        self._shared: Dict[str, bool] = {}
+
+    @staticmethod
+    def should_create_collection_index() -> bool:
+        return True
+
+    async def create_simple_index(self, client: Any, collection_id: str) -> str:
+        if is_partitioned(collection_id):
+            # partition indices are created when the first item is written to them
+            return index_alias_by_collection_id(collection_id)
+        if settings.shared_items_index:
+            await self.add_to_shared_index(collection_id)
+            return SHARED_ITEMS_INDEX
+        return await self.index_operations.create_simple_index(client, collection_id)
+
+    def forget(self, collection_id: str):
+        """
+        Clear the cached index layout of a collection, eg. after it was deleted.
+        """
+        self._shared.pop(collection_id, None)
+
+    @staticmethod
+    def _index_body(aliases: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "aliases": aliases,
+            "mappings": ES_ITEMS_MAPPINGS,
+            "settings": ES_ITEMS_SETTINGS,
+        }
+
+    async def ensure_partition(self, collection_id: str, index: str):
+        # not cached: the collection may have been deleted and recreated through another worker, and a write to a
+        # missing partition would create it without the collection alias, hiding its items from searches
+        alias = index_alias_by_collection_id(collection_id)
+        if await self.client.indices.exists_alias(index=index, name=alias):
+            return
+        logger.info(f"Creating partition {index} for collection {collection_id}")
+        await self.client.indices.create(
+            index=index,
+            body=self._index_body({alias: {}}),
+            params={"ignore": [400]},  # already exists
+        )
+        # also when the index already existed without the alias
+        await self.client.indices.put_alias(index=index, name=alias)
+
+    def ensure_partition_sync(self, collection_id: str, index: str):
+        alias = index_alias_by_collection_id(collection_id)
+        if self.sync_client.indices.exists_alias(index=index, name=alias):
+            return
+        logger.info(f"Creating partition {index} for collection {collection_id}")
+        self.sync_client.indices.create(
+            index=index,
+            body=self._index_body({alias: {}}),
+            params={"ignore": [400]},  # already exists
+        )
+        self.sync_client.indices.put_alias(index=index, name=alias)
+
+    async def is_shared(self, collection_id: str, cached: bool = True) -> bool:
+        """
+        Check if the items of a collection are stored in the shared items index.
+
+        :param cached: use the layout cached by this worker, which can be stale as other workers move, delete and
+            recreate collections. Operations deleting or moving items resolve the alias instead.
+        """
+        if not cached or collection_id not in self._shared:
+            aliases = await self.client.indices.get_alias(
+                name=index_alias_by_collection_id(collection_id), ignore=[404]
+            )
+            self._shared[collection_id] = SHARED_ITEMS_INDEX in aliases
+        return self._shared[collection_id]
+
+    async def add_to_shared_index(self, collection_id: str):
+        await self.client.indices.create(
+            index=SHARED_ITEMS_INDEX,
+            body=self._index_body({}),
+            params={"ignore": [400]},  # already exists
+        )
+        await self.client.indices.put_alias(
+            index=SHARED_ITEMS_INDEX,
+            name=index_alias_by_collection_id(collection_id),
+            body={"filter": {"term": {"collection": collection_id}}},
+        )
+        self._shared[collection_id] = True
+
+    async def remove_from_shared_index(self, collection_id: str):
+        await self.client.delete_by_query(
+            index=SHARED_ITEMS_INDEX,
+            body={"query": {"term": {"collection": collection_id}}},
+            conflicts="proceed",
+            refresh=True,
+        )
+        await self.client.indices.delete_alias(
+            index=SHARED_ITEMS_INDEX,
+            name=index_alias_by_collection_id(collection_id),
+            ignore=[404],
+        )
+        self._shared[collection_id] = False
+
+    async def promote_if_oversized(self, collection_id: str):
+        """
+        Move the items of a collection from the shared index to a dedicated index once it holds more than
+        `SHARED_ITEMS_INDEX_MAX_ITEMS` items.
+        """
+        if (
+            not settings.shared_items_index
+            or is_partitioned(collection_id)
+            or not await self.is_shared(collection_id)
+        ):
+            return
+        alias = index_alias_by_collection_id(collection_id)
+        count = await self.client.count(index=alias)
+        if count["count"] > settings.shared_items_index_max_items:
+            await self.promote(collection_id)
+
+    async def _scan_shared(self, collection_id: str) -> AsyncIterator[Dict[str, Any]]:
+        async for hit in helpers.async_scan(
+            self.client,
+            index=SHARED_ITEMS_INDEX,
+            query={"query": {"term": {"collection": collection_id}}},
+            seq_no_primary_term=True,
+        ):
+            yield hit
+
+    async def _bulk(
+        self, actions: AsyncIterator[Dict[str, Any]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run bulk actions, skipping the version conflicts.
+
+        :return: the results of the successful actions
+        """
+        async for ok, result in helpers.async_streaming_bulk(
+            self.client, actions, raise_on_error=False
+        ):
+            (result,) = result.values()
+            if ok:
+                yield result
+            elif result.get("status") != status.HTTP_409_CONFLICT:
+                raise exceptions.TransportError(
+                    result.get("status"), "bulk action failed", result
+                )
+
+    async def promote(self, collection_id: str):
+        """
+        Move the items of a collection from the shared index to a dedicated index.
+        The items are copied before the collection alias is swapped to the dedicated index. The items written to the
+        shared index in the meantime are copied afterwards, unless they were written to the dedicated index after the
+        swap, which is checked with the sequence numbers of the copies.
+        """
+        if not await self.is_shared(collection_id, cached=False):
+            return
+        alias = index_alias_by_collection_id(collection_id)
+        index = f"{index_by_collection_id(collection_id)}-000001"
+        logger.info(f"Moving collection {collection_id} to dedicated index {index}")
+
+        created = await self.client.indices.create(
+            index=index, body=self._index_body({}), params={"ignore": [400]}
+        )
+        if "error" in created:
+            logger.warning(
+                f"Index {index} already exists, collection {collection_id} is moved by another worker or an "
+                "interrupted move left the index, which should be deleted"
+            )
+            return
+
+        # sequence numbers of the items in the shared index, and of their copies in the dedicated index
+        shared: Dict[str, Tuple[int, int]] = {}
+        copies: Dict[str, Tuple[int, int]] = {}
+
+        async def copy() -> AsyncIterator[Dict[str, Any]]:
+            async for hit in self._scan_shared(collection_id):
+                shared[hit["_id"]] = (hit["_seq_no"], hit["_primary_term"])
+                yield {
+                    "_op_type": "create",
+                    "_index": index,
+                    "_id": hit["_id"],
+                    "_source": hit["_source"],
+                }
+
+        await self.client.indices.refresh(index=SHARED_ITEMS_INDEX)
+        async for result in self._bulk(copy()):
+            copies[result["_id"]] = (result["_seq_no"], result["_primary_term"])
+        try:
+            await self.client.indices.update_aliases(
+                body={
+                    "actions": [
+                        {"remove": {"index": SHARED_ITEMS_INDEX, "alias": alias}},
+                        {"add": {"index": index, "alias": alias}},
+                    ]
+                }
+            )
+        except exceptions.NotFoundError:
+            # deleted concurrently
+            self._shared[collection_id] = False
+            await self.client.indices.delete(index=index, ignore=[404])
+            return
+        self._shared[collection_id] = False
+
+        async def catch_up() -> AsyncIterator[Dict[str, Any]]:
+            """
+            Copy the changes made to the shared index before the swap, only to the copies that were not changed since.
+            """
+            deleted = set(shared)
+            async for hit in self._scan_shared(collection_id):
+                deleted.discard(hit["_id"])
+                version = (hit["_seq_no"], hit["_primary_term"])
+                if shared.get(hit["_id"]) == version:
+                    continue
+                action = {"_index": index, "_id": hit["_id"], "_source": hit["_source"]}
+                if hit["_id"] in copies:
+                    seq_no, primary_term = copies[hit["_id"]]
+                    yield {
+                        **action,
+                        "if_seq_no": seq_no,
+                        "if_primary_term": primary_term,
+                    }
+                else:
+                    yield {**action, "_op_type": "create"}
+            for item_id in deleted & copies.keys():
+                seq_no, primary_term = copies[item_id]
+                yield {
+                    "_op_type": "delete",
+                    "_index": index,
+                    "_id": item_id,
+                    "if_seq_no": seq_no,
+                    "if_primary_term": primary_term,
+                }
+
+        await self.client.indices.refresh(index=SHARED_ITEMS_INDEX)
+        async for _ in self._bulk(catch_up()):
+            pass
+        await self.client.indices.refresh(index=index)
+        await self.client.delete_by_query(
+            index=SHARED_ITEMS_INDEX,
+            body={"query": {"term": {"collection": collection_id}}},
+            conflicts="proceed",
+            refresh=True,
+        )
+
+    async def get_target_index(
+        self, collection_id: str, product: Dict[str, Any]
+    ) -> str:
+        if not is_partitioned(collection_id):
+            return index_alias_by_collection_id(collection_id)
+        index = item_partition_index(collection_id, product)
+        await self.ensure_partition(collection_id, index)
+        return index
+
+    async def prepare_bulk_actions(
+        self, collection_id: str, items: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        if not is_partitioned(collection_id):
+            index = index_alias_by_collection_id(collection_id)
+            indices = [index] * len(items)
+        else:
+            indices = [item_partition_index(collection_id, item) for item in items]
+            for index in set(indices):
+                await self.ensure_partition(collection_id, index)
+        return [
+            {
+                "_index": index,
+                "_id": mk_item_id(item["id"], item["collection"]),
+                "_source": item,
+            }
+            for index, item in zip(indices, items)
+        ]
+
+    def prepare_bulk_actions_sync(
+        self, collection_id: str, items: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        indices = [item_partition_index(collection_id, item) for item in items]
+        for index in set(indices):
+            self.ensure_partition_sync(collection_id, index)
+        actions = [
+            {
+                "_index": index,
+                "_id": mk_item_id(item["id"], item["collection"]),
+                "_source": item,
+            }
+            for index, item in zip(indices, items)
+        ]
+        return actions
+
+
+class ItemIndexSelector(BaseIndexSelector):
+    """
+    Index selector limiting searches on datetime partitioned collections to the partitions overlapping the requested
+    datetime range. Partitions that don't exist are skipped by the searches (`ignore_unavailable`).
+    """
+
+    async def select_indexes(
+        self,
+        collection_ids: Optional[List[str]],
+        datetime_search: Dict[str, Optional[str]],
+    ) -> str:
+        if not collection_ids:
+            return ITEM_INDICES
+        selected = []
+        for collection_id in collection_ids:
+            keys = (
+                partition_keys(datetime_search.get("gte"), datetime_search.get("lte"))
+                if is_partitioned(collection_id)
+                else None
+            )
+            if keys:
+                selected.extend(partition_index(collection_id, k) for k in keys)
+            else:
+                selected.append(index_alias_by_collection_id(collection_id))
+        return ",".join(selected)
+
+    async def refresh_cache(self):
+        pass
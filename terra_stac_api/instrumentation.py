@@ -0,0 +1,131 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from terra_stac_api import metrics, slowlog, timing, tracing
+
+# operations of document requests, by HTTP method
+_document_operations = {"GET": "get", "HEAD": "exists", "DELETE": "delete"}
+
+
+def enabled() -> bool:
+    return (
+        metrics.enabled() or timing.enabled() or tracing.enabled() or slowlog.enabled()
+    )
+
+
+def opensearch_operation(method: str, url: str) -> str:
+    """
+    Get the operation of an OpenSearch request from its URL, e.g. `search`, `count`, `get`, `bulk` or `mget`.
+    """
+    for segment in url.split("?", 1)[0].split("/"):
+        if segment == "_doc":
+            return _document_operations.get(method.upper(), "index")
+        if segment.startswith("_"):
+            return segment[1:]
+    return "index_" + method.lower()
+
+
+def opensearch_index(url: str) -> Optional[str]:
+    """
+    Get the index (or alias) of an OpenSearch request from its URL.
+    """
+    segment = url.split("?", 1)[0].split("/")[1]
+    return segment if segment and not segment.startswith("_") else None
+
+
+def response_attributes(response: Any) -> Dict[str, int]:
+    """
+    Get the number of matched and returned hits (or documents) of an OpenSearch response, as span attributes.
+    """
+    if not isinstance(response, dict):
+        return {}
+    if "hits" in response:
+        total = response["hits"].get("total")
+        attributes = {"db.opensearch.returned": len(response["hits"]["hits"])}
+        if total is not None:
+            attributes["db.opensearch.hits"] = (
+                total["value"] if isinstance(total, dict) else total
+            )
+        return attributes
+    if "count" in response:
+        return {"db.opensearch.hits": response["count"]}
+    if "docs" in response:
+        return {
+            "db.opensearch.hits": sum(d.get("found", False) for d in response["docs"])
+        }
+    if "items" in response:
+        return {"db.opensearch.returned": len(response["items"])}
+    return {}
+
+
+def _trace_request(span: Any, kwargs: Dict[str, Any]):
+    if span is not None:
+        kwargs["headers"] = tracing.inject_headers(kwargs.get("headers"))
+
+
+def _trace_response(span: Any, response: Any):
+    if span is not None:
+        span.set_attributes(response_attributes(response))
+
+
+def _log_slow_query(
+    method: str, url: str, kwargs: Dict[str, Any], response: Any, start: float
+):
+    if slowlog.enabled():
+        slowlog.log_slow_query(
+            method, url, kwargs.get("body"), response, time.perf_counter() - start
+        )
+
+
+def instrument_transport(transport: Any):
+    """
+    Instrument the requests of an (async or sync) OpenSearch client transport: observe their duration in the metrics
+    and the `opensearch` phase of the request, trace them in spans with the index and number of hits, propagating
+    the trace context to OpenSearch, and log the slow requests.
+    """
+    perform_request = transport.perform_request
+
+    def span(method: str, url: str):
+        operation = opensearch_operation(method, url)
+        attributes = {"db.system": "opensearch", "db.operation": operation}
+        index = opensearch_index(url)
+        if index is not None:
+            attributes["db.opensearch.index"] = index
+        return (
+            metrics.timed(metrics.OPENSEARCH_DURATION, operation),
+            timing.phase("opensearch"),
+            tracing.span(f"opensearch {operation}", attributes),
+        )
+
+    if asyncio.iscoroutinefunction(perform_request):
+
+        async def instrumented_request(method: str, url: str, *args, **kwargs):
+            timed, phase, traced = span(method, url)
+            start = time.perf_counter()
+            response = None
+            try:
+                with timed, phase, traced as s:
+                    _trace_request(s, kwargs)
+                    response = await perform_request(method, url, *args, **kwargs)
+                    _trace_response(s, response)
+                    return response
+            finally:
+                _log_slow_query(method, url, kwargs, response, start)
+
+    else:
+
+        def instrumented_request(method: str, url: str, *args, **kwargs):
+            timed, phase, traced = span(method, url)
+            start = time.perf_counter()
+            response = None
+            try:
+                with timed, phase, traced as s:
+                    _trace_request(s, kwargs)
+                    response = perform_request(method, url, *args, **kwargs)
+                    _trace_response(s, response)
+                    return response
+            finally:
+                _log_slow_query(method, url, kwargs, response, start)
+
+    transport.perform_request = instrumented_request
@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+import attr
+from fastapi import APIRouter, FastAPI, HTTPException, Path, Request
+from stac_fastapi.api.routes import create_async_endpoint
+from stac_fastapi.types.errors import NotFoundError
+from stac_fastapi.types.extension import ApiExtension
+from stac_fastapi.types.search import APIRequest
+from starlette import status
+from starlette.responses import JSONResponse
+from typing_extensions import Annotated
+
+from terra_stac_api.config import Settings
+
+settings = Settings()
+logger = logging.getLogger(__name__)
+
+RESPOND_ASYNC = "respond-async"
+JOBS_INDEX = os.getenv("STAC_JOBS_INDEX", "jobs")
+# only the finish time is searched, to remove the expired jobs
+JOBS_MAPPINGS = {"dynamic": False, "properties": {"finished": {"type": "double"}}}
+# seconds between the saves of the progress of a running job
+PROGRESS_INTERVAL = 1.0
+# seconds after which an unfinished job of which the progress isn't saved anymore is considered lost with its worker
+LOST_AFTER = 60.0
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+@attr.s
+class Job:
+    """
+    Background job, of which the work reports its progress by updating `progress`.
+    """
+
+    type: str = attr.ib()
+    owner: Optional[str] = attr.ib()
+    id: str = attr.ib(factory=lambda: str(uuid.uuid4()))
+    status: JobStatus = attr.ib(default=JobStatus.QUEUED)
+    progress: Dict[str, Any] = attr.ib(factory=dict)
+    result: Any = attr.ib(default=None)
+    error: Optional[str] = attr.ib(default=None)
+    created: float = attr.ib(factory=time.time)
+    started: Optional[float] = attr.ib(default=None)
+    finished: Optional[float] = attr.ib(default=None)
+    saved: Optional[float] = attr.ib(default=None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "type": self.type,
+            "status": self.status.value,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+    def to_record(self) -> Dict[str, Any]:
+        return {**self.to_dict(), "owner": self.owner, "saved": time.time()}
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "Job":
+        return cls(**{**record, "status": JobStatus(record["status"])})
+
+
+class JobQueue:
+    """
+    Queue of background jobs, of which at most `max_concurrent` run concurrently in this worker. The jobs are stored in
+    the jobs index, with their progress saved every `PROGRESS_INTERVAL` seconds, so that every worker can report their
+    status. Finished jobs are kept for `retention` seconds.
+    """
+
+    def __init__(self, max_concurrent: int, retention: float, client: Any = None):
+        self.retention = retention
+        self.client = client
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._jobs: Dict[str, Job] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def create_index(self):
+        if self.client is None or await self.client.indices.exists(index=JOBS_INDEX):
+            return
+        # the other workers may create it concurrently
+        await self.client.indices.create(
+            index=JOBS_INDEX, body={"mappings": JOBS_MAPPINGS}, ignore=[400]
+        )
+
+    async def submit(
+        self, job_type: str, owner: Optional[str], work: Callable[[Job], Awaitable[Any]]
+    ) -> Job:
+        """
+        Submit a job.
+
+        :param job_type: type of the job
+        :param owner: user submitting the job, who can get its status
+        :param work: work of the job, called with the job to report its progress, returning the result of the job
+        :return: the queued job
+        """
+        await self._prune()
+        job = Job(type=job_type, owner=owner)
+        await self._save(job)
+        self._jobs[job.id] = job
+        task = asyncio.create_task(self._run(job, work))
+        # keep a reference to the task until it is done
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: Job, work: Callable[[Job], Awaitable[Any]]):
+        # the job is only saved here while it runs, so the saves can't overtake each other
+        work_task = asyncio.create_task(self._work(job, work))
+        while not work_task.done():
+            await asyncio.wait([work_task], timeout=PROGRESS_INTERVAL)
+            try:
+                await self._save(job)
+            except Exception as e:
+                logger.warning(f"Failed to save job {job.id}: {e}")
+
+    async def _work(self, job: Job, work: Callable[[Job], Awaitable[Any]]):
+        async with self._semaphore:
+            job.status = JobStatus.RUNNING
+            job.started = time.time()
+            try:
+                job.result = await work(job)
+                job.status = JobStatus.SUCCEEDED
+            except HTTPException as e:
+                job.error = str(e.detail)
+                job.status = JobStatus.FAILED
+            except Exception as e:
+                logger.exception(f"Job {job.id} ({job.type}) failed")
+                job.error = str(e)
+                job.status = JobStatus.FAILED
+            finally:
+                job.finished = time.time()
+
+    async def _save(self, job: Job):
+        if self.client is not None:
+            record = job.to_record()
+            await self.client.index(index=JOBS_INDEX, id=job.id, body=record)
+            job.saved = record["saved"]
+
+    def _expired(self, job: Job) -> bool:
+        return job.finished is not None and job.finished < time.time() - self.retention
+
+    async def _prune(self):
+        for job_id in [j.id for j in self._jobs.values() if self._expired(j)]:
+            del self._jobs[job_id]
+        if self.client is not None:
+            await self.client.delete_by_query(
+                index=JOBS_INDEX,
+                body={
+                    "query": {
+                        "range": {"finished": {"lt": time.time() - self.retention}}
+                    }
+                },
+                conflicts="proceed",
+                ignore=[404],
+            )
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        """
+        Get a job, from this worker if it runs here, or else from the jobs index. Unfinished jobs of which the progress
+        wasn't saved for `LOST_AFTER` seconds are reported as failed: their worker stopped.
+        """
+        job = self._jobs.get(job_id)
+        if job is None and self.client is not None:
+            response = await self.client.get(index=JOBS_INDEX, id=job_id, ignore=[404])
+            if response.get("found"):
+                job = Job.from_record(response["_source"])
+                if job.finished is None and job.saved < time.time() - LOST_AFTER:
+                    job.status = JobStatus.FAILED
+                    job.error = "The job was interrupted, its worker stopped"
+        if job is None or self._expired(job):
+            return None
+        return job
+
+
+job_queue = JobQueue(settings.job_max_concurrent, settings.job_retention)
+
+
+def respond_async(request: Request) -> bool:
+    """
+    Check if the client prefers an asynchronous response (`Prefer: respond-async`).
+    """
+    return any(
+        p.split("=", 1)[0].strip().lower() == RESPOND_ASYNC
+        for p in request.headers.get("prefer", "").replace(";", ",").split(",")
+    )
+
+
+def job_accepted(request: Request, job: Job) -> JSONResponse:
+    """
+    Response for a submitted job, referring to its status endpoint.
+    """
+    location = str(request.url_for("Get Job", job_id=job.id))
+    return JSONResponse(
+        job.to_dict(),
+        status_code=status.HTTP_202_ACCEPTED,
+        headers={"Location": location},
+    )
+
+
+class JobsClient:
+    async def get_job(self, job_id: str, **kwargs) -> Dict[str, Any]:
+        """
+        Get the status of a job, only for the user who submitted it and admins.
+        """
+        request: Request = kwargs["request"]
+        job = await job_queue.get(job_id)
+        if job is None or (
+            job.owner != request.user.display_name
+            and settings.role_admin not in request.auth.scopes
+        ):
+            raise NotFoundError(f"Job {job_id} not found")
+        return job.to_dict()
+
+
+@attr.s
+class JobUri(APIRequest):
+    job_id: Annotated[str, Path(description="Job ID")] = attr.ib()
+
+
+@attr.s
+class JobsExtension(ApiExtension):
+    """
+    Adds the `GET /jobs/{job_id}` endpoint, reporting the status of the background jobs of bulk operations.
+    """
+
+    client: JobsClient = attr.ib(factory=JobsClient)
+    conformance_classes: List[str] = attr.ib(factory=list)
+    schema_href: Optional[str] = attr.ib(default=None)
+
+    def register(self, app: FastAPI) -> None:
+        router = APIRouter(prefix=app.state.router_prefix)
+        router.add_api_route(
+            name="Get Job",
+            path="/jobs/{job_id}",
+            methods=["GET"],
+            endpoint=create_async_endpoint(self.client.get_job, JobUri),
+        )
+        app.include_router(router, tags=["Jobs"])
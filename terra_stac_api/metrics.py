@@ -0,0 +1,144 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from fastapi import FastAPI, Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from terra_stac_api.config import Settings
+
+try:
+    import prometheus_client
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Histogram,
+        generate_latest,
+        multiprocess,
+    )
+except ImportError:
+    prometheus_client = None
+
+settings = Settings()
+
+METRICS_PATH = "/metrics"
+_fast_buckets = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+if prometheus_client is not None:
+    REQUEST_DURATION = Histogram(
+        "stac_request_duration_seconds",
+        "Duration of requests, by route template",
+        ["method", "route", "status"],
+    )
+    OPENSEARCH_DURATION = Histogram(
+        "stac_opensearch_duration_seconds",
+        "Duration of OpenSearch requests, by operation",
+        ["operation"],
+    )
+    SERIALIZATION_DURATION = Histogram(
+        "stac_serialization_duration_seconds",
+        "Duration of serializing a single item or collection, or a columnar response",
+        ["kind"],
+        buckets=_fast_buckets,
+    )
+    AUTH_DURATION = Histogram(
+        "stac_auth_duration_seconds",
+        "Duration of verifying the access tokens",
+        buckets=_fast_buckets,
+    )
+    CACHE_EVENTS = Counter(
+        "stac_cache_events_total",
+        "Cache hits, misses and evictions",
+        ["cache", "event"],
+    )
+else:
+    REQUEST_DURATION = OPENSEARCH_DURATION = SERIALIZATION_DURATION = None
+    AUTH_DURATION = CACHE_EVENTS = None
+
+
+def enabled() -> bool:
+    return settings.metrics_enabled and prometheus_client is not None
+
+
+@contextmanager
+def timed(histogram: Optional["Histogram"], *labels: str) -> Iterator[None]:
+    """
+    Observe the duration of a block in a histogram, when metrics are enabled.
+    """
+    if not enabled():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        (histogram.labels(*labels) if labels else histogram).observe(
+            time.perf_counter() - start
+        )
+
+
+def cache_event(cache: str, event: str):
+    """
+    Count a cache event: `hit`, `miss`, `expired` or `evicted`.
+    """
+    if enabled():
+        CACHE_EVENTS.labels(cache, event).inc()
+
+
+class MetricsMiddleware:
+    """
+    Middleware observing the duration of requests, labeled with the template of the matched route.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not enabled():
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_DURATION.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status_code),
+            ).observe(time.perf_counter() - start)
+
+
+def metrics(request: Request) -> Response:
+    """
+    Expose the metrics, aggregated over the worker processes in multiprocess mode (`PROMETHEUS_MULTIPROC_DIR`).
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def register(app: FastAPI):
+    """
+    Add the `/metrics` endpoint.
+    """
+    if prometheus_client is None:
+        raise RuntimeError(
+            "prometheus-client must be installed for METRICS_ENABLED, install the metrics extra"
+        )
+    app.add_route(METRICS_PATH, metrics, include_in_schema=False)
@@ -0,0 +1,41 @@
+from typing import Dict
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+_response_headers = "response_headers"
+
+
+def add_response_header(request: Request, name: str, value: str):
+    """
+    Add a header to the response of a request, for endpoints that don't return a response object.
+    """
+    state = request.scope.setdefault("state", {})
+    headers: Dict[str, str] = state.setdefault(_response_headers, {})
+    headers[name] = value
+
+
+class ResponseHeadersMiddleware:
+    """
+    Middleware adding the headers collected with `add_response_header` to the response.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                headers = scope.get("state", {}).get(_response_headers)
+                if headers:
+                    response_headers = MutableHeaders(scope=message)
+                    for name, value in headers.items():
+                        response_headers.append(name, value)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
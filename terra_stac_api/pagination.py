@@ -0,0 +1,220 @@
+import hashlib
+import hmac
+import logging
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from contextvars import ContextVar
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import orjson
+from fastapi import HTTPException
+from starlette import status
+
+from terra_stac_api.config import Settings
+
+settings = Settings()
+logger = logging.getLogger(__name__)
+
+# weight of a page in the moving average of the serialized size of the items
+ITEM_SIZE_WEIGHT = 0.2
+# maximum number of searched collection sets of which the item size is estimated
+MAX_ITEM_SIZES = 1000
+# estimated serialized size of the items, by hash of the searched collections (None for all collections)
+_item_sizes: OrderedDict[Optional[int], float] = OrderedDict()
+
+
+class CountMode(str, Enum):
+    EXACT = "exact"
+    APPROXIMATE = "approximate"
+    NONE = "none"
+
+
+_count_mode: ContextVar[Optional[CountMode]] = ContextVar("count_mode", default=None)
+
+
+def set_count_mode(count: Optional[str]):
+    """
+    Set how the matched items of the searches of the current request are counted.
+
+    :param count: requested count mode, or None to use the default count mode (`SEARCH_COUNT`)
+    """
+    try:
+        _count_mode.set(CountMode(count) if count else None)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid count mode {count}, must be one of {[m.value for m in CountMode]}",
+        )
+
+
+def get_count_mode() -> CountMode:
+    return _count_mode.get() or CountMode(settings.search_count)
+
+
+def track_total_hits(mode: CountMode) -> Union[bool, int]:
+    """
+    Get the `track_total_hits` search parameter for a count mode: hits are counted exactly, up to
+    `SEARCH_COUNT_MAX` hits, or not at all.
+    """
+    if mode == CountMode.EXACT:
+        return True
+    if mode == CountMode.APPROXIMATE:
+        return settings.search_count_max
+    return False
+
+
+def _item_size_key(collection_ids: Optional[Iterable[str]]) -> Optional[int]:
+    # a hash, searches of all authorized collections list them all
+    return hash(frozenset(collection_ids)) if collection_ids else None
+
+
+def known_count(matched: int) -> Optional[int]:
+    """
+    Get the number of matched items to report for a search of which all `matched` items are known, as the count mode of
+    the request would have counted them.
+    """
+    mode = get_count_mode()
+    if mode == CountMode.NONE or (
+        mode == CountMode.APPROXIMATE and matched > settings.search_count_max
+    ):
+        return None
+    return matched
+
+
+def page_size(limit: int, collection_ids: Optional[Iterable[str]] = None) -> int:
+    """
+    Get the number of items to fetch for a page of at most `limit` items, estimating from the serialized size of the
+    items of earlier pages of the same collections how many fit in `SEARCH_PAGE_MAX_BYTES`.
+    """
+    max_bytes = settings.search_page_max_bytes
+    item_size = _item_sizes.get(_item_size_key(collection_ids))
+    if not max_bytes or item_size is None:
+        return limit
+    return max(1, min(limit, int(max_bytes / item_size)))
+
+
+def truncate_page(
+    hits: List[Dict[str, Any]], collection_ids: Optional[Iterable[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Limit a page of search hits to `SEARCH_PAGE_MAX_BYTES`, based on the serialized size of the items. A page always
+    contains at least one item.
+    """
+    max_bytes = settings.search_page_max_bytes
+    if not max_bytes or not hits:
+        return hits
+    size = 0
+    for i, hit in enumerate(hits):
+        size += len(orjson.dumps(hit["_source"]))
+        if size > max_bytes and i > 0:
+            break
+    average = size / (i + 1)
+    key = _item_size_key(collection_ids)
+    item_size = _item_sizes.pop(key, None)
+    _item_sizes[key] = (
+        average
+        if item_size is None
+        else item_size + ITEM_SIZE_WEIGHT * (average - item_size)
+    )
+    if len(_item_sizes) > MAX_ITEM_SIZES:
+        _item_sizes.popitem(last=False)
+    return hits[:i] if size > max_bytes and i > 0 else hits
+
+
+def pit_enabled() -> bool:
+    return settings.search_pit_pagination
+
+
+def _sign(payload: bytes) -> str:
+    # the secret is required with point in time pagination, see `Settings`
+    return urlsafe_b64encode(
+        hmac.new(
+            settings.search_token_secret.encode(), payload, hashlib.sha256
+        ).digest()
+    ).decode()
+
+
+def search_fingerprint(search_body: Dict[str, Any]) -> str:
+    """
+    Fingerprint of a search, binding a pagination token to the query and sort it was created for.
+    """
+    return hashlib.sha256(
+        orjson.dumps(search_body, option=orjson.OPT_SORT_KEYS)
+    ).hexdigest()[:16]
+
+
+def is_pit_token(token: str) -> bool:
+    return "." in token
+
+
+def encode_pit_token(
+    pit_id: str, search_after: list, matched: Optional[int], fingerprint: str
+) -> str:
+    payload = orjson.dumps(
+        {"pit": pit_id, "after": search_after, "matched": matched, "fp": fingerprint}
+    )
+    return f"{urlsafe_b64encode(payload).decode()}.{_sign(payload)}"
+
+
+def decode_pit_token(token: str, fingerprint: str) -> Dict[str, Any]:
+    """
+    Decode a point in time pagination token, and check that it was created by this application for the same search.
+
+    :param token: pagination token
+    :param fingerprint: fingerprint of the search
+    :return: token payload, with the point in time id (`pit`), sort values of the last item (`after`) and number of
+        matched items (`matched`)
+    """
+    try:
+        encoded_payload, signature = token.split(".", 1)
+        payload = urlsafe_b64decode(encoded_payload)
+        valid = hmac.compare_digest(signature, _sign(payload))
+        decoded = orjson.loads(payload) if valid else None
+    except (ValueError, orjson.JSONDecodeError):
+        decoded = None
+    if decoded is None or decoded.get("fp") != fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination token"
+        )
+    return decoded
+
+
+class PointInTime:
+    """
+    Open and close point in time search contexts, for both OpenSearch and Elasticsearch, which have different APIs.
+    """
+
+    def __init__(self, client: Any):
+        self.client = client
+        self._opensearch: Optional[bool] = None
+
+    async def is_opensearch(self) -> bool:
+        if self._opensearch is None:
+            info = await self.client.info()
+            self._opensearch = info["version"].get("distribution") == "opensearch"
+        return self._opensearch
+
+    async def open(self, index: str) -> str:
+        keep_alive = settings.search_pit_keep_alive
+        if await self.is_opensearch():
+            response = await self.client.create_pit(
+                index=index, params={"keep_alive": keep_alive}
+            )
+            return response["pit_id"]
+        response = await self.client.transport.perform_request(
+            "POST", f"/{index}/_pit", params={"keep_alive": keep_alive}
+        )
+        return response["id"]
+
+    async def close(self, pit_id: str):
+        try:
+            if await self.is_opensearch():
+                await self.client.delete_pit(body={"pit_id": [pit_id]})
+            else:
+                await self.client.transport.perform_request(
+                    "DELETE", "/_pit", body={"id": pit_id}
+                )
+        except Exception as e:
+            # expires anyway after the keep alive
+            logger.warning(f"Failed to close point in time: {e}")
@@ -0,0 +1,138 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from stac_fastapi.types.rfc3339 import rfc3339_str_to_datetime, str_to_interval
+from stac_fastapi.types.search import BaseSearchPostRequest
+
+logger = logging.getLogger(__name__)
+
+Interval = Tuple[Optional[datetime], Optional[datetime]]
+
+
+def _longitude_ranges(min_x: float, max_x: float) -> List[Tuple[float, float]]:
+    if min_x > max_x:
+        # crosses the antimeridian
+        return [(min_x, 180.0), (-180.0, max_x)]
+    return [(min_x, max_x)]
+
+
+def bbox_intersects(a: List[float], b: List[float]) -> bool:
+    """
+    Check if two (2D or 3D) bounding boxes intersect, taking bounding boxes crossing the antimeridian into account.
+    """
+    if len(a) == 6:
+        a = [a[0], a[1], a[3], a[4]]
+    if len(b) == 6:
+        b = [b[0], b[1], b[3], b[4]]
+    if a[1] > b[3] or b[1] > a[3]:
+        return False
+    return any(
+        a_min <= b_max and b_min <= a_max
+        for a_min, a_max in _longitude_ranges(a[0], a[2])
+        for b_min, b_max in _longitude_ranges(b[0], b[2])
+    )
+
+
+def _positions(coordinates: Any) -> Iterable[List[float]]:
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        yield coordinates
+    else:
+        for c in coordinates:
+            yield from _positions(c)
+
+
+def geometry_bbox(geometry: Dict[str, Any]) -> Optional[List[float]]:
+    """
+    Get the bounding box of a GeoJSON geometry.
+    """
+    if geometry.get("type") == "GeometryCollection":
+        positions = [
+            p
+            for g in geometry.get("geometries", [])
+            for p in _positions(g.get("coordinates", []))
+        ]
+    else:
+        positions = list(_positions(geometry.get("coordinates", [])))
+    if not positions:
+        return None
+    xs = [p[0] for p in positions]
+    ys = [p[1] for p in positions]
+    return [min(xs), min(ys), max(xs), max(ys)]
+
+
+def interval_intersects(interval: List[Optional[str]], query: Interval) -> bool:
+    start = rfc3339_str_to_datetime(interval[0]) if interval[0] else None
+    end = rfc3339_str_to_datetime(interval[1]) if interval[1] else None
+    query_start, query_end = query
+    if query_end is not None and start is not None and start > query_end:
+        return False
+    if query_start is not None and end is not None and end < query_start:
+        return False
+    return True
+
+
+def extent_intersects(
+    extent: Optional[Dict[str, Any]],
+    bbox: Optional[List[float]],
+    interval: Optional[Interval],
+) -> bool:
+    """
+    Check if the extent of a collection intersects the spatial and temporal extent of a search.
+    Missing or invalid collection extents are considered to intersect any search.
+    """
+    if not extent:
+        return True
+    try:
+        if bbox is not None:
+            bboxes = extent.get("spatial", {}).get("bbox") or []
+            if bboxes and not any(bbox_intersects(b, bbox) for b in bboxes):
+                return False
+        if interval is not None:
+            intervals = extent.get("temporal", {}).get("interval") or []
+            if intervals and not any(
+                interval_intersects(i, interval) for i in intervals
+            ):
+                return False
+    except (ValueError, TypeError, IndexError, AttributeError) as e:
+        logger.debug(f"Ignoring invalid collection extent {extent}: {e}")
+    return True
+
+
+def search_extent(
+    search_request: BaseSearchPostRequest,
+) -> Tuple[Optional[List[float]], Optional[Interval]]:
+    """
+    Get the spatial (bounding box) and temporal (interval) extent of a search request.
+    """
+    bbox = list(search_request.bbox) if search_request.bbox else None
+    intersects = getattr(search_request, "intersects", None)
+    if bbox is None and intersects is not None:
+        bbox = geometry_bbox(intersects.model_dump())
+    interval = None
+    parsed = str_to_interval(search_request.datetime)
+    if isinstance(parsed, tuple):
+        interval = parsed
+    elif parsed is not None:
+        interval = (parsed, parsed)
+    return bbox, interval
+
+
+def prune_collections(
+    collections: Iterable[Dict[str, Any]], search_request: BaseSearchPostRequest
+) -> List[str]:
+    """
+    Get the ids of the collections of which the extent intersects the search request.
+
+    :param collections: collections, with their `id` and `extent`
+    :param search_request: search request
+    :return: ids of the collections that may contain matching items
+    """
+    bbox, interval = search_extent(search_request)
+    if bbox is None and interval is None:
+        return [c["id"] for c in collections]
+    return [
+        c["id"]
+        for c in collections
+        if extent_intersects(c.get("extent"), bbox, interval)
+    ]
@@ -0,0 +1,95 @@
+from urllib.parse import parse_qsl, urlencode
+
+from starlette import status
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from terra_stac_api.config import Settings
+
+try:
+    import pyinstrument
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:
+    pyinstrument = None
+
+settings = Settings()
+
+PROFILE_PARAMETER = "profile"
+_media_types = {
+    "html": "text/html",
+    "speedscope": "application/json",
+    "text": "text/plain",
+}
+
+
+def enabled() -> bool:
+    return settings.profiling_enabled
+
+
+def _render(profiler: "pyinstrument.Profiler", output: str) -> str:
+    if output == "html":
+        return profiler.output_html()
+    if output == "speedscope":
+        return profiler.output(renderer=SpeedscopeRenderer())
+    return profiler.output_text(unicode=True)
+
+
+class ProfilingMiddleware:
+    """
+    Middleware profiling requests of admins with the `profile` query parameter, with a sampling profiler. The response
+    is replaced by the profile: an interactive call tree (`html`), a flame graph for https://www.speedscope.app
+    (`speedscope`) or a call tree as text (`text`). The parameter is ignored for other users. Placed within the
+    authentication middleware.
+    """
+
+    def __init__(self, app: ASGIApp):
+        if pyinstrument is None:
+            raise RuntimeError(
+                "pyinstrument must be installed for PROFILING_ENABLED, install the profiling extra"
+            )
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not enabled():
+            await self.app(scope, receive, send)
+            return
+        query = parse_qsl(
+            scope["query_string"].decode("latin-1"), keep_blank_values=True
+        )
+        output = next((v for k, v in query if k == PROFILE_PARAMETER), None)
+        auth = scope.get("auth")
+        if output is None or auth is None or settings.role_admin not in auth.scopes:
+            await self.app(scope, receive, send)
+            return
+        if output not in _media_types:
+            response = JSONResponse(
+                {
+                    "detail": f"Invalid profile output {output}, "
+                    f"expected one of {', '.join(_media_types)}"
+                },
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+            await response(scope, receive, send)
+            return
+
+        # hide the parameter from the application, e.g. in pagination links
+        scope = {
+            **scope,
+            "query_string": urlencode(
+                [(k, v) for k, v in query if k != PROFILE_PARAMETER]
+            ).encode("latin-1"),
+        }
+
+        async def discard(message: Message):
+            pass
+
+        profiler = pyinstrument.Profiler(
+            interval=settings.profiling_interval, async_mode="enabled"
+        )
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.stop()
+        response = Response(_render(profiler, output), media_type=_media_types[output])
+        await response(scope, receive, send)
@@ -1,10 +1,57 @@
-from typing import List, Optional
+import hashlib
+from typing import Any, List, Optional
 
+import orjson
 from overrides import overrides
-from stac_fastapi.core.serializers import CollectionSerializer
+from stac_fastapi.core.serializers import CollectionSerializer, ItemSerializer
 from stac_fastapi.types import stac as stac_types
 from starlette.requests import Request
 
+from terra_stac_api import columnar, metrics, timing
+from terra_stac_api.config import Settings
+
+settings = Settings()
+
+CONTENT_HASH = "_content_hash"
+_write_timestamps = {"created", "updated"}
+
+
+def round_coordinates(coordinates: Any, precision: int) -> Any:
+    if isinstance(coordinates, (int, float)):
+        return round(coordinates, precision)
+    return [round_coordinates(c, precision) for c in coordinates]
+
+
+def round_geometry(geometry: dict, precision: int) -> dict:
+    if "geometries" in geometry:
+        return {
+            **geometry,
+            "geometries": [
+                round_geometry(g, precision) for g in geometry["geometries"]
+            ],
+        }
+    if "coordinates" in geometry:
+        return {
+            **geometry,
+            "coordinates": round_coordinates(geometry["coordinates"], precision),
+        }
+    return geometry
+
+
+def content_hash(item: dict) -> str:
+    """
+    Canonical hash of the content of an item, ignoring the `created` and `updated` timestamps that are set on writes.
+    """
+    content = {k: v for k, v in item.items() if k not in {CONTENT_HASH, "properties"}}
+    content["properties"] = {
+        k: v
+        for k, v in item.get("properties", {}).items()
+        if k not in _write_timestamps
+    }
+    return hashlib.sha256(
+        orjson.dumps(content, option=orjson.OPT_SORT_KEYS)
+    ).hexdigest()
+
 
 class CustomCollectionSerializer(CollectionSerializer):
     """
@@ -16,8 +63,44 @@ class CustomCollectionSerializer(CollectionSerializer):
     def db_to_stac(
         cls, collection: dict, request: Request, extensions: Optional[List[str]] = []
     ) -> stac_types.Collection:
-        c = super().db_to_stac(collection, request=request, extensions=extensions)
-        hidden_keys = {k for k in c.keys() if k.startswith("_")}
-        for key in hidden_keys:
-            c.pop(key)
+        with (
+            metrics.timed(metrics.SERIALIZATION_DURATION, "collection"),
+            timing.phase("serialize"),
+        ):
+            c = super().db_to_stac(collection, request=request, extensions=extensions)
+            hidden_keys = {k for k in c.keys() if k.startswith("_")}
+            for key in hidden_keys:
+                c.pop(key)
         return c
+
+
+class CustomItemSerializer(ItemSerializer):
+    """
+    Custom serializer for Item objects, storing the content hash of items, and rounding the coordinates of the
+    geometries to `COORDINATE_PRECISION` decimals.
+    """
+
+    @classmethod
+    @overrides
+    def stac_to_db(cls, stac_data: stac_types.Item, base_url: str) -> stac_types.Item:
+        item_hash = content_hash(stac_data)
+        i = super().stac_to_db(stac_data, base_url=base_url)
+        i[CONTENT_HASH] = item_hash
+        return i
+
+    @classmethod
+    @overrides
+    def db_to_stac(cls, item: dict, base_url: str) -> stac_types.Item:
+        with (
+            metrics.timed(metrics.SERIALIZATION_DURATION, "item"),
+            timing.phase("serialize"),
+        ):
+            i = (
+                item
+                if columnar.using_stored_items()
+                else super().db_to_stac(item, base_url=base_url)
+            )
+            precision = settings.coordinate_precision
+            if precision is not None and i.get("geometry"):
+                i["geometry"] = round_geometry(i["geometry"], precision)
+        return i
@@ -0,0 +1,91 @@
+import logging
+import random
+from contextvars import ContextVar
+from typing import Any, List, Optional
+from urllib.parse import unquote
+
+import orjson
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from terra_stac_api.config import Settings
+
+settings = Settings()
+logger = logging.getLogger(__name__)
+
+# maximum length of a logged request body
+MAX_BODY_LENGTH = 10000
+# roles of the user of the current request
+_roles: ContextVar[Optional[List[str]]] = ContextVar("slowlog_roles", default=None)
+
+
+def enabled() -> bool:
+    return settings.slow_query_threshold is not None
+
+
+def _format_body(body: Any) -> Optional[str]:
+    if body is None:
+        return None
+    if isinstance(body, (bytes, bytearray)):
+        body = body.decode("utf-8", errors="replace")
+    elif not isinstance(body, str):
+        body = orjson.dumps(body, default=str).decode()
+    if len(body) > MAX_BODY_LENGTH:
+        return body[:MAX_BODY_LENGTH] + f"... ({len(body)} characters)"
+    return body
+
+
+def log_slow_query(method: str, url: str, body: Any, response: Any, duration: float):
+    """
+    Log an OpenSearch request slower than `SLOW_QUERY_THRESHOLD` seconds, sampled with `SLOW_QUERY_SAMPLE_RATE`:
+    the indices, the request body, the `took` time reported by OpenSearch, the wall time and the roles of the user.
+    """
+    if duration < settings.slow_query_threshold or (
+        random.random() >= settings.slow_query_sample_rate
+    ):
+        return
+    path, _, query = url.partition("?")
+    index = unquote(path.split("/")[1])
+    took = response.get("took") if isinstance(response, dict) else None
+    roles = _roles.get()
+    body = _format_body(body)
+    logger.warning(
+        "Slow OpenSearch request %s %s took %s ms (%.0f ms wall time) for roles %s: %s",
+        method,
+        unquote(path),
+        took,
+        duration * 1000,
+        roles,
+        body,
+        extra={
+            "slow_query": {
+                "method": method,
+                "index": index if not index.startswith("_") else None,
+                "path": unquote(path),
+                "params": query or None,
+                "body": body,
+                "took_ms": took,
+                "wall_ms": duration * 1000,
+                "roles": roles,
+            }
+        },
+    )
+
+
+class SlowLogRolesMiddleware:
+    """
+    Middleware keeping the roles of the authenticated user for the slow query log, placed within the authentication
+    middleware.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or "auth" not in scope:
+            await self.app(scope, receive, send)
+            return
+        token = _roles.set(sorted(scope["auth"].scopes))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _roles.reset(token)
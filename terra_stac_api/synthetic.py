@@ -0,0 +1,359 @@
+"""
+Generator of synthetic STAC datasets shaped like the Terrascope catalogue, for benchmarks and tests: collections with
+varied `_auth` read and write roles, large `summaries` and `renders`, and items with complex footprints spread over
+many years. The datasets are deterministic for a seed: a collection and its items only depend on the seed and the
+index of the collection, so they can be generated lazily at any scale.
+
+    python -m terra_stac_api.synthetic --seed 1 --collections 1000 --items 100 file data/
+    python -m terra_stac_api.synthetic --seed 1 --collections 1000 --items 100 api http://localhost:8080 --token ...
+    python -m terra_stac_api.synthetic --seed 1 --collections 1000 --items 100 index
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import orjson
+
+ROLE_ANONYMOUS = "anonymous"
+STAC_VERSION = "1.0.0"
+BATCH_SIZE = 500
+
+_platforms = ["sentinel-1a", "sentinel-2a", "sentinel-2b", "proba-v", "landsat-8"]
+_instruments = ["msi", "sar", "vegetation", "oli"]
+_colormaps = ["viridis", "greens", "rdylgn", "gray", "magma"]
+_common_names = ["coastal", "blue", "green", "red", "rededge", "nir", "swir16"]
+
+
+def _datetime(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _bands(rng: random.Random) -> List[Dict[str, Any]]:
+    bands = []
+    for i in range(rng.randint(8, 40)):
+        wavelength = round(rng.uniform(0.4, 2.4), 3)
+        bands.append(
+            {
+                "name": f"B{i + 1:02d}",
+                "common_name": rng.choice(_common_names),
+                "description": f"Band {i + 1} at {wavelength} µm",
+                "center_wavelength": wavelength,
+                "full_width_half_max": round(rng.uniform(0.01, 0.2), 3),
+            }
+        )
+    return bands
+
+
+def _renders(rng: random.Random, bands: List[Dict[str, Any]]) -> Dict[str, Any]:
+    renders = {}
+    for i in range(rng.randint(3, 10)):
+        assets = [b["name"] for b in rng.sample(bands, rng.choice((1, 3)))]
+        render = {
+            "title": f"Render {i + 1}",
+            "assets": assets,
+            "rescale": [[0, rng.choice((1, 255, 10000))]] * len(assets),
+            "resampling": rng.choice(("nearest", "bilinear")),
+        }
+        if len(assets) == 1:
+            render["colormap_name"] = rng.choice(_colormaps)
+        renders[f"render-{i + 1}"] = render
+    return renders
+
+
+def auth(rng: random.Random, roles: int) -> Dict[str, List[str]]:
+    """
+    Varied `_auth` of a collection: public, readable by a few roles, or only by admins, and writable by a few roles.
+    """
+    pool = [f"role-{i}" for i in range(roles)]
+    kind = rng.random()
+    if kind < 0.3:
+        read = [ROLE_ANONYMOUS]
+    elif kind < 0.35:
+        read = []
+    else:
+        read = rng.sample(pool, min(len(pool), rng.randint(1, 4)))
+    return {"read": read, "write": rng.sample(pool, min(len(pool), rng.randint(0, 2)))}
+
+
+def collection(
+    seed: int, index: int, roles: int = 50, start_year: int = 2015, years: int = 10
+) -> Dict[str, Any]:
+    """
+    Generate the collection with an index of a dataset.
+    """
+    rng = random.Random(f"{seed}:collection:{index}")
+    bands = _bands(rng)
+    start = datetime(start_year + rng.randrange(years), 1, 1, tzinfo=timezone.utc)
+    end = datetime(start_year + years, 1, 1, tzinfo=timezone.utc)
+    platforms = rng.sample(_platforms, rng.randint(1, 3))
+    return {
+        "type": "Collection",
+        "stac_version": STAC_VERSION,
+        "stac_extensions": [
+            "https://stac-extensions.github.io/eo/v1.1.0/schema.json",
+            "https://stac-extensions.github.io/render/v1.0.0/schema.json",
+        ],
+        "id": f"synthetic-{index:05d}",
+        "title": f"Synthetic collection {index}",
+        "description": f"Synthetic collection {index} of {', '.join(platforms)} products",
+        "keywords": rng.sample(_common_names, 3),
+        "license": "proprietary",
+        "providers": [{"name": "VITO", "roles": ["producer", "host"]}],
+        "extent": {
+            "spatial": {"bbox": [[-180, -90, 180, 90]]},
+            "temporal": {"interval": [[_datetime(start), _datetime(end)]]},
+        },
+        "summaries": {
+            "platform": platforms,
+            "instruments": rng.sample(_instruments, rng.randint(1, 2)),
+            "gsd": sorted(rng.sample([10, 20, 60, 100, 300, 1000], 3)),
+            "proj:epsg": sorted(rng.sample(range(32601, 32661), rng.randint(10, 60))),
+            "eo:cloud_cover": {"minimum": 0, "maximum": 100},
+            "eo:bands": bands,
+        },
+        "renders": _renders(rng, bands),
+        "links": [],
+        "_auth": auth(rng, roles),
+    }
+
+
+def footprint(rng: random.Random) -> Dict[str, Any]:
+    """
+    Generate a complex footprint: an irregular polygon with many vertices, or a multipolygon of a few of them.
+    """
+    lon, lat = rng.uniform(-170, 170), rng.uniform(-70, 70)
+    polygons = []
+    for _ in range(1 if rng.random() < 0.8 else rng.randint(2, 3)):
+        size = rng.uniform(0.2, 2)
+        center = (lon + rng.uniform(-size, size), lat + rng.uniform(-size, size))
+        vertices = rng.randint(8, 64)
+        ring = []
+        for i in range(vertices):
+            angle = 2 * math.pi * i / vertices
+            radius = size * rng.uniform(0.6, 1)
+            ring.append(
+                [
+                    round(center[0] + radius * math.cos(angle), 6),
+                    round(center[1] + radius * math.sin(angle), 6),
+                ]
+            )
+        ring.append(ring[0])
+        polygons.append([ring])
+    if len(polygons) == 1:
+        return {"type": "Polygon", "coordinates": polygons[0]}
+    return {"type": "MultiPolygon", "coordinates": polygons}
+
+
+def _bbox(geometry: Dict[str, Any]) -> List[float]:
+    polygons = (
+        geometry["coordinates"]
+        if geometry["type"] == "MultiPolygon"
+        else [geometry["coordinates"]]
+    )
+    coordinates = [c for polygon in polygons for ring in polygon for c in ring]
+    lons, lats = [c[0] for c in coordinates], [c[1] for c in coordinates]
+    return [min(lons), min(lats), max(lons), max(lats)]
+
+
+def items(
+    seed: int, collection: Dict[str, Any], count: int
+) -> Iterator[Dict[str, Any]]:
+    """
+    Generate the items of a collection, spread over its temporal extent.
+    """
+    rng = random.Random(f"{seed}:items:{collection['id']}")
+    start, end = (
+        datetime.fromisoformat(d.replace("Z", "+00:00"))
+        for d in collection["extent"]["temporal"]["interval"][0]
+    )
+    summaries = collection["summaries"]
+    bands = summaries["eo:bands"]
+    for i in range(count):
+        geometry = footprint(rng)
+        moment = start + timedelta(
+            seconds=rng.uniform(0, (end - start).total_seconds())
+        )
+        item_id = f"{collection['id']}_{i:07d}"
+        properties = {
+            "platform": rng.choice(summaries["platform"]),
+            "instruments": summaries["instruments"],
+            "gsd": rng.choice(summaries["gsd"]),
+            "proj:epsg": rng.choice(summaries["proj:epsg"]),
+            "eo:cloud_cover": round(rng.uniform(0, 100), 2),
+        }
+        if rng.random() < 0.1:
+            # composites over a period
+            properties["datetime"] = None
+            properties["start_datetime"] = _datetime(moment)
+            properties["end_datetime"] = _datetime(moment + timedelta(days=10))
+        else:
+            properties["datetime"] = _datetime(moment)
+        yield {
+            "type": "Feature",
+            "stac_version": STAC_VERSION,
+            "stac_extensions": collection["stac_extensions"][:1],
+            "id": item_id,
+            "collection": collection["id"],
+            "geometry": geometry,
+            "bbox": _bbox(geometry),
+            "properties": properties,
+            "assets": {
+                band["name"]: {
+                    "href": f"https://example.com/{collection['id']}/{item_id}/{band['name']}.tif",
+                    "type": "image/tiff; application=geotiff; profile=cloud-optimized",
+                    "roles": ["data"],
+                    "eo:bands": [band],
+                }
+                for band in bands
+            },
+            "links": [],
+        }
+
+
+def dataset(
+    seed: int,
+    collections: int,
+    items_per_collection: int,
+    roles: int = 50,
+    start_year: int = 2015,
+    years: int = 10,
+) -> Iterator[Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]]:
+    """
+    Generate a dataset lazily.
+
+    :return: the collections, with a generator of their items
+    """
+    for index in range(collections):
+        c = collection(seed, index, roles, start_year, years)
+        yield c, items(seed, c, items_per_collection)
+
+
+def batches(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def write_files(data: Iterable[Tuple[dict, Iterator[dict]]], directory: Path):
+    """
+    Write a dataset as files: `collections/<id>.json`, and the items of a collection as `items/<id>.ndjson`.
+    """
+    (directory / "collections").mkdir(parents=True, exist_ok=True)
+    (directory / "items").mkdir(parents=True, exist_ok=True)
+    for c, c_items in data:
+        (directory / "collections" / f"{c['id']}.json").write_bytes(
+            orjson.dumps(c, option=orjson.OPT_INDENT_2)
+        )
+        with open(directory / "items" / f"{c['id']}.ndjson", "wb") as f:
+            for item in c_items:
+                f.write(orjson.dumps(item) + b"\n")
+
+
+def _post(url: str, body: Any, token: Optional[str]):
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    request = urllib.request.Request(
+        url, data=orjson.dumps(body), headers=headers, method="POST"
+    )
+    with urllib.request.urlopen(request):
+        pass
+
+
+def load_api(
+    data: Iterable[Tuple[dict, Iterator[dict]]],
+    url: str,
+    token: Optional[str] = None,
+    batch_size: int = BATCH_SIZE,
+):
+    """
+    Load a dataset through the API: create the collections, and upsert their items with the bulk API. Collections that
+    already exist are kept, so an interrupted load can be resumed.
+    """
+    url = url.rstrip("/")
+    for c, c_items in data:
+        try:
+            _post(f"{url}/collections", c, token)
+        except urllib.error.HTTPError as e:
+            if e.code != 409:
+                raise
+        for batch in batches(c_items, batch_size):
+            _post(
+                f"{url}/collections/{c['id']}/bulk_items",
+                {"items": {i["id"]: i for i in batch}, "method": "upsert"},
+                token,
+            )
+
+
+async def load_index(
+    data: Iterable[Tuple[dict, Iterator[dict]]], batch_size: int = BATCH_SIZE
+):
+    """
+    Load a dataset directly into the indices of the cluster configured by the `ES_*` environment variables, bypassing
+    the API and its validation. Existing items are overwritten.
+    """
+    from stac_fastapi.opensearch.database_logic import (
+        create_collection_index,
+        create_index_templates,
+    )
+    from stac_fastapi.types.errors import ConflictError
+
+    from terra_stac_api.db import DatabaseLogicAuth
+
+    await create_index_templates()
+    await create_collection_index()
+    database = DatabaseLogicAuth()
+    for c, c_items in data:
+        try:
+            await database.create_collection(c, refresh=False)
+        except ConflictError:
+            pass
+        for batch in batches(c_items, batch_size):
+            await database.bulk_async(
+                c["id"],
+                [database.item_serializer.stac_to_db(i, base_url="") for i in batch],
+                refresh=False,
+            )
+    await database.client.indices.refresh(index="_all")
+    await database.client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--collections", type=int, default=100)
+    parser.add_argument("--items", type=int, default=100, help="items per collection")
+    parser.add_argument("--roles", type=int, default=50, help="size of the role pool")
+    parser.add_argument("--start-year", type=int, default=2015)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    targets = parser.add_subparsers(dest="target", required=True)
+    file_target = targets.add_parser("file", help="write the dataset as files")
+    file_target.add_argument("directory", type=Path)
+    api_target = targets.add_parser("api", help="load the dataset through the API")
+    api_target.add_argument("url")
+    api_target.add_argument("--token", help="access token of an admin")
+    targets.add_parser("index", help="load the dataset directly into the indices")
+    args = parser.parse_args()
+
+    data = dataset(
+        args.seed, args.collections, args.items, args.roles, args.start_year, args.years
+    )
+    if args.target == "file":
+        write_files(data, args.directory)
+    elif args.target == "api":
+        load_api(data, args.url, args.token, args.batch_size)
+    else:
+        asyncio.run(load_index(data, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
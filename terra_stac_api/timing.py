@@ -0,0 +1,147 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from terra_stac_api.config import Settings
+
+settings = Settings()
+logger = logging.getLogger(__name__)
+
+SERVER_TIMING_HEADER = "Server-Timing"
+_response_start = "_response_start"
+# durations of the phases of the current request, in seconds
+_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "server_timing_phases", default=None
+)
+
+
+def enabled() -> bool:
+    return settings.server_timing
+
+
+@contextmanager
+def collect() -> Iterator[Dict[str, float]]:
+    """
+    Collect the durations of the phases of the current request, in seconds.
+    """
+    phases = _phases.get()
+    if phases is not None:
+        # already collected by an outer middleware
+        yield phases
+        return
+    phases = {}
+    token = _phases.set(phases)
+    try:
+        yield phases
+    finally:
+        _phases.reset(token)
+
+
+def response_started(phases: Dict[str, float]):
+    """
+    Add the `compress` phase when the compressed response starts, from the start marked by
+    :class:`ResponseStartMiddleware` within the compression middleware.
+    """
+    if _response_start in phases:
+        phases["compress"] = time.perf_counter() - phases.pop(_response_start)
+
+
+def durations(phases: Dict[str, float]) -> Dict[str, float]:
+    return {k: v for k, v in phases.items() if k != _response_start}
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Add the duration of a block to a phase of the current request, when timing the request.
+    """
+    phases = _phases.get()
+    if phases is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+
+class ResponseStartMiddleware:
+    """
+    Middleware marking the start of the response of the application, placed within the compression middleware to time
+    the compression.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        phases = _phases.get()
+        if phases is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_marked(message: Message):
+            if message["type"] == "http.response.start":
+                phases[_response_start] = time.perf_counter()
+            await send(message)
+
+        await self.app(scope, receive, send_marked)
+
+
+def format_server_timing(durations: Dict[str, float]) -> str:
+    """
+    Format durations in seconds as a `Server-Timing` header, in milliseconds.
+    """
+    return ", ".join(f"{name};dur={d * 1000:.1f}" for name, d in durations.items())
+
+
+class ServerTimingMiddleware:
+    """
+    Middleware timing the phases of requests, which are reported in the `Server-Timing` header and logged when the
+    response is complete. The durations of the phases are summed over concurrent operations. The `compress` phase is
+    the compression of the first chunk of the response, from the :class:`ResponseStartMiddleware` within the
+    compression middleware.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not enabled():
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        reported: Dict[str, float] = {}
+
+        with collect() as phases:
+
+            async def send_with_timing(message: Message):
+                if message["type"] == "http.response.start":
+                    response_started(phases)
+                    reported.update(durations(phases))
+                    reported["total"] = time.perf_counter() - start
+                    MutableHeaders(scope=message).append(
+                        SERVER_TIMING_HEADER, format_server_timing(reported)
+                    )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                # the logged total includes sending the complete response
+                timings = dict(reported or durations(phases))
+                timings["total"] = time.perf_counter() - start
+                logger.info(
+                    '"%s %s" %s',
+                    scope["method"],
+                    scope["path"],
+                    format_server_timing(timings),
+                    extra={"server_timing": {k: v * 1000 for k, v in timings.items()}},
+                )
@@ -0,0 +1,147 @@
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from terra_stac_api import timing
+from terra_stac_api.config import Settings
+
+try:
+    from opentelemetry import propagate
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:
+    propagate = None
+
+settings = Settings()
+
+OPAQUE_ID_HEADER = "X-Opaque-Id"
+_tracer = None
+
+
+def setup():
+    """
+    Set up tracing with the exporter of `TRACING_EXPORTER`: `otlp` (configured with the `OTEL_EXPORTER_OTLP_*`
+    environment variables), `console`, or `file` (a JSON span per line in `TRACING_FILE`).
+    """
+    global _tracer
+    if settings.tracing_exporter is None:
+        return
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import (
+            BatchSpanProcessor,
+            ConsoleSpanExporter,
+            SimpleSpanProcessor,
+        )
+    except ImportError:
+        raise RuntimeError(
+            "opentelemetry-sdk must be installed for TRACING_EXPORTER, install the tracing extra"
+        )
+
+    provider = TracerProvider(
+        resource=Resource.create(
+            {"service.name": os.environ.get("OTEL_SERVICE_NAME", settings.stac_id)}
+        )
+    )
+    if settings.tracing_exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    elif settings.tracing_exporter == "console":
+        provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter()))
+    else:
+        provider.add_span_processor(
+            SimpleSpanProcessor(
+                ConsoleSpanExporter(
+                    out=open(settings.tracing_file, "a"),
+                    formatter=lambda s: s.to_json(indent=None) + os.linesep,
+                )
+            )
+        )
+    _tracer = provider.get_tracer(__name__)
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+    """
+    Trace a block in a span, which is a child of the current span.
+
+    :return: the span, or None when tracing is disabled
+    """
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name, attributes=attributes) as s:
+        yield s
+
+
+def inject_headers(headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """
+    Add the W3C trace context of the current span to the headers of an outgoing request, and its trace id as
+    `X-Opaque-Id`, which OpenSearch includes in its slow logs.
+    """
+    headers = dict(headers or {})
+    propagate.inject(headers)
+    traceparent = headers.get("traceparent")
+    if traceparent:
+        headers.setdefault(OPAQUE_ID_HEADER, traceparent.split("-")[1])
+    return headers
+
+
+class TracingMiddleware:
+    """
+    Middleware tracing requests in a server span, continuing the W3C trace context of the request. The durations of
+    the phases of the request (see :mod:`terra_stac_api.timing`) are added as attributes.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        context = propagate.extract(
+            {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        )
+        method = scope["method"]
+        status_code = 500
+
+        with (
+            timing.collect() as phases,
+            _tracer.start_as_current_span(
+                method,
+                context=context,
+                kind=SpanKind.SERVER,
+                attributes={"http.request.method": method, "url.path": scope["path"]},
+            ) as s,
+        ):
+
+            async def send_with_status(message: Message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    timing.response_started(phases)
+                    status_code = message["status"]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route is not None:
+                    s.update_name(f"{method} {route}")
+                    s.set_attribute("http.route", route)
+                s.set_attribute("http.response.status_code", status_code)
+                if status_code >= 500:
+                    s.set_status(Status(StatusCode.ERROR))
+                for name, duration in timing.durations(phases).items():
+                    s.set_attribute(f"stac.{name}.duration_ms", duration * 1000)
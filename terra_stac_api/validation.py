@@ -0,0 +1,103 @@
+from typing import Any, Iterable, List, Tuple
+
+from fastapi import HTTPException
+from stac_fastapi.types.rfc3339 import rfc3339_str_to_datetime
+from starlette import status
+
+# number of errors reported in a response
+MAX_REPORTED_ERRORS = 10
+_geometry_types = {
+    "Point",
+    "LineString",
+    "Polygon",
+    "MultiPoint",
+    "MultiLineString",
+    "MultiPolygon",
+    "GeometryCollection",
+}
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_datetime(value: Any) -> bool:
+    if not isinstance(value, str):
+        return False
+    try:
+        rfc3339_str_to_datetime(value)
+    except ValueError:
+        return False
+    return True
+
+
+def item_errors(item: Any) -> List[str]:
+    """
+    Check only the structural fields of an item that are needed to index it: `id`, `collection`, the geometry type,
+    `bbox` and the datetime properties.
+
+    :return: errors, empty for a valid item
+    """
+    if not isinstance(item, dict):
+        return ["not an object"]
+    errors = []
+    if item.get("type") != "Feature":
+        errors.append("type must be Feature")
+    for field in ("id", "collection"):
+        if not isinstance(item.get(field), str) or not item[field]:
+            errors.append(f"{field} must be a non-empty string")
+    geometry = item.get("geometry")
+    if geometry is not None:
+        if (
+            not isinstance(geometry, dict)
+            or geometry.get("type") not in _geometry_types
+        ):
+            errors.append("geometry must be a GeoJSON geometry")
+        elif not isinstance(
+            geometry.get(
+                "geometries"
+                if geometry["type"] == "GeometryCollection"
+                else "coordinates"
+            ),
+            list,
+        ):
+            errors.append(f"geometry of type {geometry['type']} has no coordinates")
+    bbox = item.get("bbox")
+    if bbox is not None and not (
+        isinstance(bbox, list) and len(bbox) in (4, 6) and all(map(_is_number, bbox))
+    ):
+        errors.append("bbox must be an array of 4 or 6 numbers")
+    elif bbox is None and geometry is not None:
+        errors.append("bbox is required for items with a geometry")
+    properties = item.get("properties")
+    if not isinstance(properties, dict):
+        errors.append("properties must be an object")
+    elif properties.get("datetime") is not None:
+        if not _is_datetime(properties["datetime"]):
+            errors.append("datetime must be an RFC 3339 datetime")
+    elif not (
+        _is_datetime(properties.get("start_datetime"))
+        and _is_datetime(properties.get("end_datetime"))
+    ):
+        errors.append("start_datetime and end_datetime are required without datetime")
+    return errors
+
+
+def check_items(items: Iterable[Tuple[str, Any]]):
+    """
+    Check the structure of the items of a bulk request, without validating them completely.
+
+    :param items: items by key
+    :raises HTTPException: 400 listing the errors of the invalid items
+    """
+    errors = [f"{key}: {e}" for key, item in items for e in item_errors(item)]
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid items: {'; '.join(errors[:MAX_REPORTED_ERRORS])}"
+            + (
+                f" ({len(errors) - MAX_REPORTED_ERRORS} more errors)"
+                if len(errors) > MAX_REPORTED_ERRORS
+                else ""
+            ),
+        )
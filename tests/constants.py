@@ -9,5 +9,6 @@ ROLE_ANONYMOUS = "anonymous"
 ENDPOINT_COLLECTIONS = URL("/collections")
 ENDPOINT_SEARCH = URL("/search")
 ENDPOINT_AGGREGATE = URL("/aggregate")
+ENDPOINT_BULK_ITEMS = URL("/bulk_items")
 COLLECTION_PROTECTED = "protected"
 COLLECTION_S2_TOC_V2 = "terrascope_s2_toc_v2"
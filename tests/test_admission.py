@@ -0,0 +1,114 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+import terra_stac_api.admission
+from terra_stac_api.admission import (
+    ConcurrencyLimiter,
+    admit_aggregation,
+    area_fraction,
+    estimate_buckets,
+    time_span,
+)
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    settings = terra_stac_api.admission.settings
+    monkeypatch.setattr(settings, "aggregation_max_cost", 2000)
+    monkeypatch.setattr(settings, "aggregation_role_max_cost", {"analyst": 100000})
+    return settings
+
+
+def test_area_fraction():
+    assert area_fraction(None) == 1.0
+    assert area_fraction([0, 0, 36, 18]) == pytest.approx(0.01)
+    # crossing the antimeridian
+    assert area_fraction([170, 0, -170, 18]) == pytest.approx(20 * 18 / 64800)
+
+
+def test_time_span():
+    assert time_span("2020-01-01T00:00:00Z/2020-01-31T00:00:00Z") == timedelta(days=30)
+    assert time_span("2020-01-01T00:00:00Z") == timedelta(0)
+    assert time_span(None) == timedelta(days=50 * 365)
+
+
+def test_estimate_buckets():
+    span = timedelta(days=365)
+    assert estimate_buckets(["total_count"], {}, None, span) == 1
+    assert estimate_buckets(["datetime_frequency"], {}, None, span) == 12
+    assert (
+        estimate_buckets(
+            ["datetime_frequency"], {"datetime_frequency_interval": "day"}, None, span
+        )
+        == 365
+    )
+    parameters = {"centroid_geohash_grid_frequency_precision": 3}
+    assert (
+        estimate_buckets(["centroid_geohash_grid_frequency"], parameters, None, span)
+        == 32**3
+    )
+    assert (
+        estimate_buckets(
+            ["centroid_geohash_grid_frequency"], parameters, [0, 0, 36, 18], span
+        )
+        == 327
+    )
+
+
+def test_admit_aggregation(budget):
+    aggregations = ["centroid_geohash_grid_frequency"]
+    parameters = {"centroid_geohash_grid_frequency_precision": 2}
+    assert (
+        admit_aggregation(["user"], 1, aggregations, parameters, None, None, None)
+        == parameters
+    )
+    with pytest.raises(HTTPException) as e:
+        admit_aggregation(["user"], 2, aggregations, parameters, None, None, None)
+    assert e.value.status_code == 400
+    # larger budget of role
+    assert (
+        admit_aggregation(["analyst"], 2, aggregations, parameters, None, None, None)
+        == parameters
+    )
+
+
+def test_admit_aggregation_downgrade(budget, monkeypatch):
+    monkeypatch.setattr(budget, "aggregation_over_budget", "downgrade")
+    aggregations = ["centroid_geohash_grid_frequency", "datetime_frequency"]
+    parameters = {
+        "centroid_geohash_grid_frequency_precision": 4,
+        "datetime_frequency_interval": "day",
+    }
+    assert admit_aggregation(
+        ["user"], 1, aggregations, parameters, None, None, "2020-01-01T00:00:00Z/.."
+    ) == {
+        "centroid_geohash_grid_frequency_precision": 1,
+        "datetime_frequency_interval": "week",
+    }
+    with pytest.raises(HTTPException):
+        admit_aggregation(["user"], 100, aggregations, parameters, None, None, None)
+
+
+async def test_concurrency_limiter():
+    limiter = ConcurrencyLimiter(1)
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def run():
+        async with limiter:
+            started.set()
+            await release.wait()
+
+    task = asyncio.create_task(run())
+    await started.wait()
+    with pytest.raises(HTTPException) as e:
+        async with limiter:
+            pass
+    assert e.value.status_code == 429
+    release.set()
+    await task
+    async with limiter:
+        pass
@@ -1,12 +1,19 @@
 import json
+from copy import deepcopy
 
 from httpx import codes
 
+import terra_stac_api.admission
+import terra_stac_api.aggregation_client
+from terra_stac_api.aggregation_client import AGGREGATION_DOWNGRADED_HEADER
+from terra_stac_api.cache import ResponseCache
+
 from .constants import (
     COLLECTION_PROTECTED,
     COLLECTION_S2_TOC_V2,
     ENDPOINT_AGGREGATE,
     ENDPOINT_COLLECTIONS,
+    ROLE_ADMIN,
     ROLE_PROTECTED,
 )
 from .mock_auth import MockAuth
@@ -103,3 +110,120 @@ async def test_get_authorized_aggregate(client):
     assert aggs[1]["name"] == "collection_frequency"
     buckets_collections = {b["key"] for b in aggs[1]["buckets"]}
     assert buckets_collections == {COLLECTION_S2_TOC_V2, COLLECTION_PROTECTED}
+
+
+async def test_post_aggregate_authorized_collections(client):
+    response = await client.post(
+        str(ENDPOINT_AGGREGATE),
+        json={"aggregations": ["collection_frequency"]},
+    )
+    assert response.status_code == codes.OK
+    [agg] = response.json()["aggregations"]
+    assert {b["key"] for b in agg["buckets"]} == {COLLECTION_S2_TOC_V2}
+
+
+async def test_post_unauthorized_aggregate(client):
+    response = await client.post(
+        str(ENDPOINT_AGGREGATE),
+        json={
+            "collections": [COLLECTION_S2_TOC_V2, COLLECTION_PROTECTED],
+            "aggregations": ["total_count", "collection_frequency"],
+        },
+        auth=MockAuth("unsufficient"),
+    )
+    assert response.status_code == codes.FORBIDDEN
+
+
+async def test_post_collection_aggregate(client):
+    endpoint = str(ENDPOINT_COLLECTIONS / COLLECTION_PROTECTED / "aggregate")
+    body = {"aggregations": ["total_count"]}
+    response = await client.post(endpoint, json=body, auth=MockAuth("unsufficient"))
+    assert response.status_code == codes.FORBIDDEN
+    response = await client.post(endpoint, json=body, auth=MockAuth(ROLE_PROTECTED))
+    assert response.status_code == codes.OK
+
+
+async def test_post_authorized_aggregate(client):
+    response = await client.post(
+        str(ENDPOINT_AGGREGATE),
+        json={
+            "collections": [COLLECTION_S2_TOC_V2, COLLECTION_PROTECTED],
+            "aggregations": ["total_count", "collection_frequency"],
+        },
+        auth=MockAuth(ROLE_PROTECTED),
+    )
+    assert response.status_code == codes.OK
+    [agg] = [
+        a
+        for a in response.json()["aggregations"]
+        if a["name"] == "collection_frequency"
+    ]
+    assert {b["key"] for b in agg["buckets"]} == {
+        COLLECTION_S2_TOC_V2,
+        COLLECTION_PROTECTED,
+    }
+
+
+async def test_post_aggregate_cache_authorized(client, monkeypatch):
+    monkeypatch.setattr(
+        terra_stac_api.aggregation_client,
+        "aggregation_cache",
+        ResponseCache(ttl=60, max_size=10),
+    )
+    body = {"collections": [COLLECTION_PROTECTED], "aggregations": ["total_count"]}
+    response = await client.post(
+        str(ENDPOINT_AGGREGATE), json=body, auth=MockAuth(ROLE_PROTECTED)
+    )
+    assert response.status_code == codes.OK
+    # the cached result is not served to unauthorized users
+    response = await client.post(str(ENDPOINT_AGGREGATE), json=body)
+    assert response.status_code in (codes.UNAUTHORIZED, codes.FORBIDDEN)
+
+
+async def test_aggregate_cache(client, api, monkeypatch, extra_item):
+    monkeypatch.setattr(
+        terra_stac_api.aggregation_client,
+        "aggregation_cache",
+        ResponseCache(ttl=60, max_size=10),
+    )
+    endpoint = str(ENDPOINT_COLLECTIONS / COLLECTION_S2_TOC_V2 / "aggregate")
+    params = {"aggregations": "total_count"}
+    response = await client.get(endpoint, params=params)
+    assert response.json()["aggregations"][0]["value"] == 4
+
+    # writes bypassing the transaction clients are not visible until the entry expires
+    item = deepcopy(extra_item)
+    item["collection"] = COLLECTION_S2_TOC_V2
+    await api.client.database.create_item(item, refresh=True)
+    response = await client.get(endpoint, params=params)
+    assert response.json()["aggregations"][0]["value"] == 4
+
+    item["id"] = f"{item['id']}_2"
+    response = await client.post(
+        str(ENDPOINT_COLLECTIONS / COLLECTION_S2_TOC_V2 / "items"),
+        json=item,
+        auth=MockAuth(ROLE_ADMIN),
+    )
+    assert response.status_code == codes.CREATED
+    response = await client.get(endpoint, params=params)
+    assert response.json()["aggregations"][0]["value"] == 6
+
+
+async def test_aggregate_over_budget(client, monkeypatch):
+    monkeypatch.setattr(terra_stac_api.admission.settings, "aggregation_max_cost", 100)
+    params = {
+        "aggregations": "datetime_frequency",
+        "datetime_frequency_interval": "day",
+    }
+    response = await client.get(str(ENDPOINT_AGGREGATE), params=params)
+    assert response.status_code == codes.BAD_REQUEST
+
+    monkeypatch.setattr(
+        terra_stac_api.admission.settings, "aggregation_over_budget", "downgrade"
+    )
+    response = await client.get(str(ENDPOINT_AGGREGATE), params=params)
+    assert response.status_code == codes.OK
+    assert (
+        response.headers[AGGREGATION_DOWNGRADED_HEADER]
+        == "datetime_frequency_interval=year"
+    )
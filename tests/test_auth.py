@@ -29,6 +29,9 @@ crud_routes = {
     "/collections": ["POST"],
     "/collections/{collection_id}": ["PUT", "DELETE", "PATCH"],
     "/collections/{collection_id}/bulk_items": ["POST"],
+    "/collections/{collection_id}/bulk_delete": ["POST"],
+    "/jobs/{job_id}": ["GET"],
+    "/bulk_items": ["POST"],
 }
 
 
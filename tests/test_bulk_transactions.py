@@ -1,10 +1,16 @@
+import asyncio
+from copy import deepcopy
+
 import pytest
 from httpx import codes
 from pydantic import ValidationError
 
+from terra_stac_api.serializer import content_hash
+
 from .constants import (
     COLLECTION_PROTECTED,
     COLLECTION_S2_TOC_V2,
+    ENDPOINT_BULK_ITEMS,
     ENDPOINT_COLLECTIONS,
     ROLE_PROTECTED,
     ROLE_SENTINEL2,
@@ -65,3 +71,179 @@ async def test_bulk_create_unmatching_collection(client, extra_item):
         auth=MockAuth(ROLE_PROTECTED),
     )
     assert response.status_code == codes.BAD_REQUEST
+
+
+async def test_bulk_delete_unauthorized(client):
+    endpoint = str(ENDPOINT_COLLECTIONS / COLLECTION_S2_TOC_V2 / "bulk_delete")
+    response = await client.post(endpoint, json={"datetime": "../2100-01-01T00:00:00Z"})
+    assert response.status_code == codes.UNAUTHORIZED
+    response = await client.post(
+        endpoint,
+        json={"datetime": "../2100-01-01T00:00:00Z"},
+        auth=MockAuth(ROLE_PROTECTED),
+    )
+    assert response.status_code == codes.FORBIDDEN
+
+
+async def test_bulk_delete(client, items):
+    endpoint = str(ENDPOINT_COLLECTIONS / COLLECTION_S2_TOC_V2 / "bulk_delete")
+    # a selection is required
+    response = await client.post(endpoint, json={}, auth=MockAuth(ROLE_SENTINEL2))
+    assert response.status_code == codes.BAD_REQUEST
+
+    [deleted, *kept] = items[COLLECTION_S2_TOC_V2]
+    response = await client.post(
+        endpoint, json={"ids": [deleted["id"]]}, auth=MockAuth(ROLE_SENTINEL2)
+    )
+    assert response.status_code == codes.OK
+    assert response.json()["deleted"] == 1
+    response = await client.get(
+        str(ENDPOINT_COLLECTIONS / COLLECTION_S2_TOC_V2 / "items" / deleted["id"])
+    )
+    assert response.status_code == codes.NOT_FOUND
+
+    response = await client.post(
+        endpoint,
+        json={"datetime": "../2100-01-01T00:00:00Z"},
+        auth=MockAuth(ROLE_SENTINEL2),
+    )
+    assert response.status_code == codes.OK
+    assert response.json()["deleted"] == len(kept)
+    response = await client.get(
+        str(ENDPOINT_COLLECTIONS / COLLECTION_S2_TOC_V2 / "items")
+    )
+    assert response.json()["features"] == []
+
+
+async def wait_for_job(client, location, auth):
+    for _ in range(50):
+        response = await client.get(location, auth=auth)
+        assert response.status_code == codes.OK
+        job = response.json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        await asyncio.sleep(0.1)
+    raise TimeoutError(f"Job {location} didn't finish")
+
+
+async def test_bulk_create_job(client, extra_item):
+    response = await client.post(
+        str(ENDPOINT_COLLECTIONS / COLLECTION_S2_TOC_V2 / "bulk_items"),
+        json={"items": {extra_item["id"]: extra_item}},
+        headers={"Prefer": "respond-async"},
+        auth=MockAuth(ROLE_SENTINEL2),
+    )
+    assert response.status_code == codes.ACCEPTED
+    location = response.headers["Location"]
+
+    # only visible to the user who submitted the job
+    response = await client.get(location)
+    assert response.status_code == codes.UNAUTHORIZED
+
+    job = await wait_for_job(client, location, MockAuth(ROLE_SENTINEL2))
+    assert job["status"] == "succeeded"
+    assert job["progress"] == {"total": 1, "processed": 1}
+    response = await client.get(
+        str(ENDPOINT_COLLECTIONS / COLLECTION_S2_TOC_V2 / "items" / extra_item["id"])
+    )
+    assert response.status_code == codes.OK
+
+
+async def test_bulk_delete_job(client, items):
+    response = await client.post(
+        str(ENDPOINT_COLLECTIONS / COLLECTION_S2_TOC_V2 / "bulk_delete"),
+        json={"datetime": "../2100-01-01T00:00:00Z"},
+        headers={"Prefer": "respond-async"},
+        auth=MockAuth(ROLE_SENTINEL2),
+    )
+    assert response.status_code == codes.ACCEPTED
+    job = await wait_for_job(
+        client, response.headers["Location"], MockAuth(ROLE_SENTINEL2)
+    )
+    assert job["status"] == "succeeded"
+    assert job["result"]["deleted"] == len(items[COLLECTION_S2_TOC_V2])
+
+
+def test_content_hash(extra_item):
+    item = deepcopy(extra_item)
+    item["properties"]["updated"] = "2100-01-01T00:00:00Z"
+    reordered = dict(reversed(list(item.items())))
+    assert content_hash(reordered) == content_hash(extra_item)
+    item["properties"]["platform"] = "changed"
+    assert content_hash(item) != content_hash(extra_item)
+
+
+async def test_bulk_upsert_skip_unchanged(client, extra_item, monkeypatch):
+    monkeypatch.setattr("terra_stac_api.core.settings.skip_unchanged_items", True)
+    changed_item = deepcopy(extra_item)
+    changed_item["id"] += "2"
+
+    def upsert(*items):
+        return client.post(
+            str(ENDPOINT_COLLECTIONS / COLLECTION_S2_TOC_V2 / "bulk_items"),
+            json={"items": {i["id"]: i for i in items}, "method": "upsert"},
+            auth=MockAuth(ROLE_SENTINEL2),
+        )
+
+    response = await upsert(extra_item, changed_item)
+    assert response.status_code == codes.OK
+    assert "Created 2, updated 0 and skipped 0 unchanged Items." in response.text
+
+    changed_item["properties"]["platform"] = "changed"
+    response = await upsert(extra_item, changed_item)
+    assert response.status_code == codes.OK
+    assert "Created 0, updated 1 and skipped 1 unchanged Items." in response.text
+
+
+async def test_bulk_create_multiple_collections(client, extra_item):
+    protected_item = deepcopy(extra_item)
+    protected_item["id"] += "_protected"
+    protected_item["collection"] = COLLECTION_PROTECTED
+    payload = {"items": {i["id"]: i for i in (extra_item, protected_item)}}
+
+    response = await client.post(str(ENDPOINT_BULK_ITEMS), json=payload)
+    assert response.status_code == codes.UNAUTHORIZED
+    # authorized for only one of the collections
+    response = await client.post(
+        str(ENDPOINT_BULK_ITEMS), json=payload, auth=MockAuth(ROLE_SENTINEL2)
+    )
+    assert response.status_code == codes.FORBIDDEN
+
+    response = await client.post(
+        str(ENDPOINT_BULK_ITEMS),
+        json=payload,
+        auth=MockAuth(ROLE_SENTINEL2, ROLE_PROTECTED),
+    )
+    assert response.status_code == codes.OK
+    results = response.json()["collections"]
+    assert set(results) == {COLLECTION_S2_TOC_V2, COLLECTION_PROTECTED}
+    assert all(r["status"] == "succeeded" for r in results.values())
+    for item in (extra_item, protected_item):
+        response = await client.get(
+            str(ENDPOINT_COLLECTIONS / item["collection"] / "items" / item["id"]),
+            auth=MockAuth(ROLE_PROTECTED),
+        )
+        assert response.status_code == codes.OK
+
+
+async def test_bulk_create_fast_validation(client, extra_item, monkeypatch):
+    monkeypatch.setattr("terra_stac_api.core.settings.bulk_validation", "fast")
+    invalid_item = {"type": "Feature", "collection": COLLECTION_S2_TOC_V2}
+    response = await client.post(
+        str(ENDPOINT_COLLECTIONS / COLLECTION_S2_TOC_V2 / "bulk_items"),
+        json={"items": {extra_item["id"]: extra_item, "invalid": invalid_item}},
+        auth=MockAuth(ROLE_SENTINEL2),
+    )
+    assert response.status_code == codes.BAD_REQUEST
+    assert "invalid: id must be a non-empty string" in response.json()["detail"]
+
+    response = await client.post(
+        str(ENDPOINT_COLLECTIONS / COLLECTION_S2_TOC_V2 / "bulk_items"),
+        json={"items": {extra_item["id"]: extra_item}},
+        auth=MockAuth(ROLE_SENTINEL2),
+    )
+    assert response.status_code == codes.OK
+    response = await client.get(
+        str(ENDPOINT_COLLECTIONS / COLLECTION_S2_TOC_V2 / "items" / extra_item["id"])
+    )
+    assert response.status_code == codes.OK
@@ -0,0 +1,47 @@
+import time
+
+import terra_stac_api.cache
+from terra_stac_api.cache import Generations, ResponseCache
+
+
+def test_response_cache():
+    cache = ResponseCache(ttl=60, max_size=2)
+    cache.put("a", 1, ["c1"])
+    cache.put("b", 2, ["c1", "c2"])
+    assert cache.get("a") == 1
+    cache.put("c", 3, ["c3"])
+    # least recently used entry is evicted
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    cache.invalidate("c1")
+    assert cache.get("a") is None
+    assert cache.get("c") == 3
+
+
+def test_response_cache_ttl(monkeypatch):
+    cache = ResponseCache(ttl=0.01, max_size=10)
+    cache.put("a", 1, [])
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+    events = []
+    monkeypatch.setattr(
+        terra_stac_api.cache.metrics,
+        "cache_event",
+        lambda name, event: events.append(event),
+    )
+    disabled = ResponseCache(ttl=0, max_size=10)
+    disabled.put("a", 1, [])
+    assert disabled.get("a") is None
+    # a disabled cache doesn't count misses
+    assert events == []
+
+
+def test_generations():
+    generations = Generations()
+    before = generations.snapshot(["c2", "c1", "c1"])
+    assert before == [("c1", 0), ("c2", 0)]
+    generations.bump("c1")
+    assert generations.snapshot(["c1", "c2"]) == [("c1", 1), ("c2", 0)]
+    assert generations.snapshot(["c2"]) == [("c2", 0)]
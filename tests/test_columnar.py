@@ -0,0 +1,114 @@
+import struct
+
+import pytest
+from starlette.requests import Request
+
+from terra_stac_api.columnar import (
+    ARROW_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+    geometry_to_wkb,
+    negotiate,
+    stored_items,
+)
+from terra_stac_api.serializer import CustomItemSerializer
+
+pa = pytest.importorskip("pyarrow")
+
+from terra_stac_api.columnar import to_table  # noqa: E402
+
+
+def test_stored_items():
+    item = {"id": "a", "collection": "c", "properties": {}, "links": []}
+    with stored_items():
+        assert CustomItemSerializer.db_to_stac(item, "http://test/") is item
+    # API links are added outside
+    assert CustomItemSerializer.db_to_stac(item, "http://test/")["links"]
+
+
+def accept(header):
+    return Request({"type": "http", "headers": [(b"accept", header.encode())]})
+
+
+def test_negotiate():
+    assert negotiate(accept("")) is None
+    assert negotiate(accept(f"{ARROW_MEDIA_TYPE}, application/json")) == (
+        ARROW_MEDIA_TYPE
+    )
+    assert negotiate(accept(f"application/json, {ARROW_MEDIA_TYPE}")) is None
+    assert (
+        negotiate(accept(f"application/json;q=0.5, {PARQUET_MEDIA_TYPE};q=0.8"))
+        == PARQUET_MEDIA_TYPE
+    )
+    assert negotiate(accept(f"{ARROW_MEDIA_TYPE};q=0.5, */*;q=0.9")) is None
+    assert negotiate(accept(f"application/json;q=0, {ARROW_MEDIA_TYPE}; q=0.1")) == (
+        ARROW_MEDIA_TYPE
+    )
+
+
+ITEM_COLLECTION = {
+    "type": "FeatureCollection",
+    "features": [
+        {
+            "id": "a",
+            "collection": "c",
+            "geometry": {"type": "Point", "coordinates": [4.5, 51.2]},
+            "bbox": [4.5, 51.2, 4.5, 51.2],
+            "properties": {
+                "datetime": "2023-01-01T10:00:00Z",
+                "eo:cloud_cover": 10,
+                "platform": "sentinel-2a",
+            },
+            "assets": {"B01": {"href": "https://example.com/B01.tif"}},
+            "links": [],
+        },
+        {
+            "id": "b",
+            "collection": "c",
+            "geometry": None,
+            "properties": {"datetime": None, "eo:cloud_cover": 12.5, "mixed": 1},
+            "assets": {},
+            "links": [],
+        },
+        {
+            "id": "c",
+            "collection": "c",
+            "geometry": None,
+            "properties": {"datetime": None, "mixed": "one"},
+            "assets": {},
+            "links": [],
+        },
+    ],
+    "links": [{"rel": "self", "href": "https://example.com/search"}],
+    "numberReturned": 3,
+}
+
+
+def test_geometry_to_wkb():
+    assert geometry_to_wkb({"type": "Point", "coordinates": [1, 2]}) == struct.pack(
+        "<BIdd", 1, 1, 1, 2
+    )
+    assert geometry_to_wkb(
+        {"type": "LineString", "coordinates": [[1, 2, 3], [4, 5, 6]]}
+    ) == struct.pack("<BII6d", 1, 1002, 2, 1, 2, 3, 4, 5, 6)
+    ring = [[0, 0], [1, 0], [1, 1], [0, 0]]
+    polygon = struct.pack("<BII", 1, 3, 1) + struct.pack(
+        "<I8d", 4, *[c for p in ring for c in p]
+    )
+    assert geometry_to_wkb({"type": "Polygon", "coordinates": [ring]}) == polygon
+    assert (
+        geometry_to_wkb({"type": "MultiPolygon", "coordinates": [[ring], [ring]]})
+        == struct.pack("<BII", 1, 6, 2) + polygon + polygon
+    )
+
+
+def test_to_table():
+    table = to_table(ITEM_COLLECTION)
+    assert table.num_rows == 3
+    assert table.column("id").to_pylist() == ["a", "b", "c"]
+    assert table.column("geometry").to_pylist()[1:] == [None, None]
+    assert pa.types.is_timestamp(table.schema.field("datetime").type)
+    assert table.column("eo:cloud_cover").to_pylist() == [10, 12.5, None]
+    assert table.column("platform").to_pylist() == ["sentinel-2a", None, None]
+    # mixed types are serialized as JSON
+    assert table.column("mixed").to_pylist() == [None, "1", '"one"']
+    assert b"geo" in table.schema.metadata
@@ -1,8 +1,16 @@
 import json
+from copy import deepcopy
+from io import BytesIO
 
+import pytest
 from httpx import codes
 
-from terra_stac_api.core import AccessType, _auth
+import terra_stac_api.core
+import terra_stac_api.serializer
+from terra_stac_api.cache import ResponseCache
+from terra_stac_api.columnar import ARROW_MEDIA_TYPE, PARQUET_MEDIA_TYPE
+from terra_stac_api.core import COLLECTIONS_PRUNED_HEADER, AccessType, _auth
+from terra_stac_api.serializer import round_coordinates
 
 from .constants import (
     COLLECTION_PROTECTED,
@@ -204,10 +212,14 @@ async def test_filter_items_collections_cql2_text(client):
 
 async def test_filter_items_collections_collections_cql2_json(client):
     item_endpoint = str(ENDPOINT_COLLECTIONS / COLLECTION_S2_TOC_V2 / "items")
+
     def filter_param(id):
-        return [("filter", json.dumps({"op": "=", "args": [{"property": "id"}, id]})), ("filter-lang", "cql2-json")]
+        return [
+            ("filter", json.dumps({"op": "=", "args": [{"property": "id"}, id]})),
+            ("filter-lang", "cql2-json"),
+        ]
 
-    response = await client.get(item_endpoint,params=filter_param("UNKNOWN_ID"))
+    response = await client.get(item_endpoint, params=filter_param("UNKNOWN_ID"))
     assert len(response.json().get("features", [])) == 0
 
     response = await client.get(item_endpoint)
@@ -216,4 +228,199 @@ async def test_filter_items_collections_collections_cql2_json(client):
     for item in response.json().get("features", []):
         response = await client.get(item_endpoint, params=filter_param(item["id"]))
         assert len(response.json().get("features", [])) == 1
-        assert response.json().get("features", [])[0]["id"] == item["id"]
\ No newline at end of file
+        assert response.json().get("features", [])[0]["id"] == item["id"]
+
+
+async def test_search_extent_pruning(client, monkeypatch):
+    monkeypatch.setattr(terra_stac_api.core.settings, "search_extent_pruning", True)
+    auth = MockAuth(ROLE_ADMIN)
+    response = await client.post(
+        str(ENDPOINT_SEARCH),
+        json={"datetime": "2010-01-01T00:00:00Z/2011-01-01T00:00:00Z"},
+        auth=auth,
+    )
+    assert response.status_code == codes.OK
+    assert response.headers[COLLECTIONS_PRUNED_HEADER] == "3"
+    assert response.json()["features"] == []
+
+    response = await client.post(
+        str(ENDPOINT_SEARCH),
+        json={"bbox": [40, 30, 50, 45], "datetime": "2023-02-20T00:00:00Z/.."},
+        auth=auth,
+    )
+    assert response.status_code == codes.OK
+    assert response.headers[COLLECTIONS_PRUNED_HEADER] == "0"
+    assert len(response.json()["features"]) == 4
+
+
+async def test_search_by_ids(client, items):
+    item_ids = [i["id"] for i in items[COLLECTION_S2_TOC_V2]][::-1]
+    response = await client.post(
+        str(ENDPOINT_SEARCH),
+        json={
+            "collections": [COLLECTION_S2_TOC_V2],
+            "ids": item_ids[:2] + ["UNKNOWN_ID"] + item_ids[2:],
+        },
+    )
+    assert response.status_code == codes.OK
+    rj = response.json()
+    assert [i["id"] for i in rj["features"]] == item_ids
+    assert rj["numberMatched"] == len(item_ids)
+
+    # like other searches, the matched items are not reported when they're not counted
+    response = await client.post(
+        str(ENDPOINT_SEARCH),
+        json={"collections": [COLLECTION_S2_TOC_V2], "ids": item_ids, "count": "none"},
+    )
+    assert "numberMatched" not in response.json()
+
+
+async def test_search_anonymous_cache(client, api, monkeypatch, extra_item):
+    monkeypatch.setattr(
+        terra_stac_api.core, "search_cache", ResponseCache(ttl=60, max_size=10)
+    )
+    response = await client.get(str(ENDPOINT_SEARCH), params={"limit": 100})
+    assert len(response.json()["features"]) == 4
+
+    # writes bypassing the transaction clients are not visible until the entry expires
+    item = deepcopy(extra_item)
+    item["collection"] = COLLECTION_S2_TOC_V2
+    await api.client.database.create_item(item, refresh=True)
+    response = await client.get(str(ENDPOINT_SEARCH), params={"limit": 100})
+    assert len(response.json()["features"]) == 4
+
+    # authenticated users are not served from the cache
+    response = await client.get(
+        str(ENDPOINT_SEARCH), params={"limit": 100}, auth=MockAuth(ROLE_PROTECTED)
+    )
+    assert len(response.json()["features"]) == 7
+
+    item["id"] = f"{item['id']}_2"
+    response = await client.post(
+        str(ENDPOINT_COLLECTIONS / COLLECTION_S2_TOC_V2 / "items"),
+        json=item,
+        auth=MockAuth(ROLE_ADMIN),
+    )
+    assert response.status_code == codes.CREATED
+    response = await client.get(str(ENDPOINT_SEARCH), params={"limit": 100})
+    assert len(response.json()["features"]) == 6
+
+
+async def test_get_item_cache(client, api, monkeypatch, items):
+    monkeypatch.setattr(
+        terra_stac_api.core, "item_cache", ResponseCache(ttl=60, max_size=10)
+    )
+    monkeypatch.setattr(
+        terra_stac_api.core, "acl_cache", ResponseCache(ttl=60, max_size=10)
+    )
+    item = deepcopy(items[COLLECTION_S2_TOC_V2][0])
+    item_endpoint = str(
+        ENDPOINT_COLLECTIONS / COLLECTION_S2_TOC_V2 / "items" / item["id"]
+    )
+    response = await client.get(item_endpoint)
+    assert response.status_code == codes.OK
+    assert response.json()["id"] == item["id"]
+
+    # writes bypassing the transaction clients (eg. through another worker) are visible
+    item["properties"]["title"] = "other worker"
+    await api.client.database.create_item(item, refresh=True, exist_ok=True)
+    response = await client.get(item_endpoint)
+    assert response.json()["properties"]["title"] == "other worker"
+    etag = response.headers["ETag"]
+    response = await client.get(item_endpoint, headers={"If-None-Match": etag})
+    assert response.status_code == codes.NOT_MODIFIED
+
+    item["properties"]["title"] = "updated"
+    response = await client.put(item_endpoint, json=item, auth=MockAuth(ROLE_ADMIN))
+    assert response.status_code == codes.OK
+    response = await client.get(item_endpoint)
+    assert response.json()["properties"]["title"] == "updated"
+
+    protected_item = items[COLLECTION_PROTECTED][0]
+    protected_item_endpoint = str(
+        ENDPOINT_COLLECTIONS / COLLECTION_PROTECTED / "items" / protected_item["id"]
+    )
+    response = await client.get(protected_item_endpoint)
+    assert response.status_code == codes.UNAUTHORIZED
+    response = await client.get(protected_item_endpoint, auth=MockAuth(ROLE_PROTECTED))
+    assert response.status_code == codes.OK
+
+
+async def test_get_item_etag(client, items):
+    item = deepcopy(items[COLLECTION_S2_TOC_V2][0])
+    item_endpoint = str(
+        ENDPOINT_COLLECTIONS / COLLECTION_S2_TOC_V2 / "items" / item["id"]
+    )
+    response = await client.get(item_endpoint)
+    assert response.status_code == codes.OK
+    etag = response.headers["ETag"]
+
+    response = await client.get(item_endpoint, headers={"If-None-Match": etag})
+    assert response.status_code == codes.NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+    assert not response.content
+
+    item["properties"]["title"] = "updated"
+    response = await client.put(item_endpoint, json=item, auth=MockAuth(ROLE_ADMIN))
+    assert response.status_code == codes.OK
+    response = await client.get(item_endpoint, headers={"If-None-Match": etag})
+    assert response.status_code == codes.OK
+    assert response.headers["ETag"] != etag
+
+
+async def test_get_collection_etag(client):
+    collection_endpoint = str(ENDPOINT_COLLECTIONS / COLLECTION_PROTECTED)
+    response = await client.get(collection_endpoint, auth=MockAuth(ROLE_PROTECTED))
+    assert response.status_code == codes.OK
+    etag = response.headers["ETag"]
+
+    response = await client.get(
+        collection_endpoint,
+        headers={"If-None-Match": etag},
+        auth=MockAuth(ROLE_PROTECTED),
+    )
+    assert response.status_code == codes.NOT_MODIFIED
+
+    # authorization is checked before the ETag
+    response = await client.get(collection_endpoint, headers={"If-None-Match": etag})
+    assert response.status_code == codes.UNAUTHORIZED
+
+
+async def test_coordinate_precision(client, monkeypatch, items):
+    monkeypatch.setattr(terra_stac_api.serializer.settings, "coordinate_precision", 2)
+    item = items[COLLECTION_S2_TOC_V2][0]
+    response = await client.get(
+        str(ENDPOINT_COLLECTIONS / COLLECTION_S2_TOC_V2 / "items" / item["id"])
+    )
+    assert response.status_code == codes.OK
+    coordinates = response.json()["geometry"]["coordinates"]
+    assert coordinates == round_coordinates(item["geometry"]["coordinates"], 2)
+    assert coordinates != item["geometry"]["coordinates"]
+
+
+async def test_search_arrow(client):
+    pa = pytest.importorskip("pyarrow")
+    response = await client.get(
+        str(ENDPOINT_SEARCH),
+        params={"limit": 100},
+        headers={"Accept": ARROW_MEDIA_TYPE},
+    )
+    assert response.status_code == codes.OK
+    assert response.headers["content-type"] == ARROW_MEDIA_TYPE
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.num_rows == 4
+    assert set(table.column("collection").to_pylist()) == {COLLECTION_S2_TOC_V2}
+    assert "eo:cloud_cover" in table.column_names
+
+
+async def test_items_geoparquet(client):
+    pq = pytest.importorskip("pyarrow.parquet")
+    response = await client.get(
+        str(ENDPOINT_COLLECTIONS / COLLECTION_S2_TOC_V2 / "items"),
+        headers={"Accept": f"{PARQUET_MEDIA_TYPE}, application/geo+json;q=0.9"},
+    )
+    assert response.status_code == codes.OK
+    assert response.headers["content-type"] == PARQUET_MEDIA_TYPE
+    table = pq.read_table(BytesIO(response.content))
+    assert table.num_rows == 4
+    assert json.loads(table.schema.metadata[b"geo"])["primary_column"] == "geometry"
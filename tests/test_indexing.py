@@ -0,0 +1,234 @@
+from copy import deepcopy
+
+import pytest
+from httpx import codes
+from stac_fastapi.sfeos_helpers.database import mk_item_id
+
+import terra_stac_api.indexing
+from terra_stac_api.indexing import (
+    SHARED_ITEMS_INDEX,
+    item_partition_index,
+    partition_index,
+    partition_keys,
+)
+
+from .constants import ENDPOINT_COLLECTIONS, ENDPOINT_SEARCH, ROLE_ADMIN
+from .mock_auth import MockAuth
+
+
+@pytest.fixture
+def partitioned_collection(monkeypatch, api, extra_collection):
+    monkeypatch.setattr(
+        terra_stac_api.indexing.settings,
+        "datetime_partitioned_collections",
+        [extra_collection["id"]],
+    )
+    yield extra_collection
+    api.client.database.async_index_inserter.forget(extra_collection["id"])
+
+
+@pytest.fixture
+def shared_collection(monkeypatch, api, extra_collection):
+    monkeypatch.setattr(terra_stac_api.indexing.settings, "shared_items_index", True)
+    monkeypatch.setattr(
+        terra_stac_api.indexing.settings, "shared_items_index_max_items", 1
+    )
+    yield extra_collection
+    api.client.database.async_index_inserter.forget(extra_collection["id"])
+
+
+def test_partition_keys():
+    assert partition_keys("2022-11-15T00:00:00Z", "2023-02-01T00:00:00Z") == [
+        "2022-11",
+        "2022-12",
+        "2023-01",
+        "2023-02",
+    ]
+    assert partition_keys(None, "2023-02-01T00:00:00Z") is None
+    # too many partitions, search through the collection alias
+    assert partition_keys("1970-01-01T00:00:00Z", "2262-04-11T23:47:16Z") is None
+    # partitions are in UTC
+    assert partition_keys("2023-01-01T00:30:00+01:00", "2023-03-01T01:00:00+02:00") == [
+        "2022-12",
+        "2023-01",
+        "2023-02",
+    ]
+
+
+def test_item_partition_index():
+    item = {"properties": {"datetime": "2023-03-01T00:30:00+01:00"}}
+    assert item_partition_index("c", item) == partition_index("c", "2023-02")
+    item = {"properties": {"datetime": "2023-02-28T23:30:00-01:00"}}
+    assert item_partition_index("c", item) == partition_index("c", "2023-03")
+
+
+async def test_partitioned_collection(client, api, partitioned_collection, extra_item):
+    database = api.client.database
+    collection_id = partitioned_collection["id"]
+    await database.create_collection(partitioned_collection, refresh=True)
+    item = deepcopy(extra_item)
+    item["collection"] = collection_id
+
+    auth = MockAuth(ROLE_ADMIN)
+    response = await client.post(
+        str(ENDPOINT_COLLECTIONS / collection_id / "items"), json=item, auth=auth
+    )
+    assert response.status_code == codes.CREATED
+    assert await database.client.indices.exists(
+        index=partition_index(collection_id, "2023-02")
+    )
+
+    response = await client.get(
+        str(ENDPOINT_COLLECTIONS / collection_id / "items" / item["id"]), auth=auth
+    )
+    assert response.status_code == codes.OK
+
+    for datetime, expected in (
+        ("2023-02-01T00:00:00Z/2023-02-28T00:00:00Z", 1),
+        ("2023-03-01T00:00:00Z/2023-04-01T00:00:00Z", 0),
+    ):
+        response = await client.post(
+            str(ENDPOINT_SEARCH),
+            json={"collections": [collection_id], "datetime": datetime},
+            auth=auth,
+        )
+        assert response.status_code == codes.OK
+        assert len(response.json()["features"]) == expected
+
+    # moving the item to another month removes it from its previous partition
+    item["properties"]["datetime"] = "2023-03-02T00:00:00Z"
+    response = await client.put(
+        str(ENDPOINT_COLLECTIONS / collection_id / "items" / item["id"]),
+        json=item,
+        auth=auth,
+    )
+    assert response.status_code == codes.OK
+    await database._refresh()
+    response = await client.get(
+        str(ENDPOINT_COLLECTIONS / collection_id / "items"), auth=auth
+    )
+    assert len(response.json()["features"]) == 1
+
+
+async def test_partition_recreated(client, api, partitioned_collection, extra_item):
+    database = api.client.database
+    collection_id = partitioned_collection["id"]
+    await database.create_collection(partitioned_collection, refresh=True)
+    item = deepcopy(extra_item)
+    item["collection"] = collection_id
+    auth = MockAuth(ROLE_ADMIN)
+    endpoint = str(ENDPOINT_COLLECTIONS / collection_id / "items")
+    response = await client.post(endpoint, json=item, auth=auth)
+    assert response.status_code == codes.CREATED
+
+    # the collection is deleted and recreated through another worker
+    await database.client.indices.delete(index=partition_index(collection_id, "*"))
+    response = await client.post(endpoint, json=item, auth=auth)
+    assert response.status_code == codes.CREATED
+    await database._refresh()
+    response = await client.get(endpoint, auth=auth)
+    assert len(response.json()["features"]) == 1
+
+
+async def test_shared_collection(client, api, shared_collection, extra_item):
+    database = api.client.database
+    collection_id = shared_collection["id"]
+    alias = f"items_{collection_id}"
+    await database.create_collection(shared_collection, refresh=True)
+    assert SHARED_ITEMS_INDEX in await database.client.indices.get_alias(name=alias)
+
+    auth = MockAuth(ROLE_ADMIN)
+    for i in range(2):
+        item = deepcopy(extra_item)
+        item["id"] = f"{item['id']}_{i}"
+        item["collection"] = collection_id
+        response = await client.post(
+            str(ENDPOINT_COLLECTIONS / collection_id / "items"), json=item, auth=auth
+        )
+        assert response.status_code == codes.CREATED
+
+    # the collection outgrew the shared index
+    await database._refresh()
+    await database.async_index_inserter.promote_if_oversized(collection_id)
+    assert SHARED_ITEMS_INDEX not in await database.client.indices.get_alias(name=alias)
+    response = await client.get(
+        str(ENDPOINT_COLLECTIONS / collection_id / "items"), auth=auth
+    )
+    assert len(response.json()["features"]) == 2
+
+    # items of other collections are not affected
+    response = await client.get(str(ENDPOINT_SEARCH), params={"limit": 100})
+    assert len(response.json()["features"]) == 4
+
+
+async def test_delete_shared_collection_stale_layout(
+    client, api, shared_collection, extra_item
+):
+    database = api.client.database
+    other = deepcopy(shared_collection)
+    other["id"] += "_other"
+    for collection in (shared_collection, other):
+        await database.create_collection(collection, refresh=True)
+        item = deepcopy(extra_item)
+        item["collection"] = collection["id"]
+        await database.create_item(item, refresh=True)
+
+    # another worker looked up the collection before it was created
+    database.async_index_inserter._shared[shared_collection["id"]] = False
+    await database.delete_collection(shared_collection["id"], refresh=True)
+
+    response = await client.get(
+        str(ENDPOINT_COLLECTIONS / other["id"] / "items"), auth=MockAuth(ROLE_ADMIN)
+    )
+    assert len(response.json()["features"]) == 1
+    await database.delete_collection(other["id"], refresh=True)
+
+
+async def test_promote_concurrent_writes(
+    monkeypatch, api, shared_collection, extra_item
+):
+    database = api.client.database
+    collection_id = shared_collection["id"]
+    alias = f"items_{collection_id}"
+    await database.create_collection(shared_collection, refresh=True)
+    ids = []
+    for i in range(3):
+        item = deepcopy(extra_item)
+        item["id"] = f"{item['id']}_{i}"
+        item["collection"] = collection_id
+        await database.create_item(item, refresh=True)
+        ids.append(mk_item_id(item["id"], collection_id))
+
+    async def title(doc_id):
+        doc = await database.client.get(index=alias, id=doc_id)
+        return doc["_source"]["properties"].get("title")
+
+    async def set_title(index, doc_id, value):
+        await database.client.update(
+            index=index,
+            id=doc_id,
+            body={"doc": {"properties": {"title": value}}},
+            refresh=True,
+        )
+
+    update_aliases = database.client.indices.update_aliases
+
+    async def swap_with_concurrent_writes(*args, **kwargs):
+        # written to the shared index after the items were copied
+        await set_title(SHARED_ITEMS_INDEX, ids[0], "before swap")
+        await set_title(SHARED_ITEMS_INDEX, ids[1], "before swap")
+        await database.client.delete(index=SHARED_ITEMS_INDEX, id=ids[2], refresh=True)
+        response = await update_aliases(*args, **kwargs)
+        # written to the dedicated index after the swap
+        await set_title(alias, ids[1], "after swap")
+        return response
+
+    monkeypatch.setattr(
+        database.client.indices, "update_aliases", swap_with_concurrent_writes
+    )
+    await database.async_index_inserter.promote(collection_id)
+
+    assert SHARED_ITEMS_INDEX not in await database.client.indices.get_alias(name=alias)
+    assert await title(ids[0]) == "before swap"
+    assert await title(ids[1]) == "after swap"
+    assert not await database.client.exists(index=alias, id=ids[2])
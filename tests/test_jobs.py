@@ -0,0 +1,133 @@
+import asyncio
+import time
+
+from starlette.requests import Request
+
+import terra_stac_api.jobs
+from terra_stac_api.jobs import JobQueue, JobStatus, respond_async
+
+
+class Indices:
+    async def exists(self, index):
+        return True
+
+
+class Client:
+    """
+    Jobs index shared by the job queues of several workers.
+    """
+
+    def __init__(self):
+        self.indices = Indices()
+        self.docs = {}
+
+    async def index(self, index, id, body):
+        self.docs[id] = body
+
+    async def get(self, index, id, ignore=None):
+        if id not in self.docs:
+            return {"found": False}
+        return {"found": True, "_source": self.docs[id]}
+
+    async def delete_by_query(self, index, body, **kwargs):
+        before = body["query"]["range"]["finished"]["lt"]
+        for job_id, doc in list(self.docs.items()):
+            if doc["finished"] is not None and doc["finished"] < before:
+                del self.docs[job_id]
+
+
+async def test_job_queue():
+    queue = JobQueue(max_concurrent=1, retention=60)
+    release = asyncio.Event()
+
+    async def work(job):
+        job.progress["done"] = 1
+        await release.wait()
+        return "ok"
+
+    async def fail(job):
+        raise ValueError("failed")
+
+    first = await queue.submit("test", "user", work)
+    second = await queue.submit("test", "user", fail)
+    await asyncio.sleep(0.01)
+    assert first.status == JobStatus.RUNNING
+    assert first.progress == {"done": 1}
+    # limited concurrency
+    assert second.status == JobStatus.QUEUED
+
+    release.set()
+    await asyncio.sleep(0.01)
+    assert first.status == JobStatus.SUCCEEDED
+    assert first.result == "ok"
+    assert second.status == JobStatus.FAILED
+    assert second.error == "failed"
+    assert await queue.get(first.id) is first
+
+
+async def test_job_queue_retention():
+    queue = JobQueue(max_concurrent=1, retention=0)
+
+    async def work(job):
+        return None
+
+    job = await queue.submit("test", "user", work)
+    assert await queue.get(job.id) is job
+    await asyncio.sleep(0.01)
+    assert await queue.get(job.id) is None
+
+
+async def test_job_status_other_worker(monkeypatch):
+    monkeypatch.setattr(terra_stac_api.jobs, "PROGRESS_INTERVAL", 0.01)
+    client = Client()
+    queue = JobQueue(max_concurrent=1, retention=60, client=client)
+    other = JobQueue(max_concurrent=1, retention=60, client=client)
+    release = asyncio.Event()
+
+    async def work(job):
+        job.progress["done"] = 1
+        await release.wait()
+        return {"ok": True}
+
+    job = await queue.submit("test", "user", work)
+    status = await other.get(job.id)
+    assert status.status == JobStatus.QUEUED
+    assert status.owner == "user"
+
+    await asyncio.sleep(0.05)
+    status = await other.get(job.id)
+    assert status.status == JobStatus.RUNNING
+    assert status.progress == {"done": 1}
+
+    release.set()
+    await asyncio.sleep(0.05)
+    assert (await other.get(job.id)).to_dict() == job.to_dict()
+    assert await other.get("unknown") is None
+
+
+async def test_job_lost():
+    client = Client()
+    queue = JobQueue(max_concurrent=1, retention=60, client=client)
+    release = asyncio.Event()
+
+    async def work(job):
+        await release.wait()
+
+    job = await queue.submit("test", "user", work)
+    # the worker running the job stopped long ago
+    client.docs[job.id]["saved"] = time.time() - 3600
+    status = await JobQueue(max_concurrent=1, retention=60, client=client).get(job.id)
+    assert status.status == JobStatus.FAILED
+    assert "interrupted" in status.error
+    assert (await queue.get(job.id)).status != JobStatus.FAILED
+    release.set()
+    await asyncio.sleep(0.01)
+
+
+def test_respond_async():
+    def request(prefer):
+        return Request({"type": "http", "headers": [(b"prefer", prefer.encode())]})
+
+    assert respond_async(request("respond-async"))
+    assert respond_async(request("return=minimal, respond-async; wait=10"))
+    assert not respond_async(request("return=minimal"))
@@ -0,0 +1,83 @@
+import pytest
+
+import terra_stac_api.metrics
+from terra_stac_api.cache import ResponseCache
+from terra_stac_api.instrumentation import instrument_transport, opensearch_operation
+
+pytest.importorskip("prometheus_client")
+
+from terra_stac_api.metrics import (  # noqa: E402
+    CACHE_EVENTS,
+    OPENSEARCH_DURATION,
+)
+
+
+@pytest.fixture
+def metrics_enabled(monkeypatch):
+    monkeypatch.setattr(terra_stac_api.metrics.settings, "metrics_enabled", True)
+
+
+def sample(metric, name, **labels):
+    for m in metric.collect():
+        for s in m.samples:
+            if s.name == name and s.labels == labels:
+                return s.value
+    return 0.0
+
+
+def test_opensearch_operation():
+    assert opensearch_operation("POST", "/items_c/_search?size=10") == "search"
+    assert opensearch_operation("POST", "/_search/scroll") == "search"
+    assert opensearch_operation("POST", "/items_c/_count") == "count"
+    assert opensearch_operation("GET", "/collections/_doc/c") == "get"
+    assert opensearch_operation("PUT", "/collections/_doc/c") == "index"
+    assert opensearch_operation("POST", "/_bulk") == "bulk"
+    assert opensearch_operation("POST", "/collections/_mget") == "mget"
+    assert opensearch_operation("HEAD", "/items_c") == "index_head"
+
+
+def test_cache_events(metrics_enabled):
+    def count(event):
+        return sample(
+            CACHE_EVENTS, "stac_cache_events_total", cache="test", event=event
+        )
+
+    before = {e: count(e) for e in ("hit", "miss", "evicted")}
+    cache = ResponseCache(ttl=60, max_size=1, name="test")
+    cache.put("a", 1, [])
+    cache.get("a")
+    cache.put("b", 2, [])
+    cache.get("a")
+    assert count("hit") == before["hit"] + 1
+    assert count("miss") == before["miss"] + 1
+    assert count("evicted") == before["evicted"] + 1
+
+
+def test_cache_events_disabled():
+    before = sample(
+        CACHE_EVENTS, "stac_cache_events_total", cache="disabled", event="miss"
+    )
+    ResponseCache(ttl=60, max_size=1, name="disabled").get("a")
+    assert (
+        sample(CACHE_EVENTS, "stac_cache_events_total", cache="disabled", event="miss")
+        == before
+    )
+
+
+async def test_instrument_transport(metrics_enabled):
+    class Transport:
+        async def perform_request(self, method, url, headers=None, params=None):
+            return {"url": url}
+
+    def count():
+        return sample(
+            OPENSEARCH_DURATION,
+            "stac_opensearch_duration_seconds_count",
+            operation="mget",
+        )
+
+    before = count()
+    transport = Transport()
+    instrument_transport(transport)
+    assert await transport.perform_request("POST", "/_mget") == {"url": "/_mget"}
+    assert count() == before + 1
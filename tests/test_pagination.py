@@ -0,0 +1,149 @@
+from collections import OrderedDict
+from copy import deepcopy
+
+import pytest
+from fastapi import HTTPException
+from httpx import codes
+
+import terra_stac_api.pagination
+from terra_stac_api.config import Settings
+from terra_stac_api.pagination import (
+    decode_pit_token,
+    encode_pit_token,
+    known_count,
+    page_size,
+    set_count_mode,
+    truncate_page,
+)
+
+from .constants import ENDPOINT_COLLECTIONS, ENDPOINT_SEARCH, ROLE_ADMIN
+from .mock_auth import MockAuth
+
+
+@pytest.fixture
+def token_secret(monkeypatch):
+    monkeypatch.setattr(
+        terra_stac_api.pagination.settings, "search_token_secret", "secret"
+    )
+
+
+@pytest.fixture
+def pit_pagination(monkeypatch, token_secret):
+    monkeypatch.setattr(
+        terra_stac_api.pagination.settings, "search_pit_pagination", True
+    )
+
+
+def test_token_secret_required(monkeypatch):
+    monkeypatch.setenv("SEARCH_PIT_PAGINATION", "true")
+    # the workers would not accept the tokens of each other
+    with pytest.raises(ValueError, match="SEARCH_TOKEN_SECRET"):
+        Settings()
+    monkeypatch.setenv("SEARCH_TOKEN_SECRET", "secret")
+    assert Settings().search_token_secret == "secret"
+
+
+def test_pit_token(token_secret):
+    token = encode_pit_token("pit", ["2023-02-20T07:49:41.024Z", "id"], 7, "fp")
+    assert decode_pit_token(token, "fp") == {
+        "pit": "pit",
+        "after": ["2023-02-20T07:49:41.024Z", "id"],
+        "matched": 7,
+        "fp": "fp",
+    }
+    # tokens can't be used for another search
+    with pytest.raises(HTTPException):
+        decode_pit_token(token, "other")
+    # or be tampered with
+    payload, signature = token.split(".")
+    with pytest.raises(HTTPException):
+        decode_pit_token(f"{payload[:-2]}.{signature}", "fp")
+
+
+async def test_pit_pagination(client, api, pit_pagination, items, extra_item):
+    auth = MockAuth(ROLE_ADMIN)
+    response = await client.get(str(ENDPOINT_SEARCH), params={"limit": 2}, auth=auth)
+    assert response.status_code == codes.OK
+    rj = response.json()
+    assert rj["numberMatched"] == 7
+    item_ids = [i["id"] for i in rj["features"]]
+
+    # items written during the pagination are not visible
+    item = deepcopy(extra_item)
+    item["collection"] = next(iter(items))
+    await api.client.database.create_item(item, refresh=True)
+
+    while next_link := next(
+        (link for link in rj["links"] if link["rel"] == "next"), None
+    ):
+        response = await client.get(next_link["href"], auth=auth)
+        assert response.status_code == codes.OK
+        rj = response.json()
+        assert rj["numberMatched"] == 7
+        item_ids.extend(i["id"] for i in rj["features"])
+
+    assert sorted(item_ids) == sorted(i["id"] for c in items.values() for i in c)
+
+
+async def test_count_modes(client, monkeypatch):
+    monkeypatch.setattr(terra_stac_api.pagination.settings, "search_count_max", 2)
+    for count, expected in (("exact", 4), ("approximate", None), ("none", None)):
+        response = await client.get(str(ENDPOINT_SEARCH), params={"count": count})
+        assert response.status_code == codes.OK
+        assert response.json().get("numberMatched") == expected
+        assert len(response.json()["features"]) == 4
+
+    response = await client.post(str(ENDPOINT_SEARCH), json={"count": "none"})
+    assert "numberMatched" not in response.json()
+
+    monkeypatch.setattr(terra_stac_api.pagination.settings, "search_count", "none")
+    response = await client.get(str(ENDPOINT_SEARCH))
+    assert "numberMatched" not in response.json()
+    response = await client.get(str(ENDPOINT_COLLECTIONS))
+    assert "numberMatched" not in response.json()
+
+    response = await client.get(str(ENDPOINT_SEARCH), params={"count": "invalid"})
+    assert response.status_code == codes.BAD_REQUEST
+
+
+async def test_page_max_bytes(client, monkeypatch):
+    monkeypatch.setattr(terra_stac_api.pagination.settings, "search_page_max_bytes", 1)
+    response = await client.get(str(ENDPOINT_SEARCH), params={"limit": 10})
+    rj = response.json()
+    assert len(rj["features"]) == 1
+    item_ids = [i["id"] for i in rj["features"]]
+    while next_link := next(
+        (link for link in rj["links"] if link["rel"] == "next"), None
+    ):
+        rj = (await client.get(next_link["href"])).json()
+        assert len(rj["features"]) == 1
+        item_ids.extend(i["id"] for i in rj["features"])
+    assert len(set(item_ids)) == 4
+
+
+def test_page_size(monkeypatch):
+    monkeypatch.setattr(
+        terra_stac_api.pagination.settings, "search_page_max_bytes", 100
+    )
+    monkeypatch.setattr(terra_stac_api.pagination, "_item_sizes", OrderedDict())
+    assert page_size(10, ["c1"]) == 10
+    hits = [{"_source": {"id": "x" * 30}}] * 10
+    assert len(truncate_page(hits, ["c1"])) == 2
+    # only about as many items as fit in a page are fetched next
+    assert page_size(10, ["c1"]) == 2
+    assert page_size(1, ["c1"]) == 1
+    # the items of other collections can be smaller
+    assert page_size(10, ["c1", "c2"]) == 10
+    assert page_size(10) == 10
+
+
+def test_known_count(monkeypatch):
+    monkeypatch.setattr(terra_stac_api.pagination.settings, "search_count_max", 10)
+    set_count_mode("exact")
+    assert known_count(20) == 20
+    set_count_mode("approximate")
+    assert known_count(10) == 10
+    assert known_count(11) is None
+    set_count_mode("none")
+    assert known_count(1) is None
+    set_count_mode(None)
@@ -0,0 +1,42 @@
+from stac_fastapi.types.search import BaseSearchPostRequest
+
+from terra_stac_api.planning import bbox_intersects, prune_collections
+
+EXTENT_EUROPE = {
+    "spatial": {"bbox": [[-10, 35, 30, 70]]},
+    "temporal": {"interval": [["2015-06-23T00:00:00Z", None]]},
+}
+EXTENT_PACIFIC = {
+    "spatial": {"bbox": [[170, -20, -170, 20]]},
+    "temporal": {"interval": [["2000-01-01T00:00:00Z", "2010-01-01T00:00:00Z"]]},
+}
+COLLECTIONS = [
+    {"id": "europe", "extent": EXTENT_EUROPE},
+    {"id": "pacific", "extent": EXTENT_PACIFIC},
+    {"id": "unknown"},
+]
+
+
+def test_bbox_intersects():
+    assert bbox_intersects([0, 0, 10, 10], [5, 5, 15, 15])
+    assert not bbox_intersects([0, 0, 10, 10], [11, 0, 15, 10])
+    # crossing the antimeridian
+    assert bbox_intersects([170, -10, -170, 10], [-175, 0, -172, 5])
+    assert not bbox_intersects([170, -10, -170, 10], [0, 0, 10, 10])
+    # 3D
+    assert bbox_intersects([0, 0, -100, 10, 10, 100], [5, 5, 15, 15])
+
+
+def test_prune_collections():
+    def prune(**kwargs):
+        return prune_collections(COLLECTIONS, BaseSearchPostRequest(**kwargs))
+
+    assert prune() == ["europe", "pacific", "unknown"]
+    assert prune(bbox=[0, 40, 5, 45]) == ["europe", "unknown"]
+    assert prune(bbox=[175, 0, 178, 5]) == ["pacific", "unknown"]
+    assert prune(datetime="2020-01-01T00:00:00Z") == ["europe", "unknown"]
+    assert prune(datetime="../2005-01-01T00:00:00Z") == ["pacific", "unknown"]
+    assert prune(bbox=[0, 40, 5, 45], datetime="2005-01-01T00:00:00Z") == ["unknown"]
+    assert prune(
+        intersects={"type": "Point", "coordinates": [179, 1]},
+    ) == ["pacific", "unknown"]
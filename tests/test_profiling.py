@@ -0,0 +1,73 @@
+import json
+
+import pytest
+from starlette.applications import Starlette
+from starlette.authentication import AuthCredentials, UnauthenticatedUser
+from starlette.middleware import Middleware
+from starlette.middleware.authentication import AuthenticationMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from terra_stac_api import profiling
+
+pytest.importorskip("pyinstrument")
+
+
+class Backend:
+    async def authenticate(self, conn):
+        return AuthCredentials(conn.headers.get("roles", "").split(",")), (
+            UnauthenticatedUser()
+        )
+
+
+async def endpoint(request):
+    return JSONResponse({"query": str(request.query_params)})
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(profiling.settings, "profiling_enabled", True)
+    app = Starlette(
+        routes=[Route("/", endpoint)],
+        middleware=[
+            Middleware(AuthenticationMiddleware, backend=Backend()),
+            Middleware(profiling.ProfilingMiddleware),
+        ],
+    )
+    return TestClient(app)
+
+
+def test_profile(client):
+    response = client.get(
+        "/?limit=1&profile=speedscope",
+        headers={"roles": profiling.settings.role_admin},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert "speedscope" in json.loads(response.text)["$schema"]
+
+    response = client.get(
+        "/?profile=html", headers={"roles": profiling.settings.role_admin}
+    )
+    assert response.headers["content-type"].startswith("text/html")
+
+
+def test_profile_invalid_output(client):
+    response = client.get(
+        "/?profile=svg", headers={"roles": profiling.settings.role_admin}
+    )
+    assert response.status_code == 400
+
+
+def test_profile_not_admin(client):
+    response = client.get("/?limit=1&profile=html", headers={"roles": "stac-user"})
+    assert response.json() == {"query": "limit=1&profile=html"}
+
+
+def test_profile_disabled(client, monkeypatch):
+    monkeypatch.setattr(profiling.settings, "profiling_enabled", False)
+    response = client.get(
+        "/?profile=html", headers={"roles": profiling.settings.role_admin}
+    )
+    assert response.json() == {"query": "profile=html"}
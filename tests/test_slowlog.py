@@ -0,0 +1,90 @@
+import logging
+
+import pytest
+from starlette.applications import Starlette
+from starlette.authentication import AuthCredentials, UnauthenticatedUser
+from starlette.middleware import Middleware
+from starlette.middleware.authentication import AuthenticationMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from terra_stac_api import slowlog
+from terra_stac_api.instrumentation import instrument_transport
+
+QUERY = {"query": {"bool": {"filter": [{"term": {"collection": "c"}}]}}}
+
+
+class Transport:
+    async def perform_request(self, method, url, headers=None, params=None, body=None):
+        return {"took": 42, "hits": {"total": {"value": 0}, "hits": []}}
+
+
+@pytest.fixture
+def threshold(monkeypatch):
+    monkeypatch.setattr(slowlog.settings, "slow_query_threshold", 0.0)
+    monkeypatch.setattr(slowlog.settings, "slow_query_sample_rate", 1.0)
+
+
+async def test_slow_query(threshold, caplog):
+    transport = Transport()
+    instrument_transport(transport)
+    with caplog.at_level(logging.WARNING, logger="terra_stac_api.slowlog"):
+        await transport.perform_request(
+            "POST", "/items_c%2Citems_d/_search?size=10", body=QUERY
+        )
+    (record,) = caplog.records
+    assert record.slow_query["index"] == "items_c,items_d"
+    assert record.slow_query["params"] == "size=10"
+    assert record.slow_query["took_ms"] == 42
+    assert record.slow_query["body"] == (
+        '{"query":{"bool":{"filter":[{"term":{"collection":"c"}}]}}}'
+    )
+    assert record.slow_query["roles"] is None
+
+
+async def test_fast_query(threshold, monkeypatch, caplog):
+    monkeypatch.setattr(slowlog.settings, "slow_query_threshold", 60.0)
+    transport = Transport()
+    instrument_transport(transport)
+    with caplog.at_level(logging.WARNING, logger="terra_stac_api.slowlog"):
+        await transport.perform_request("POST", "/_search", body=QUERY)
+    assert not caplog.records
+
+
+def test_sampled(threshold, monkeypatch, caplog):
+    monkeypatch.setattr(slowlog.settings, "slow_query_sample_rate", 0.0)
+    with caplog.at_level(logging.WARNING, logger="terra_stac_api.slowlog"):
+        slowlog.log_slow_query("POST", "/_search", QUERY, {}, 1.0)
+    assert not caplog.records
+
+
+def test_long_body(threshold, caplog):
+    with caplog.at_level(logging.WARNING, logger="terra_stac_api.slowlog"):
+        slowlog.log_slow_query("POST", "/_bulk", b"x" * 20000, None, 1.0)
+    (record,) = caplog.records
+    assert record.slow_query["body"].endswith("... (20000 characters)")
+    assert record.slow_query["index"] is None
+    assert record.slow_query["took_ms"] is None
+
+
+def test_roles(threshold, caplog):
+    class Backend:
+        async def authenticate(self, conn):
+            return AuthCredentials(["stac-user", "anonymous"]), UnauthenticatedUser()
+
+    async def endpoint(request):
+        slowlog.log_slow_query("POST", "/collections/_search", QUERY, {}, 1.0)
+        return JSONResponse({})
+
+    app = Starlette(
+        routes=[Route("/", endpoint)],
+        middleware=[
+            Middleware(AuthenticationMiddleware, backend=Backend()),
+            Middleware(slowlog.SlowLogRolesMiddleware),
+        ],
+    )
+    with caplog.at_level(logging.WARNING, logger="terra_stac_api.slowlog"):
+        TestClient(app).get("/")
+    (record,) = caplog.records
+    assert record.slow_query["roles"] == ["anonymous", "stac-user"]
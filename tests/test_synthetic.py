@@ -0,0 +1,59 @@
+import json
+
+from stac_pydantic import Collection, Item
+
+from terra_stac_api import synthetic
+from terra_stac_api.validation import item_errors
+
+
+def test_deterministic():
+    def generate(seed):
+        return [(c, list(i)) for c, i in synthetic.dataset(seed, 3, 5)]
+
+    assert generate(1) == generate(1)
+    assert generate(1) != generate(2)
+    # a collection only depends on the seed and its index
+    (_, c_items), *_ = synthetic.dataset(1, 1, 5)
+    assert list(c_items) == generate(1)[0][1]
+    assert synthetic.collection(1, 2) == generate(1)[2][0]
+
+
+def test_collections():
+    collections = [synthetic.collection(0, i, roles=10) for i in range(200)]
+    assert len({c["id"] for c in collections}) == 200
+    reads = [c["_auth"]["read"] for c in collections]
+    assert any(r == [synthetic.ROLE_ANONYMOUS] for r in reads)
+    assert any(r == [] for r in reads)
+    assert any(r and r[0].startswith("role-") for r in reads)
+    for c in collections[:10]:
+        Collection(**c)
+        assert len(c["summaries"]["eo:bands"]) >= 8
+        assert len(c["renders"]) >= 3
+
+
+def test_items():
+    collection = synthetic.collection(0, 0)
+    c_items = list(synthetic.items(0, collection, 50))
+    assert len({i["id"] for i in c_items}) == 50
+    for item in c_items:
+        assert item_errors(item) == []
+        Item(**item)
+        assert item["collection"] == collection["id"]
+        ring = (
+            item["geometry"]["coordinates"][0][0]
+            if item["geometry"]["type"] == "MultiPolygon"
+            else item["geometry"]["coordinates"][0]
+        )
+        assert len(ring) > 8
+        assert ring[0] == ring[-1]
+        west, south, east, north = item["bbox"]
+        assert all(west <= x <= east and south <= y <= north for x, y in ring)
+
+
+def test_write_files(tmp_path):
+    synthetic.write_files(synthetic.dataset(0, 2, 3), tmp_path)
+    collection_files = sorted((tmp_path / "collections").glob("*.json"))
+    assert [p.stem for p in collection_files] == ["synthetic-00000", "synthetic-00001"]
+    with open(tmp_path / "items/synthetic-00001.ndjson") as f:
+        c_items = [json.loads(line) for line in f]
+    assert c_items == list(synthetic.items(0, synthetic.collection(0, 1), 3))
@@ -0,0 +1,65 @@
+import logging
+
+import pytest
+from brotli_asgi import BrotliMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import terra_stac_api.timing
+from terra_stac_api.timing import (
+    ResponseStartMiddleware,
+    ServerTimingMiddleware,
+    format_server_timing,
+    phase,
+)
+
+
+async def endpoint(request):
+    with phase("opensearch"):
+        pass
+    with phase("opensearch"):
+        pass
+    return JSONResponse({"data": "x" * 1000})
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(terra_stac_api.timing.settings, "server_timing", True)
+    app = Starlette(
+        routes=[Route("/", endpoint)],
+        middleware=[
+            Middleware(ServerTimingMiddleware),
+            Middleware(BrotliMiddleware),
+            Middleware(ResponseStartMiddleware),
+        ],
+    )
+    return TestClient(app)
+
+
+def test_format_server_timing():
+    assert (
+        format_server_timing({"auth": 0.0012, "total": 0.05})
+        == "auth;dur=1.2, total;dur=50.0"
+    )
+
+
+def test_server_timing(client, caplog):
+    with caplog.at_level(logging.INFO, logger="terra_stac_api.timing"):
+        response = client.get("/", headers={"Accept-Encoding": "br"})
+    assert response.headers["Content-Encoding"] == "br"
+    phases = [p.split(";")[0] for p in response.headers["Server-Timing"].split(", ")]
+    assert phases == ["opensearch", "compress", "total"]
+    (record,) = caplog.records
+    assert set(record.server_timing) == {"opensearch", "compress", "total"}
+
+
+def test_server_timing_disabled(client, monkeypatch):
+    monkeypatch.setattr(terra_stac_api.timing.settings, "server_timing", False)
+    response = client.get("/")
+    assert "Server-Timing" not in response.headers
+    # phases outside of requests are ignored
+    with phase("opensearch"):
+        pass
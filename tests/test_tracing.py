@@ -0,0 +1,105 @@
+import json
+
+import pytest
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from terra_stac_api import instrumentation, tracing
+
+pytest.importorskip("opentelemetry.sdk")
+
+TRACE_ID = "0af7651916cd43dd8448eb211c80319c"
+PARENT_ID = "b7ad6b7169203331"
+
+
+@pytest.fixture
+def spans_file(monkeypatch, tmp_path):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing.settings, "tracing_exporter", "file")
+    monkeypatch.setattr(tracing.settings, "tracing_file", str(path))
+    monkeypatch.setattr(tracing, "_tracer", None)
+    tracing.setup()
+    return path
+
+
+def read_spans(path):
+    with open(path) as f:
+        return {s["name"]: s for s in map(json.loads, f)}
+
+
+async def endpoint(request):
+    with tracing.span("ensure_authorized_for_collection", {"stac.collection": "c"}):
+        headers = tracing.inject_headers({})
+    return JSONResponse(headers)
+
+
+def test_tracing(spans_file):
+    app = Starlette(
+        routes=[Route("/", endpoint)],
+        middleware=[Middleware(tracing.TracingMiddleware)],
+    )
+    response = TestClient(app).get(
+        "/", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"}
+    )
+    assert response.status_code == 200
+    assert response.json()["X-Opaque-Id"] == TRACE_ID
+
+    spans = read_spans(spans_file)
+    server = spans["GET"]
+    child = spans["ensure_authorized_for_collection"]
+    assert (
+        server["context"]["trace_id"]
+        == child["context"]["trace_id"]
+        == ("0x" + TRACE_ID)
+    )
+    assert server["parent_id"] == "0x" + PARENT_ID
+    assert child["parent_id"] == server["context"]["span_id"]
+    assert server["attributes"]["http.response.status_code"] == 200
+    assert child["attributes"]["stac.collection"] == "c"
+    assert response.json()["traceparent"].split("-")[2] == child["context"][
+        "span_id"
+    ].removeprefix("0x")
+
+
+def test_tracing_disabled(monkeypatch):
+    monkeypatch.setattr(tracing, "_tracer", None)
+    with tracing.span("x") as span:
+        assert span is None
+
+
+async def test_instrument_transport(spans_file):
+    class Transport:
+        async def perform_request(self, method, url, headers=None, body=None):
+            return {"hits": {"total": {"value": 12}, "hits": [headers]}}
+
+    transport = Transport()
+    instrumentation.instrument_transport(transport)
+    response = await transport.perform_request("POST", "/items_c/_search")
+    (headers,) = response["hits"]["hits"]
+    assert "traceparent" in headers
+
+    span = read_spans(spans_file)["opensearch search"]
+    assert span["attributes"] == {
+        "db.system": "opensearch",
+        "db.operation": "search",
+        "db.opensearch.index": "items_c",
+        "db.opensearch.hits": 12,
+        "db.opensearch.returned": 1,
+    }
+    assert headers["X-Opaque-Id"] == span["context"]["trace_id"].removeprefix("0x")
+
+
+def test_response_attributes():
+    assert instrumentation.response_attributes({"count": 3}) == {
+        "db.opensearch.hits": 3
+    }
+    assert instrumentation.response_attributes(
+        {"docs": [{"found": True}, {"found": False}]}
+    ) == {"db.opensearch.hits": 1}
+    assert instrumentation.response_attributes({"items": [{}, {}]}) == {
+        "db.opensearch.returned": 2
+    }
+    assert instrumentation.response_attributes(True) == {}
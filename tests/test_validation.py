@@ -0,0 +1,54 @@
+import json
+from copy import deepcopy
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+from terra_stac_api.validation import MAX_REPORTED_ERRORS, check_items, item_errors
+
+RESOURCES = Path(__file__).parent / "resources"
+
+
+@pytest.fixture
+def item():
+    with open(RESOURCES / "items/extra/S2A_20230220T093031_36VVR_TOC_V210.json") as f:
+        return json.load(f)
+
+
+def test_item_errors_valid(item):
+    assert item_errors(item) == []
+    del item["properties"]["datetime"]
+    item["properties"]["start_datetime"] = "2023-02-20T09:30:31Z"
+    item["properties"]["end_datetime"] = "2023-02-20T09:30:31Z"
+    assert item_errors(item) == []
+
+
+def test_item_errors_invalid(item):
+    assert item_errors("item") == ["not an object"]
+    invalid = deepcopy(item)
+    del invalid["id"]
+    invalid["geometry"] = {"type": "Circle", "coordinates": [0, 0]}
+    invalid["bbox"] = [0, 0, 1]
+    invalid["properties"]["datetime"] = "yesterday"
+    assert item_errors(invalid) == [
+        "id must be a non-empty string",
+        "geometry must be a GeoJSON geometry",
+        "bbox must be an array of 4 or 6 numbers",
+        "datetime must be an RFC 3339 datetime",
+    ]
+    invalid = deepcopy(item)
+    invalid["properties"]["datetime"] = None
+    invalid["properties"].pop("start_datetime", None)
+    assert item_errors(invalid) == [
+        "start_datetime and end_datetime are required without datetime"
+    ]
+
+
+def test_check_items(item):
+    check_items([("a", item)])
+    with pytest.raises(HTTPException) as e:
+        check_items([("a", item)] + [(str(i), {}) for i in range(MAX_REPORTED_ERRORS)])
+    assert e.value.status_code == 400
+    assert e.value.detail.startswith("Invalid items: 0: type must be Feature;")
+    assert e.value.detail.endswith("more errors)")